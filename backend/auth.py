@@ -1,10 +1,15 @@
 from fastapi import APIRouter, HTTPException, Response, Request, Cookie
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
 import httpx
 from datetime import datetime, timezone, timedelta
 from models.user import User, UserSession, SessionData, UserResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from db.user_sessions import create_session, delete_session, find_session
+from db.users import upsert_login_user
+from utils import auth_cache
 import os
+import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,36 +28,103 @@ EMERGENT_SESSION_API = "https://demobackend.emergentagent.com/auth/v1/env/oauth/
 
 # Helper function to get user from session
 async def get_user_from_session(session_token: str) -> Optional[User]:
-    """Get user from session token (checks cookie first, then Authorization header)"""
+    """
+    Get user from session token (checks cookie first, then Authorization header)
+    
+    Session and user lookups go through the auth context cache, so a
+    repeat request costs two dictionary hits instead of two queries.
+    """
     if not session_token:
         return None
     
     try:
-        # Find session in database
-        session = await db.user_sessions.find_one({"session_token": session_token})
+        # Find session (cached by token hash until it expires)
+        session = await auth_cache.get_session(session_token, lambda: find_session(session_token))
         if not session:
             logger.warning(f"Session not found for token: {session_token[:10]}...")
             return None
         
-        # Check if session expired
-        if session["expires_at"] < datetime.now(timezone.utc):
+        # Check if session expired (the TTL index deletes it shortly)
+        if session["expires_at"] < time.time():
             logger.warning(f"Session expired for token: {session_token[:10]}...")
-            await db.user_sessions.delete_one({"session_token": session_token})
+            auth_cache.invalidate_token(session_token)
             return None
         
-        # Get user
-        user_doc = await db.users.find_one({"_id": session["user_id"]})
+        # Get user (cached for a short TTL)
+        user_doc = await auth_cache.get_user(
+            session["user_id"],
+            lambda: db.users.find_one({"_id": session["user_id"]})
+        )
         if not user_doc:
             logger.warning(f"User not found for session: {session['user_id']}")
             return None
         
-        # Map MongoDB _id to Pydantic id
+        # Map MongoDB _id to Pydantic id (copy: the cached document is shared)
+        user_doc = dict(user_doc)
         user_doc["id"] = user_doc.pop("_id")
         return User(**user_doc)
     except Exception as e:
         logger.error(f"Error getting user from session: {str(e)}")
         return None
 
+async def login_user(
+    email: str,
+    on_insert: Dict[str, Any],
+    on_login: Dict[str, Any],
+    token_for: Callable[[str], str],
+    expires_at: datetime
+) -> Tuple[Dict[str, Any], str]:
+    """
+    Upsert the user logging in and store their session
+
+    When this worker has seen the email log in before, the session is
+    written concurrently with the user upsert (one round trip of latency
+    instead of two); the returned user id is checked against the hint and
+    the session is rewritten in the rare case it changed. First logins
+    upsert first, since the user id is not known yet.
+
+    Args:
+        email: Login email
+        on_insert / on_login: Passed to upsert_login_user
+        token_for: Builds the session token for a user id
+        expires_at: Session expiry
+
+    Returns:
+        (user document, session token)
+    
+    Raises:
+        HTTPException: 409 if the new user's id belongs to another email
+    """
+    known_id = auth_cache.known_user_id(email)
+    if known_id is not None:
+        token = token_for(known_id)
+        user, session = await asyncio.gather(
+            upsert_login_user(email, on_insert, on_login),
+            create_session(known_id, token, expires_at),
+            return_exceptions=True
+        )
+        if isinstance(user, dict) and user["_id"] == known_id:
+            if isinstance(session, BaseException):
+                raise session
+            return user, token
+        
+        # The session was written for a user the upsert did not confirm
+        if not isinstance(session, BaseException):
+            await delete_session(token)
+        if isinstance(user, BaseException):
+            raise user
+        if user is not None:
+            logger.warning(f"Login id hint for {email} was stale; rewriting session")
+    else:
+        user = await upsert_login_user(email, on_insert, on_login)
+    
+    if user is None:
+        raise HTTPException(status_code=409, detail="Account id already in use by another email")
+
+    token = token_for(user["_id"])
+    await create_session(user["_id"], token, expires_at)
+    return user, token
+
 @auth_router.post("/process-session")
 async def process_session(request: Request, response: Response):
     """Process session_id from Emergent OAuth and create local session"""
@@ -77,33 +149,21 @@ async def process_session(request: Request, response: Response):
             
             session_data = SessionData(**emergent_response.json())
         
-        # Check if user exists
-        existing_user = await db.users.find_one({"email": session_data.email})
-        
-        if not existing_user:
-            # Create new user
-            user_doc = {
+        # Upsert the user and store the session (capped per user, expired by the TTL index)
+        now = datetime.now(timezone.utc)
+        user, _ = await login_user(
+            session_data.email,
+            on_insert={
                 "_id": session_data.id,
-                "email": session_data.email,
                 "name": session_data.name,
                 "picture": session_data.picture,
-                "created_at": datetime.now(timezone.utc)
-            }
-            await db.users.insert_one(user_doc)
-            user_id = session_data.id
-            logger.info(f"Created new user: {session_data.email}")
-        else:
-            user_id = existing_user["_id"]
-            logger.info(f"User already exists: {session_data.email}")
-        
-        # Create session
-        session_doc = {
-            "user_id": user_id,
-            "session_token": session_data.session_token,
-            "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
-            "created_at": datetime.now(timezone.utc)
-        }
-        await db.user_sessions.insert_one(session_doc)
+                "created_at": now
+            },
+            on_login={"last_login": now},
+            token_for=lambda _user_id: session_data.session_token,
+            expires_at=now + timedelta(days=7)
+        )
+        user_id = user["_id"]
         
         # Set httpOnly cookie
         response.set_cookie(
@@ -170,8 +230,8 @@ async def logout(
 ):
     """Logout user and clear session"""
     if session_token:
-        # Delete session from database
-        await db.user_sessions.delete_one({"session_token": session_token})
+        # Delete session from database and forget it in this worker
+        await delete_session(session_token)
     
     # Clear cookie
     response.delete_cookie(key="session_token", path="/")
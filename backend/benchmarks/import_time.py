@@ -0,0 +1,70 @@
+"""
+Import-Time Benchmark
+Measures cold import cost of the app with `python -X importtime`
+
+Usage (from backend/):
+    python benchmarks/import_time.py                   # import server, show top 15
+    python benchmarks/import_time.py --module routes.nodes --top 25
+    python benchmarks/import_time.py --budget-ms 800   # exit 1 if over budget
+
+Importing must stay cheap: no database or LLM clients are created at
+import time (see db/connection.py and services/llm_client.py).
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def measure_import(module: str) -> list:
+    """
+    Import a module in a fresh interpreter and parse -X importtime output
+
+    Returns:
+        List of (package, self_us, cumulative_us) in import order
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, package = line[len("import time:"):].split("|", 2)
+        rows.append((package.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app import time")
+    parser.add_argument("--module", default="server", help="Module to import (default: server)")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to show")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if total import time exceeds this")
+    args = parser.parse_args()
+
+    rows = measure_import(args.module)
+
+    # Top-level imports (no leading indentation) add up to the total
+    total_us = sum(cumulative for package, _, cumulative in rows if not package.startswith("  "))
+
+    print(f"Import of '{args.module}': {total_us / 1000:.1f}ms across {len(rows)} modules\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for package, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {package.strip()}")
+
+    if args.budget_ms is not None and total_us / 1000 > args.budget_ms:
+        print(f"\nOver budget: {total_us / 1000:.1f}ms > {args.budget_ms}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Serialization Benchmark
+Time to render a /api/nodes-shaped response per payload size
+
+Compares the three ways a response can be serialized:
+- stdlib:  jsonable_encoder + stdlib json (FastAPI's previous default path)
+- encoder+fast: jsonable_encoder + FastJSONResponse (default_response_class)
+- fast: FastJSONResponse returned directly (no jsonable_encoder pass)
+
+Usage (from backend/):
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --sizes 10 100 1000 --repeat 50
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from utils.responses import FastJSONResponse, orjson  # noqa: E402
+
+
+def make_payload(size: int) -> dict:
+    """A nodes listing with `size` full-view nodes"""
+    created = datetime(2025, 1, 1)
+    nodes = [
+        {
+            "id": f"mcp_{i:08x}",
+            "title": f"Concept {i} about spaced repetition and memory",
+            "state": ("fading", "medium", "high")[i % 3],
+            "score": i % 100,
+            "connections": [f"mcp_{(i + k) % max(size, 1):08x}" for k in range(1, 6)],
+            "created_at": (created + timedelta(minutes=i)).isoformat(),
+            "lastReview": "Never",
+            "source_platform": "claude",
+            "docId": None,
+            "quizzesTaken": i % 7,
+            "quizId": f"quiz_{i}",
+            "summaryId": None,
+            "isMCP": True
+        }
+        for i in range(size)
+    ]
+    return {"nodes": nodes, "total": size, "showing": size, "has_more": False, "next_cursor": None}
+
+
+def time_per_call(render, repeat: int) -> float:
+    """Best-of-3 mean seconds per call"""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            render()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization by payload size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=20, help="Calls per timing run")
+    args = parser.parse_args()
+
+    paths = {
+        "stdlib": lambda payload: JSONResponse(jsonable_encoder(payload)).body,
+        "encoder+fast": lambda payload: FastJSONResponse(jsonable_encoder(payload)).body,
+        "fast": lambda payload: FastJSONResponse(payload).body,
+    }
+
+    print(f"Serializer: {'orjson ' + orjson.__version__ if orjson else 'stdlib json (orjson not installed)'}\n")
+    print(f"{'nodes':>6} {'KB':>8} " + " ".join(f"{name + ' ms':>16}" for name in paths) + f" {'speedup':>8}")
+    for size in args.sizes:
+        payload = make_payload(size)
+        assert json.loads(paths["fast"](payload)) == json.loads(paths["stdlib"](payload))
+        kilobytes = len(paths["fast"](payload)) / 1024
+        timings = {name: time_per_call(lambda: render(payload), args.repeat) for name, render in paths.items()}
+        print(
+            f"{size:>6} {kilobytes:>8.1f} "
+            + " ".join(f"{timings[name] * 1000:>16.3f}" for name in paths)
+            + f" {timings['stdlib'] / timings['fast']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,89 @@
 """
 Database Connection
 Centralized MongoDB connection management
+
+The client is built from environment configuration:
+- Pool sizing (MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS)
+- Timeouts (MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS,
+  MONGO_SOCKET_TIMEOUT_MS, MONGO_WAIT_QUEUE_TIMEOUT_MS)
+- Wire compression (MONGO_COMPRESSORS; zstd and snappy need the
+  zstandard and python-snappy packages from requirements.txt, without
+  them PyMongo warns and falls back to zlib)
+- Read preference for analytics reads (MONGO_ANALYTICS_READ_PREFERENCE)
 """
 
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
+from db.monitoring import PoolMetricsListener, CommandLatencyListener
 import os
 
-# MongoDB connection (singleton pattern)
-MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-DB_NAME = os.environ.get('DB_NAME', 'knowledge_app')
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+
+def get_mongo_config() -> dict:
+    """Get MongoDB client settings from environment"""
+    return {
+        "url": os.environ.get('MONGO_URL', 'mongodb://localhost:27017'),
+        "db_name": os.environ.get('DB_NAME', 'knowledge_app'),
+        "max_pool_size": int(os.environ.get('MONGO_MAX_POOL_SIZE', 100)),
+        "min_pool_size": int(os.environ.get('MONGO_MIN_POOL_SIZE', 5)),
+        "max_idle_time_ms": int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 300000)),
+        "server_selection_timeout_ms": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000)),
+        "connect_timeout_ms": int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000)),
+        "socket_timeout_ms": int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', 30000)),
+        "wait_queue_timeout_ms": int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000)),
+        "compressors": os.environ.get('MONGO_COMPRESSORS', 'zstd,snappy,zlib'),
+        "analytics_read_preference": os.environ.get('MONGO_ANALYTICS_READ_PREFERENCE', 'secondaryPreferred'),
+    }
+
+
+def create_client(config: dict = None) -> AsyncIOMotorClient:
+    """
+    Create a tuned MongoDB client with pool and command monitoring
+
+    Args:
+        config: Client settings (defaults to get_mongo_config())
+    """
+    config = config or get_mongo_config()
+    return AsyncIOMotorClient(
+        config["url"],
+        maxPoolSize=config["max_pool_size"],
+        minPoolSize=config["min_pool_size"],
+        maxIdleTimeMS=config["max_idle_time_ms"],
+        serverSelectionTimeoutMS=config["server_selection_timeout_ms"],
+        connectTimeoutMS=config["connect_timeout_ms"],
+        socketTimeoutMS=config["socket_timeout_ms"],
+        waitQueueTimeoutMS=config["wait_queue_timeout_ms"],
+        compressors=config["compressors"],
+        appname="mentraflow-backend",
+        event_listeners=[PoolMetricsListener(), CommandLatencyListener()],
+    )
 
-# Create client and database instances
-client = AsyncIOMotorClient(MONGO_URL)
-db = client[DB_NAME]
+
+# MongoDB connection (lazy singleton)
+# Created on first use (normally in the app lifespan), not at import time
+_client = None
+_db = None
+_config = None
+
+
+def get_client():
+    """
+    Get the MongoDB client instance (created on first call)
+    Useful for operations that need client-level access
+    """
+    global _client, _db, _config
+    if _client is None:
+        _config = get_mongo_config()
+        _client = create_client(_config)
+        _db = _client[_config["db_name"]]
+    return _client
 
 
 def get_database():
@@ -20,12 +91,28 @@ def get_database():
     Get the database instance
     Use this function in routes that need database access
     """
-    return db
+    if _db is None:
+        get_client()
+    return _db
 
 
-def get_client():
+def get_analytics_database():
     """
-    Get the MongoDB client instance
-    Useful for operations that need client-level access
+    Get the database instance for analytics reads
+    Uses the configured read preference (secondaries by default) so
+    reporting queries stay off the primary
     """
-    return client
+    db = get_database()
+    read_preference = READ_PREFERENCES.get(
+        _config["analytics_read_preference"], ReadPreference.SECONDARY_PREFERRED
+    )
+    return db.with_options(read_preference=read_preference)
+
+
+def close_client():
+    """Close the MongoDB client if it was created"""
+    global _client, _db
+    if _client is not None:
+        _client.close()
+    _client = None
+    _db = None
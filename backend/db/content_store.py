@@ -0,0 +1,304 @@
+"""
+Content Store
+Versioned, memory-mapped store for static demo content
+
+Static content (demo nodes, documents, quizzes, summaries) lives in one
+file that every worker memory-maps, so the bytes are shared through the
+OS page cache instead of being compiled into each process:
+
+    {"version": "...", "sections": {name: {"keys": [...], "offsets": [[start, length], ...],
+                                           "indexes": {field: {value: key}}}}}\\n
+    <item JSON><item JSON>...
+
+The first line is the header (offset index); offsets are relative to the
+byte after it. Items are decoded on first access and kept until the
+content version changes. Workers re-check the file every
+CONTENT_RELOAD_INTERVAL_SECONDS and remap it when a new version has been
+written (writes go to a temp file + rename, so readers never see a
+partial file) - content can be updated without a deploy.
+
+Usage:
+    python -m db.content_store export content.json   # current content as editable JSON
+    python -m db.content_store build content.json    # write a new version
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import time
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CONTENT_PATH = Path(os.environ.get('CONTENT_STORE_PATH', Path(__file__).parent / 'content' / 'demo_content.store'))
+RELOAD_INTERVAL_SECONDS = float(os.environ.get('CONTENT_RELOAD_INTERVAL_SECONDS', 5))
+
+# Key field and secondary indexes of each section
+SECTIONS = {
+    "nodes": {"key": "id", "indexes": ["title"]},
+    "documents": {"key": "id", "indexes": []},
+    "quizzes": {"key": None, "indexes": []},      # keyed by quizId
+    "summaries": {"key": None, "indexes": []},    # keyed by summaryId
+}
+
+
+class ContentStore:
+    """Read access to a content store file (lazy item decode, hot reload)"""
+
+    def __init__(self, path: Path = CONTENT_PATH, reload_interval: float = RELOAD_INTERVAL_SECONDS):
+        self.path = Path(path)
+        self.reload_interval = reload_interval
+        self.version: Optional[str] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._file_id = None
+        self._body_start = 0
+        self._sections: Dict[str, Dict[str, Any]] = {}
+        self._positions: Dict[str, Dict[str, int]] = {}
+        self._decoded: Dict[tuple, Any] = {}
+        self._checked_at = 0.0
+
+    def _open(self):
+        stat = os.stat(self.path)
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if file_id == self._file_id:
+            return
+
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header_end = mapped.find(b"\n")
+        header = json.loads(mapped[:header_end])
+        self._file_id = file_id
+
+        if header["version"] == self.version:
+            mapped.close()
+            return
+
+        # The old mapping is left to the GC: items decoded from it stay valid
+        self._mmap = mapped
+        self._body_start = header_end + 1
+        self._sections = header["sections"]
+        self._positions = {
+            name: {key: position for position, key in enumerate(section["keys"])}
+            for name, section in self._sections.items()
+        }
+        self._decoded = {}
+        if self.version is not None:
+            logger.info(f"Reloaded content store {self.path.name}: {self.version} -> {header['version']}")
+        self.version = header["version"]
+
+    def _check(self):
+        now = time.monotonic()
+        if self._mmap is not None and now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            self._open()
+        except OSError as e:
+            if self._mmap is None:
+                raise
+            logger.error(f"Error checking content store {self.path}: {e}")
+
+    def current_version(self) -> str:
+        """Content version (checks for a newer file first)"""
+        self._check()
+        return self.version
+
+    def keys(self, section: str) -> List[str]:
+        self._check()
+        return self._sections[section]["keys"]
+
+    def get(self, section: str, key: str, default: Any = None) -> Any:
+        """Decode one item (first access per version), or default if absent"""
+        self._check()
+        position = self._positions[section].get(key)
+        if position is None:
+            return default
+        return self._item(section, position)
+
+    def find(self, section: str, field: str, value: Any) -> Any:
+        """Item whose `field` equals value, via the section's secondary index"""
+        self._check()
+        key = self._sections[section]["indexes"][field].get(value)
+        return None if key is None else self.get(section, key)
+
+    def _item(self, section: str, position: int) -> Any:
+        cache_key = (section, position)
+        item = self._decoded.get(cache_key)
+        if item is None:
+            start, length = self._sections[section]["offsets"][position]
+            start += self._body_start
+            item = json.loads(self._mmap[start:start + length])
+            self._decoded[cache_key] = item
+        return item
+
+    def mapping(self, section: str) -> "ContentMapping":
+        return ContentMapping(self, section)
+
+    def sequence(self, section: str) -> "ContentSequence":
+        return ContentSequence(self, section)
+
+    def index(self, section: str, field: str) -> "ContentIndex":
+        return ContentIndex(self, section, field)
+
+
+class ContentMapping(Mapping):
+    """Read-only dict view of a section (key -> item)"""
+
+    def __init__(self, store: ContentStore, section: str):
+        self._store = store
+        self._section = section
+
+    def __getitem__(self, key: str) -> Any:
+        item = self._store.get(self._section, key)
+        if item is None:
+            raise KeyError(key)
+        return item
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._store.get(self._section, key, default)
+
+    def __contains__(self, key: object) -> bool:
+        return self._store.get(self._section, key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.keys(self._section))
+
+    def __len__(self) -> int:
+        return len(self._store.keys(self._section))
+
+
+class ContentSequence(Sequence):
+    """Read-only list view of a section, in stored order"""
+
+    def __init__(self, store: ContentStore, section: str):
+        self._store = store
+        self._section = section
+
+    def __getitem__(self, position):
+        keys = self._store.keys(self._section)
+        if isinstance(position, slice):
+            return [self._store.get(self._section, key) for key in keys[position]]
+        return self._store.get(self._section, keys[position])
+
+    def __iter__(self):
+        for key in self._store.keys(self._section):
+            yield self._store.get(self._section, key)
+
+    def __len__(self) -> int:
+        return len(self._store.keys(self._section))
+
+
+class ContentIndex(Mapping):
+    """Read-only dict view of a section by a secondary field (e.g. node title)"""
+
+    def __init__(self, store: ContentStore, section: str, field: str):
+        self._store = store
+        self._section = section
+        self._field = field
+
+    def __getitem__(self, value: Any) -> Any:
+        item = self._store.find(self._section, self._field, value)
+        if item is None:
+            raise KeyError(value)
+        return item
+
+    def get(self, value: Any, default: Any = None) -> Any:
+        item = self._store.find(self._section, self._field, value)
+        return default if item is None else item
+
+    def __iter__(self) -> Iterator[Any]:
+        self._store._check()
+        return iter(self._store._sections[self._section]["indexes"][self._field])
+
+    def __len__(self) -> int:
+        self._store._check()
+        return len(self._store._sections[self._section]["indexes"][self._field])
+
+
+# ============================================
+# Writing
+# ============================================
+
+def build_store(content: Dict[str, Any], path: Path = CONTENT_PATH) -> str:
+    """
+    Write content (section -> list of items or dict of items) as a new version
+
+    List sections are keyed by their SECTIONS key field, which must be
+    unique, as must every secondary index field.
+
+    Returns:
+        The new version (hash of the content)
+    """
+    body = bytearray()
+    sections = {}
+    for name, items in content.items():
+        spec = SECTIONS.get(name, {"key": None, "indexes": []})
+        if isinstance(items, dict):
+            keyed = list(items.items())
+        else:
+            keyed = [(item[spec["key"]], item) for item in items]
+
+        keys, offsets = [], []
+        indexes = {field: {} for field in spec["indexes"]}
+        for key, item in keyed:
+            encoded = json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode()
+            keys.append(key)
+            offsets.append([len(body), len(encoded)])
+            body += encoded
+            for field, index in indexes.items():
+                if item[field] in index:
+                    raise ValueError(f"Duplicate {name}.{field}: {item[field]!r}")
+                index[item[field]] = key
+        if len(set(keys)) != len(keys):
+            raise ValueError(f"Duplicate keys in section {name}")
+        sections[name] = {"keys": keys, "offsets": offsets, "indexes": indexes}
+
+    version = hashlib.sha256(bytes(body)).hexdigest()[:12]
+    header = json.dumps({"version": version, "sections": sections}, separators=(",", ":")).encode()
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(temp_path, 'wb') as f:
+        f.write(header + b"\n" + bytes(body))
+    os.replace(temp_path, path)
+    logger.info(f"Wrote content store {path} version {version}")
+    return version
+
+
+def export_store(store: ContentStore) -> Dict[str, Any]:
+    """Full content of a store (lists for keyed-by-field sections, dicts otherwise)"""
+    store.current_version()
+    content = {}
+    for name in store._sections:
+        if SECTIONS.get(name, {}).get("key"):
+            content[name] = list(store.sequence(name))
+        else:
+            content[name] = dict(store.mapping(name))
+    return content
+
+
+# Shared store for the static demo content
+content_store = ContentStore()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export or build the static content store")
+    parser.add_argument("command", choices=["export", "build"])
+    parser.add_argument("file", help="JSON content file (section -> items)")
+    parser.add_argument("--store", default=str(CONTENT_PATH), help="Content store path")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        with open(args.file, 'w') as f:
+            json.dump(export_store(ContentStore(args.store)), f, ensure_ascii=False, indent=2)
+    else:
+        with open(args.file) as f:
+            print(build_store(json.load(f), args.store))
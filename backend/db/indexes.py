@@ -0,0 +1,282 @@
+"""
+Database Indexes
+Declared indexes for every queried collection, created idempotently at startup
+
+Also includes a query-plan check that runs explain() on each hot query
+and reports any plan that falls back to a collection scan (COLLSCAN).
+
+Usage:
+    python -m db.indexes              # create indexes and verify query plans
+    python -m db.indexes --replace    # also replace indexes whose definition changed
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# MongoDB error codes for an index that exists with different options/keys
+INDEX_CONFLICT_CODES = (85, 86)
+
+# Temporary index built before a conflicting index is dropped
+TEMPORARY_INDEX_FIELD = "_index_replacement"
+TEMPORARY_INDEX_SUFFIX = "_replacement"
+
+
+# ============================================
+# Index Declarations
+# ============================================
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "knowledge_nodes": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created_at"),
+        IndexModel([("user_id", ASCENDING), ("title", ASCENDING)], name="user_title"),
+        IndexModel([("user_id", ASCENDING), ("updated_at", ASCENDING), ("id", ASCENDING)], name="user_updated_at_id"),
+    ],
+    "recall_sessions": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel(
+            [("user_id", ASCENDING), ("status", ASCENDING), ("due_date", ASCENDING)],
+            name="user_status_due_date"
+        ),
+        # Pending sessions only: per-user due queries and the cross-user due-now scan
+        IndexModel(
+            [("user_id", ASCENDING), ("due_date", ASCENDING), ("id", ASCENDING)],
+            name="pending_user_due_date",
+            partialFilterExpression={"status": "pending"}
+        ),
+    ],
+    "recall_queues": [
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], name="user_day_unique", unique=True),
+    ],
+    "mcp_imports": [
+        IndexModel([("import_id", ASCENDING)], name="import_id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created_at"),
+    ],
+    "mcp_concepts": [
+        IndexModel([("concept_id", ASCENDING)], name="concept_id_unique", unique=True),
+        IndexModel([("node_id", ASCENDING)], name="node_id"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created_at"),
+    ],
+    "mcp_quizzes": [
+        IndexModel([("quiz_id", ASCENDING)], name="quiz_id_unique", unique=True),
+        IndexModel([("concept_id", ASCENDING)], name="concept_id"),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "quiz_results": [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)], name="user_timestamp"),
+        # Results not yet applied to their node (write-behind claims and recovery)
+        IndexModel(
+            [("claimed_at", ASCENDING), ("timestamp", ASCENDING)], name="unapplied_claimed_at",
+            partialFilterExpression={"applied": False}
+        ),
+        # Applied results still waiting for their analytics write (recovery)
+        IndexModel(
+            [("claimed_at", ASCENDING), ("timestamp", ASCENDING)], name="analytics_pending_claimed_at",
+            partialFilterExpression={"analytics_applied": False}
+        ),
+    ],
+    # Quiz analytics rollups (db/quiz_analytics.py), one document per key
+    "quiz_question_rollups": [
+        IndexModel(
+            [("quiz_id", ASCENDING), ("question_index", ASCENDING), ("day", ASCENDING)],
+            name="quiz_question_day_unique", unique=True
+        ),
+    ],
+    "quiz_node_rollups": [
+        IndexModel(
+            [("user_id", ASCENDING), ("node_id", ASCENDING), ("day", ASCENDING)],
+            name="user_node_day_unique", unique=True
+        ),
+    ],
+    "quiz_user_rollups": [
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], name="user_day_unique", unique=True),
+    ],
+    "user_stats": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    # Sessions (db/user_sessions.py): expired ones are removed by the TTL monitor
+    "user_sessions": [
+        IndexModel([("session_token", ASCENDING)], name="session_token_unique", unique=True),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created_at"),
+    ],
+    # Users (db/users.py): login upserts on email, so it must be unique
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+}
+
+
+# Hot queries checked by verify_query_plans (collection, filter, sort)
+HOT_QUERIES: List[Dict[str, Any]] = [
+    {"collection": "knowledge_nodes", "filter": {"user_id": "u"}},
+    {"collection": "knowledge_nodes", "filter": {"title": "t", "user_id": "u"}},
+    {"collection": "knowledge_nodes", "filter": {"id": "n"}},
+    {"collection": "knowledge_nodes", "filter": {"user_id": "u", "updated_at": {"$gt": "t"}}, "sort": [("updated_at", 1), ("id", 1)]},
+    {"collection": "recall_sessions", "filter": {"user_id": "u", "status": "pending"}, "sort": [("due_date", 1)]},
+    {"collection": "recall_sessions", "filter": {"id": "s"}},
+    {"collection": "recall_sessions", "filter": {"status": "pending", "due_date": {"$lt": datetime(2100, 1, 1)}}, "sort": [("user_id", 1), ("due_date", 1), ("id", 1)]},
+    {"collection": "recall_queues", "filter": {"user_id": "u", "day": "d"}},
+    {"collection": "mcp_imports", "filter": {"user_id": "u"}, "sort": [("created_at", -1)]},
+    {"collection": "mcp_imports", "filter": {"import_id": "i"}},
+    {"collection": "mcp_concepts", "filter": {"node_id": "n"}},
+    {"collection": "mcp_concepts", "filter": {"user_id": "u"}, "sort": [("created_at", -1)]},
+    {"collection": "mcp_quizzes", "filter": {"quiz_id": "q"}},
+    {"collection": "mcp_quizzes", "filter": {"user_id": "u"}},
+    {"collection": "quiz_results", "filter": {"user_id": "u"}},
+    {"collection": "quiz_results", "filter": {"applied": False, "claimed_at": {"$lt": "t"}}, "sort": [("timestamp", 1)]},
+    {"collection": "quiz_results", "filter": {"analytics_applied": False, "claimed_at": {"$lt": "t"}}, "sort": [("timestamp", 1)]},
+    {"collection": "quiz_question_rollups", "filter": {"quiz_id": "q", "day": "all"}, "sort": [("question_index", 1)]},
+    {"collection": "quiz_node_rollups", "filter": {"user_id": "u", "node_id": "n", "day": {"$gte": "d"}}, "sort": [("day", 1)]},
+    {"collection": "quiz_user_rollups", "filter": {"user_id": "u", "day": {"$gte": "d"}}, "sort": [("day", 1)]},
+    {"collection": "user_stats", "filter": {"user_id": "u"}},
+    {"collection": "user_sessions", "filter": {"session_token": "t"}},
+    {"collection": "user_sessions", "filter": {"user_id": "u"}, "sort": [("created_at", -1)]},
+    {"collection": "users", "filter": {"email": "e"}},
+]
+
+
+# ============================================
+# Index Creation
+# ============================================
+
+async def ensure_indexes(db, replace: bool = False) -> Dict[str, List[str]]:
+    """
+    Create all declared indexes (safe to call on every startup)
+
+    Indexes that already exist with different options or keys are left in
+    place and reported, unless replace is set (python -m db.indexes
+    --replace, or REPLACE_CONFLICTING_INDEXES=true for single-worker
+    deployments). Replacement builds the new definition under a temporary
+    name first and only drops the old index once that build succeeded.
+
+    Returns:
+        Created index names by collection
+    """
+    created = {}
+
+    for collection_name, models in INDEXES.items():
+        collection = db[collection_name]
+        created[collection_name] = []
+
+        for model in models:
+            try:
+                names = await _create_index(collection, model, replace)
+                created[collection_name].extend(names)
+            except Exception as e:
+                # Never block startup on a single index (e.g. duplicates for a unique index)
+                logger.error(f"Failed to create index {model.document['name']} on {collection_name}: {e}")
+
+    logger.info(f"Indexes ensured for {len(created)} collections")
+    return created
+
+
+async def _create_index(collection, model: IndexModel, replace: bool) -> List[str]:
+    """Create a single index; replace a conflicting definition only when asked"""
+    try:
+        return await collection.create_indexes([model])
+    except OperationFailure as e:
+        if e.code not in INDEX_CONFLICT_CODES:
+            raise
+
+    name = model.document["name"]
+    if not replace:
+        logger.warning(
+            f"Index {name} on {collection.name} conflicts with an existing index; "
+            f"run python -m db.indexes --replace to roll it out"
+        )
+        return []
+
+    # Build the new definition first under a temporary name. MongoDB refuses
+    # two indexes on the same key pattern, so the temporary one gets an extra
+    # always-missing field (missing values index as null, so a unique build
+    # still proves the original key is unique). TTL only applies to
+    # single-field indexes and cannot fail a build, so it is left out.
+    options = {k: v for k, v in model.document.items() if k not in ("key", "name", "expireAfterSeconds")}
+    key = list(model.document["key"].items())
+    temporary = IndexModel(key + [(TEMPORARY_INDEX_FIELD, ASCENDING)], name=f"{name}{TEMPORARY_INDEX_SUFFIX}", **options)
+    await collection.create_indexes([temporary])
+
+    # Drop whichever index clashes by name or key pattern, then build the declared one
+    info = await collection.index_information()
+    for existing_name, spec in info.items():
+        if existing_name == name or list(spec["key"]) == key:
+            logger.warning(f"Replacing conflicting index {existing_name} on {collection.name}")
+            await collection.drop_index(existing_name)
+
+    names = await collection.create_indexes([model])
+    await collection.drop_index(temporary.document["name"])
+    return names
+
+
+# ============================================
+# Query Plan Verification
+# ============================================
+
+async def verify_query_plans(db) -> List[str]:
+    """
+    Run explain() on every hot query and report collection scans
+
+    Returns:
+        Descriptions of queries whose winning plan contains COLLSCAN
+        (empty list when every hot query is index-backed)
+    """
+    offenders = []
+
+    for query in HOT_QUERIES:
+        cursor = db[query["collection"]].find(query["filter"])
+        if query.get("sort"):
+            cursor = cursor.sort(query["sort"])
+
+        plan = await cursor.limit(1).explain()
+        stages = _collect_stages(plan.get("queryPlanner", {}).get("winningPlan", {}))
+
+        if "COLLSCAN" in stages:
+            description = f"{query['collection']} {sorted(query['filter'])} sort={query.get('sort')}"
+            offenders.append(description)
+            logger.error(f"COLLSCAN in query plan: {description}")
+
+    if not offenders:
+        logger.info(f"Verified {len(HOT_QUERIES)} hot query plans (no COLLSCAN)")
+
+    return offenders
+
+
+def _collect_stages(plan: Any) -> List[str]:
+    """Collect every "stage" value in a (nested) explain plan"""
+    stages = []
+
+    if isinstance(plan, dict):
+        if isinstance(plan.get("stage"), str):
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_collect_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_collect_stages(item))
+
+    return stages
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import sys
+    from db.connection import get_database
+
+    parser = argparse.ArgumentParser(description="Create declared indexes and verify hot query plans")
+    parser.add_argument("--replace", action="store_true", help="Replace indexes whose definition changed")
+    args = parser.parse_args()
+
+    async def main() -> List[str]:
+        db = get_database()
+        await ensure_indexes(db, replace=args.replace)
+        return await verify_query_plans(db)
+
+    # Non-zero exit when any hot query is a collection scan
+    sys.exit(1 if asyncio.run(main()) else 0)
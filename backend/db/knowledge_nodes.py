@@ -0,0 +1,277 @@
+"""
+Knowledge Node Queries
+MongoDB access for the knowledge_nodes collection
+
+Each endpoint reads through an explicit projection so payload size and
+BSON decode cost scale with the fields the endpoint actually uses.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from pymongo import UpdateOne
+from db.connection import get_database
+
+# Graph view: the fields the knowledge graph renders
+# (lastReview/source_platform feed the tooltip and MCP badge)
+GRAPH_VIEW_FIELDS = ["id", "title", "state", "score", "connections", "created_at", "lastReview", "source_platform"]
+GRAPH_VIEW_PROJECTION = {"_id": 0, **{field: 1 for field in GRAPH_VIEW_FIELDS}}
+
+# Detail view: everything the node modal needs (no internal MCP lineage)
+DETAIL_VIEW_FIELDS = GRAPH_VIEW_FIELDS + ["docId", "quizzesTaken", "quizId", "summaryId", "source", "updated_at"]
+DETAIL_VIEW_PROJECTION = {"_id": 0, **{field: 1 for field in DETAIL_VIEW_FIELDS}}
+
+# Scheduler view: spaced repetition state (see services/scheduler.py)
+SCHEDULE_PROJECTION = {"_id": 0, "id": 1, "title": 1, "score": 1, "created_at": 1, "schedule": 1}
+
+# Priority buckets: fading (<60) = 0, medium (<80) = 1, strong = 2
+# Missing scores count as strong, matching node_priority()
+PRIORITY_EXPRESSION = {
+    "$switch": {
+        "branches": [
+            {"case": {"$lt": [{"$ifNull": ["$score", 100]}, 60]}, "then": 0},
+            {"case": {"$lt": [{"$ifNull": ["$score", 100]}, 80]}, "then": 1},
+        ],
+        "default": 2
+    }
+}
+
+
+def get_knowledge_nodes_collection():
+    """Get the knowledge_nodes collection"""
+    return get_database()['knowledge_nodes']
+
+
+def build_user_filter(user_id: str, time_window: int = 0) -> Dict[str, Any]:
+    """
+    Build the query for a user's nodes, optionally limited to a time window
+
+    created_at is stored as a UTC ISO string, so the cutoff compares
+    lexicographically and is served by the (user_id, created_at) index.
+    """
+    query = {"user_id": user_id}
+    if time_window > 0:
+        cutoff_date = datetime.utcnow() - timedelta(days=time_window)
+        query["created_at"] = {"$gt": cutoff_date.isoformat()}
+    return query
+
+
+async def find_all_user_nodes(user_id: str, projection: Dict[str, int] = GRAPH_VIEW_PROJECTION) -> List[Dict[str, Any]]:
+    """Get every MCP node of a user (no limit), e.g. to build an in-memory graph"""
+    cursor = get_knowledge_nodes_collection().find({"user_id": user_id}, projection)
+    return [to_mcp_view(node) async for node in cursor]
+
+
+async def aggregate_prioritized_nodes(
+    user_id: str,
+    time_window: int = 0,
+    limit: int = 100,
+    projection: Dict[str, int] = GRAPH_VIEW_PROJECTION,
+    after: Optional[Tuple[int, int, str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Get a user's MCP nodes sorted by (priority, score, id), limited in MongoDB
+
+    The time window match uses the (user_id, created_at) index; priority
+    bucketing, sort and limit run in the same aggregation so only the
+    returned nodes leave the server, however large the graph is.
+
+    Args:
+        after: Sort key of the last node already returned (keyset pagination)
+    """
+    pipeline = [
+        {"$match": build_user_filter(user_id, time_window)},
+        {"$project": projection},
+        {"$addFields": {"_priority": PRIORITY_EXPRESSION, "_score": {"$ifNull": ["$score", 100]}}},
+    ]
+    if after is not None:
+        priority, score, node_id = after
+        pipeline.append({"$match": {"$or": [
+            {"_priority": {"$gt": priority}},
+            {"_priority": priority, "_score": {"$gt": score}},
+            {"_priority": priority, "_score": score, "id": {"$gt": node_id}},
+        ]}})
+    pipeline += [
+        {"$sort": {"_priority": 1, "_score": 1, "id": 1}},
+        {"$limit": limit},
+        {"$project": {"_priority": 0, "_score": 0}},
+    ]
+    nodes = await get_knowledge_nodes_collection().aggregate(pipeline).to_list(length=limit)
+    return [to_mcp_view(node) for node in nodes]
+
+
+async def find_changed_nodes(
+    user_id: str, since: str, limit: int = 500, after_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Get a user's MCP nodes updated after a timestamp, oldest change first
+
+    Served by the (user_id, updated_at, id) index. updated_at is a UTC ISO
+    string; with after_id, nodes updated exactly at `since` with a greater
+    id are included too, so (updated_at, id) of the last returned node
+    continues the scan even when many nodes share one updated_at.
+    """
+    changed = {"updated_at": {"$gt": since}}
+    if after_id is not None:
+        changed = {"$or": [changed, {"updated_at": since, "id": {"$gt": after_id}}]}
+    cursor = get_knowledge_nodes_collection().find(
+        {"user_id": user_id, **changed},
+        {**GRAPH_VIEW_PROJECTION, "updated_at": 1}
+    ).sort([("updated_at", 1), ("id", 1)]).limit(limit)
+    nodes = await cursor.to_list(length=limit)
+    return [to_mcp_view(node) for node in nodes]
+
+
+async def count_user_nodes(user_id: str) -> int:
+    """Count all of a user's MCP nodes (index-only count)"""
+    return await get_knowledge_nodes_collection().count_documents({"user_id": user_id})
+
+
+async def find_node_schedules(node_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Get scheduler state of nodes by id (unique id index)"""
+    cursor = get_knowledge_nodes_collection().find({"id": {"$in": node_ids}}, SCHEDULE_PROJECTION)
+    return {node["id"]: node async for node in cursor}
+
+
+async def update_node_schedules(schedules: Dict[str, Dict[str, Any]]):
+    """Store nodes' scheduler state after reviews (one bulk write)"""
+    if not schedules:
+        return
+    updated_at = datetime.utcnow().isoformat()
+    await get_knowledge_nodes_collection().bulk_write([
+        UpdateOne({"id": node_id}, {"$set": {"schedule": schedule, "updated_at": updated_at}})
+        for node_id, schedule in schedules.items()
+    ], ordered=False)
+
+
+async def apply_quiz_updates(updates: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Apply coalesced quiz outcomes to nodes (one read + one bulk write)
+
+    Args:
+        updates: By node ID: score (latest percentage), quizzes (number of
+            quizzes taken since the last write) and last_review (ISO)
+
+    Returns:
+        Score of each updated node before the write
+    """
+    if not updates:
+        return {}
+    collection = get_knowledge_nodes_collection()
+    cursor = collection.find({"id": {"$in": list(updates)}}, {"_id": 0, "id": 1, "score": 1})
+    previous = {node["id"]: node.get("score", 0) async for node in cursor}
+    if not previous:
+        return {}
+
+    updated_at = datetime.utcnow().isoformat()
+    await collection.bulk_write([
+        UpdateOne({"id": node_id}, {
+            "$set": {
+                "score": update["score"],
+                "state": state_from_score(update["score"]),
+                "lastReview": update["last_review"],
+                "updated_at": updated_at
+            },
+            "$inc": {"quizzesTaken": update["quizzes"]}
+        })
+        for node_id, update in updates.items() if node_id in previous
+    ], ordered=False)
+    return previous
+
+
+async def find_node_details(
+    user_id: str,
+    titles: Optional[List[str]] = None,
+    ids: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Get a user's MCP nodes with their quiz and summary in one round trip
+
+    One aggregation matches the nodes (by title or id) and joins the
+    node's quiz (mcp_quizzes.quiz_id) and concept (mcp_concepts.node_id)
+    with $lookup, both on unique/indexed keys. A localField lookup on a
+    null or missing quizId would match a quiz without quiz_id, so nodes
+    without a quizId get no questions.
+
+    Returns:
+        Nodes in detail view shape, each with "questions" (list) and
+        "summary" (concept summary text, "" for a concept without one, or
+        None without a concept)
+    """
+    match: Dict[str, Any] = {"user_id": user_id}
+    if titles is not None:
+        match["title"] = {"$in": titles}
+    if ids is not None:
+        match["id"] = {"$in": ids}
+
+    pipeline = [
+        {"$match": match},
+        {"$lookup": {"from": "mcp_quizzes", "localField": "quizId", "foreignField": "quiz_id", "as": "_quizzes"}},
+        {"$lookup": {"from": "mcp_concepts", "localField": "id", "foreignField": "node_id", "as": "_concepts"}},
+        {"$project": {
+            **DETAIL_VIEW_PROJECTION,
+            "questions": {"$cond": [
+                {"$eq": [{"$ifNull": ["$quizId", None]}, None]},
+                [],
+                {"$ifNull": [{"$arrayElemAt": ["$_quizzes.questions", 0]}, []]}
+            ]},
+            "summary": {"$cond": [
+                {"$eq": [{"$size": "$_concepts"}, 0]},
+                None,
+                {"$ifNull": [{"$arrayElemAt": ["$_concepts.summary", 0]}, ""]}
+            ]}
+        }}
+    ]
+
+    nodes = await get_knowledge_nodes_collection().aggregate(pipeline).to_list(length=None)
+    return [to_mcp_view(node) for node in nodes]
+
+
+def node_score(node: Dict[str, Any]) -> int:
+    """Score used for ordering: missing or null counts as 100 (same as {"$ifNull": ["$score", 100]})"""
+    score = node.get('score')
+    return 100 if score is None else score
+
+
+def node_priority(node: Dict[str, Any]) -> int:
+    """Priority bucket of a node: fading > medium > strong (same as PRIORITY_EXPRESSION)"""
+    score = node_score(node)
+    if score < 60:
+        return 0  # Highest priority (fading)
+    elif score < 80:
+        return 1  # Medium priority
+    return 2  # Lowest priority (strong)
+
+
+def node_sort_key(node: Dict[str, Any]) -> Tuple[int, int, str]:
+    """Sort key used for node listing and cursors: (priority, score, id)"""
+    return (node_priority(node), node_score(node), node['id'])
+
+
+def state_from_score(score: int) -> str:
+    """Map a retention score to a node state"""
+    if score < 60:
+        return 'fading'
+    elif score < 80:
+        return 'medium'
+    return 'high'
+
+
+def to_mcp_view(node: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a stored MCP node to match frontend format"""
+    # Calculate state from score if not set
+    if node.get('state') == 'new' or not node.get('state'):
+        node['state'] = state_from_score(node.get('score', 0))
+
+    # Ensure lastReview field
+    if not node.get('lastReview'):
+        node['lastReview'] = 'Never'
+
+    # Add MCP badge flag for frontend
+    node['isMCP'] = True
+    node['mcpPlatform'] = node.get('source_platform', 'mcp')
+    return node
+
+
+def to_graph_view(node: Dict[str, Any]) -> Dict[str, Any]:
+    """Trim a static (mock) node to the graph view fields"""
+    return {field: node[field] for field in GRAPH_VIEW_FIELDS if field in node}
@@ -6,15 +6,25 @@ MongoDB collections for MCP imports, concepts, and quizzes
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 import uuid
-from db.connection import get_database
-
-# Get MongoDB database
-db = get_database()
+from db.connection import get_database, get_analytics_database
 
 # MongoDB Collections
-mcp_imports_collection = db['mcp_imports']
-mcp_concepts_collection = db['mcp_concepts']
-mcp_quizzes_collection = db['mcp_quizzes']
+# Resolved on each call so importing this module never creates the client
+
+
+def get_mcp_imports_collection():
+    """Get the mcp_imports collection"""
+    return get_database()['mcp_imports']
+
+
+def get_mcp_concepts_collection():
+    """Get the mcp_concepts collection"""
+    return get_database()['mcp_concepts']
+
+
+def get_mcp_quizzes_collection():
+    """Get the mcp_quizzes collection"""
+    return get_database()['mcp_quizzes']
 
 
 async def create_mcp_import(user_id: str, platform: str, conversation_count: int) -> Dict[str, Any]:
@@ -37,7 +47,7 @@ async def create_mcp_import(user_id: str, platform: str, conversation_count: int
         "error": None
     }
     
-    await mcp_imports_collection.insert_one(import_record)
+    await get_mcp_imports_collection().insert_one(import_record)
     return import_record
 
 
@@ -52,7 +62,7 @@ async def update_mcp_import(import_id: str, **updates) -> bool:
     Returns:
         True if updated, False if not found
     """
-    result = await mcp_imports_collection.update_one(
+    result = await get_mcp_imports_collection().update_one(
         {"import_id": import_id},
         {"$set": updates}
     )
@@ -61,7 +71,7 @@ async def update_mcp_import(import_id: str, **updates) -> bool:
 
 async def get_mcp_import(import_id: str) -> Optional[Dict[str, Any]]:
     """Get import by ID from MongoDB"""
-    import_record = await mcp_imports_collection.find_one({"import_id": import_id})
+    import_record = await get_mcp_imports_collection().find_one({"import_id": import_id})
     if import_record:
         import_record.pop('_id', None)  # Remove MongoDB _id
     return import_record
@@ -78,7 +88,7 @@ async def get_user_mcp_history(user_id: str, limit: int = 10) -> List[Dict[str,
     Returns:
         List of import records, newest first
     """
-    cursor = mcp_imports_collection.find(
+    cursor = get_mcp_imports_collection().find(
         {"user_id": user_id}
     ).sort("created_at", -1).limit(limit)
     
@@ -118,7 +128,7 @@ async def create_mcp_concept(
         "node_id": None
     }
     
-    await mcp_concepts_collection.insert_one(concept)
+    await get_mcp_concepts_collection().insert_one(concept)
     return concept
 
 
@@ -143,13 +153,13 @@ async def create_mcp_quiz(
         "last_taken": None
     }
     
-    await mcp_quizzes_collection.insert_one(quiz)
+    await get_mcp_quizzes_collection().insert_one(quiz)
     return quiz
 
 
 async def get_user_mcp_concepts(user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
     """Get all concepts for a user from MongoDB"""
-    cursor = mcp_concepts_collection.find(
+    cursor = get_mcp_concepts_collection().find(
         {"user_id": user_id}
     ).sort("created_at", -1).limit(limit)
     
@@ -164,7 +174,7 @@ async def get_user_mcp_concepts(user_id: str, limit: int = 50) -> List[Dict[str,
 
 async def get_concept_quiz(concept_id: str) -> Optional[Dict[str, Any]]:
     """Get quiz for a concept from MongoDB"""
-    quiz = await mcp_quizzes_collection.find_one({"concept_id": concept_id})
+    quiz = await get_mcp_quizzes_collection().find_one({"concept_id": concept_id})
     if quiz:
         quiz.pop('_id', None)
     return quiz
@@ -172,7 +182,7 @@ async def get_concept_quiz(concept_id: str) -> Optional[Dict[str, Any]]:
 
 async def get_user_mcp_quizzes(user_id: str) -> List[Dict[str, Any]]:
     """Get all MCP quizzes for a user from MongoDB"""
-    cursor = mcp_quizzes_collection.find({"user_id": user_id})
+    cursor = get_mcp_quizzes_collection().find({"user_id": user_id})
     quizzes = await cursor.to_list(length=100)
     
     # Remove MongoDB _id field
@@ -184,7 +194,7 @@ async def get_user_mcp_quizzes(user_id: str) -> List[Dict[str, Any]]:
 
 async def link_concept_to_node(concept_id: str, node_id: str) -> bool:
     """Link MCP concept to knowledge graph node in MongoDB"""
-    result = await mcp_concepts_collection.update_one(
+    result = await get_mcp_concepts_collection().update_one(
         {"concept_id": concept_id},
         {"$set": {"node_created": True, "node_id": node_id}}
     )
@@ -193,7 +203,12 @@ async def link_concept_to_node(concept_id: str, node_id: str) -> bool:
 
 # Statistics functions
 async def get_mcp_stats(user_id: str) -> Dict[str, Any]:
-    """Get MCP statistics for user from MongoDB"""
+    """Get MCP statistics for user from MongoDB (analytics read preference)"""
+    analytics_db = get_analytics_database()
+    mcp_imports_collection = analytics_db['mcp_imports']
+    mcp_concepts_collection = analytics_db['mcp_concepts']
+    mcp_quizzes_collection = analytics_db['mcp_quizzes']
+    
     total_imports = await mcp_imports_collection.count_documents({"user_id": user_id})
     total_concepts = await mcp_concepts_collection.count_documents({"user_id": user_id})
     total_quizzes = await mcp_quizzes_collection.count_documents({"user_id": user_id})
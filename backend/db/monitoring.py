@@ -0,0 +1,152 @@
+"""
+Database Monitoring
+PyMongo connection-pool (CMAP) and command listeners feeding in-process metrics
+
+Metrics:
+- Pool: open/checked-out connections, checkout wait time, checkout failures
+- Commands: latency per command name, failures, slow command log
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict
+from pymongo import monitoring
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Listener callbacks run on PyMongo's worker threads
+_metrics_lock = threading.Lock()
+_checkout_state = threading.local()
+
+
+class LatencyStats:
+    """Running count / total / max of a latency in milliseconds"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0,
+            "max_ms": round(self.max_ms, 3)
+        }
+
+
+pool_metrics = {
+    "connections_open": 0,
+    "connections_checked_out": 0,
+    "checkout_failures": defaultdict(int),
+    "pool_cleared": 0,
+    "checkout_wait": LatencyStats()
+}
+
+command_metrics = {
+    "latency": defaultdict(LatencyStats),
+    "failures": defaultdict(int)
+}
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Track pool saturation: open/checked-out connections and checkout wait"""
+
+    def pool_created(self, event):
+        logger.info(f"MongoDB pool created: {event.address} {event.options}")
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with _metrics_lock:
+            pool_metrics["pool_cleared"] += 1
+        logger.warning(f"MongoDB pool cleared: {event.address}")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with _metrics_lock:
+            pool_metrics["connections_open"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with _metrics_lock:
+            pool_metrics["connections_open"] -= 1
+
+    def connection_check_out_started(self, event):
+        # Started and checked-out events fire on the same thread
+        _checkout_state.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        with _metrics_lock:
+            pool_metrics["checkout_failures"][str(event.reason)] += 1
+        logger.warning(f"MongoDB connection checkout failed: {event.reason}")
+
+    def connection_checked_out(self, event):
+        started = getattr(_checkout_state, "started", None)
+        with _metrics_lock:
+            pool_metrics["connections_checked_out"] += 1
+            if started is not None:
+                pool_metrics["checkout_wait"].record((time.perf_counter() - started) * 1000)
+        _checkout_state.started = None
+
+    def connection_checked_in(self, event):
+        with _metrics_lock:
+            pool_metrics["connections_checked_out"] -= 1
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """Track command latency by command name and log slow commands"""
+
+    def __init__(self):
+        self.slow_command_ms = float(os.environ.get('MONGO_SLOW_COMMAND_MS', 200))
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        duration_ms = event.duration_micros / 1000
+        with _metrics_lock:
+            command_metrics["latency"][event.command_name].record(duration_ms)
+
+        if duration_ms >= self.slow_command_ms:
+            logger.warning(f"Slow MongoDB command: {event.command_name} {duration_ms:.2f}ms")
+
+    def failed(self, event):
+        with _metrics_lock:
+            command_metrics["failures"][event.command_name] += 1
+            command_metrics["latency"][event.command_name].record(event.duration_micros / 1000)
+
+
+def get_db_metrics() -> dict:
+    """
+    Get connection-pool and command metrics
+
+    Returns:
+        Dictionary with pool saturation and per-command latency
+    """
+    with _metrics_lock:
+        return {
+            "pool": {
+                "connections_open": pool_metrics["connections_open"],
+                "connections_checked_out": pool_metrics["connections_checked_out"],
+                "checkout_failures": dict(pool_metrics["checkout_failures"]),
+                "pool_cleared": pool_metrics["pool_cleared"],
+                "checkout_wait": pool_metrics["checkout_wait"].to_dict()
+            },
+            "commands": {
+                name: {**stats.to_dict(), "failures": command_metrics["failures"].get(name, 0)}
+                for name, stats in command_metrics["latency"].items()
+            }
+        }
@@ -0,0 +1,322 @@
+"""
+Quiz Analytics Queries
+Day-keyed rollups of quiz_results, kept current by the quiz write-behind flush
+
+    quiz_question_rollups  {quiz_id, question_index, day, attempts, correct}
+                           (day "all" holds the all-time totals)
+    quiz_node_rollups      {user_id, node_id, day, quizzes, percentage_sum, best, last, last_at}
+    quiz_user_rollups      {user_id, day, quizzes, percentage_sum, questions, correct, xp}
+
+Each rollup has a unique index on its key, so insights read a handful of
+documents (one per question or per day) instead of scanning raw results.
+
+The backfill rebuilds the rollups for a range of days by streaming
+quiz_results through an aggregation cursor:
+
+Usage:
+    python -m db.quiz_analytics                      # all results
+    python -m db.quiz_analytics --since 2025-01-01   # from a day on
+"""
+
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+from pymongo import UpdateOne
+from db.connection import get_database
+from db.user_stats import day_of
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Day key of the all-time question totals
+ALL_TIME = "all"
+
+# Results decoded per cursor batch during backfill
+BACKFILL_BATCH_SIZE = 1000
+
+
+def get_question_rollups_collection():
+    """Get the quiz_question_rollups collection"""
+    return get_database()['quiz_question_rollups']
+
+
+def get_node_rollups_collection():
+    """Get the quiz_node_rollups collection"""
+    return get_database()['quiz_node_rollups']
+
+
+def get_user_rollups_collection():
+    """Get the quiz_user_rollups collection"""
+    return get_database()['quiz_user_rollups']
+
+
+def first_day(days: int) -> str:
+    """Day key of the first of the last `days` days (UTC, including today)"""
+    return (datetime.utcnow().date() - timedelta(days=days - 1)).isoformat()
+
+
+# ============================================
+# Incremental Updates
+# ============================================
+
+async def record_quiz_analytics(results: List[Dict[str, Any]]):
+    """
+    Add stored quiz results to every rollup
+
+    Called by the quiz write-behind flush with the results it applied.
+    Counters of the same rollup key are summed first, then each rollup
+    collection gets one bulk write, and the three bulk writes run
+    concurrently.
+
+    Raises:
+        The first error of the bulk writes, once all of them have finished
+        (the caller retries the results; rollups are counted at least once)
+    """
+    questions = defaultdict(lambda: {"attempts": 0, "correct": 0})
+    nodes: Dict[tuple, Dict[str, Any]] = {}
+    users = defaultdict(lambda: {"quizzes": 0, "percentage_sum": 0, "questions": 0, "correct": 0, "xp": 0})
+
+    for result in sorted(results, key=lambda result: result["timestamp"]):
+        day = day_of(result["timestamp"])
+        answers = result.get("answers", [])
+        user_id = result.get("user_id", "demo_user")
+
+        for answer in answers:
+            for day_key in (day, ALL_TIME):
+                counters = questions[(result["quizId"], answer["questionIndex"], day_key)]
+                counters["attempts"] += 1
+                counters["correct"] += int(bool(answer.get("isCorrect")))
+
+        node = nodes.setdefault((user_id, result["nodeId"], day), {"quizzes": 0, "percentage_sum": 0, "best": 0})
+        node["quizzes"] += 1
+        node["percentage_sum"] += result["percentage"]
+        node["best"] = max(node["best"], result["percentage"])
+        node["last"] = result["percentage"]
+        node["last_at"] = result["timestamp"]
+
+        user = users[(user_id, day)]
+        user["quizzes"] += 1
+        user["percentage_sum"] += result["percentage"]
+        user["questions"] += len(answers)
+        user["correct"] += sum(1 for answer in answers if answer.get("isCorrect"))
+        user["xp"] += result.get("xpGained", 0)
+
+    question_ops = [
+        UpdateOne(
+            {"quiz_id": quiz_id, "question_index": question_index, "day": day},
+            {"$inc": counters},
+            upsert=True
+        )
+        for (quiz_id, question_index, day), counters in questions.items()
+    ]
+    node_ops = []
+    for (user_id, node_id, day), node in nodes.items():
+        key = {"user_id": user_id, "node_id": node_id, "day": day}
+        node_ops.append(UpdateOne(
+            key,
+            {
+                "$inc": {"quizzes": node["quizzes"], "percentage_sum": node["percentage_sum"]},
+                "$max": {"best": node["best"], "last_at": node["last_at"]}
+            },
+            upsert=True
+        ))
+        # "last" follows the latest result of the day (guarded by last_at; ordered after the upsert)
+        node_ops.append(UpdateOne({**key, "last_at": node["last_at"]}, {"$set": {"last": node["last"]}}))
+    user_ops = [
+        UpdateOne({"user_id": user_id, "day": day}, {"$inc": counters}, upsert=True)
+        for (user_id, day), counters in users.items()
+    ]
+
+    writes = []
+    if question_ops:
+        writes.append(get_question_rollups_collection().bulk_write(question_ops, ordered=False))
+    if node_ops:
+        writes.append(get_node_rollups_collection().bulk_write(node_ops, ordered=True))
+    if user_ops:
+        writes.append(get_user_rollups_collection().bulk_write(user_ops, ordered=False))
+
+    outcomes = await asyncio.gather(*writes, return_exceptions=True)
+    errors = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+    if errors:
+        raise errors[0]
+
+
+# ============================================
+# Reads
+# ============================================
+
+async def find_question_stats(quiz_id: str) -> List[Dict[str, Any]]:
+    """All-time correctness per question of a quiz"""
+    cursor = get_question_rollups_collection().find(
+        {"quiz_id": quiz_id, "day": ALL_TIME}, {"_id": 0, "question_index": 1, "attempts": 1, "correct": 1}
+    ).sort("question_index", 1)
+    return [
+        {
+            "questionIndex": row["question_index"],
+            "attempts": row["attempts"],
+            "correct": row["correct"],
+            "correctRate": round(row["correct"] / row["attempts"], 3) if row["attempts"] else None
+        }
+        async for row in cursor
+    ]
+
+
+async def find_mastery_curve(user_id: str, node_id: str, days: int = 30) -> List[Dict[str, Any]]:
+    """Daily quiz performance on one node over the last `days` days"""
+    cursor = get_node_rollups_collection().find(
+        {"user_id": user_id, "node_id": node_id, "day": {"$gte": first_day(days)}},
+        {"_id": 0, "day": 1, "quizzes": 1, "percentage_sum": 1, "best": 1, "last": 1}
+    ).sort("day", 1)
+    return [
+        {
+            "day": row["day"],
+            "quizzes": row["quizzes"],
+            "average": round(row["percentage_sum"] / row["quizzes"], 1),
+            "best": row["best"],
+            "last": row.get("last", row["best"])
+        }
+        async for row in cursor
+    ]
+
+
+async def find_user_activity(user_id: str, days: int = 30) -> List[Dict[str, Any]]:
+    """A user's daily quiz totals over the last `days` days"""
+    cursor = get_user_rollups_collection().find(
+        {"user_id": user_id, "day": {"$gte": first_day(days)}},
+        {"_id": 0, "day": 1, "quizzes": 1, "percentage_sum": 1, "questions": 1, "correct": 1, "xp": 1}
+    ).sort("day", 1)
+    return [
+        {
+            "day": row["day"],
+            "quizzes": row["quizzes"],
+            "average": round(row["percentage_sum"] / row["quizzes"], 1),
+            "correctRate": round(row["correct"] / row["questions"], 3) if row["questions"] else None,
+            "xp": row["xp"]
+        }
+        async for row in cursor
+    ]
+
+
+# ============================================
+# Backfill (batch job)
+# ============================================
+
+async def backfill_quiz_analytics(since: Optional[date] = None) -> Dict[str, int]:
+    """
+    Rebuild the rollups of every day from `since` (default: all days)
+
+    quiz_results is streamed through an aggregation cursor that projects
+    only the rollup fields; counters are accumulated per rollup key in
+    memory (bounded by the number of keys, not results) and written with
+    $set, so rerunning the job gives the same rollups. The all-time
+    question totals are then re-summed from the day rollups.
+
+    Returns:
+        Number of rollup documents written per collection
+    """
+    match: Dict[str, Any] = {}
+    if since:
+        match["timestamp"] = {"$gte": since.isoformat()}
+
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"timestamp": 1}},
+        {"$project": {
+            "_id": 0,
+            "user_id": {"$ifNull": ["$user_id", "demo_user"]},
+            "node_id": "$nodeId",
+            "quiz_id": "$quizId",
+            "percentage": 1,
+            "xp": {"$ifNull": ["$xpGained", 0]},
+            "timestamp": 1,
+            "answers.questionIndex": 1,
+            "answers.isCorrect": 1
+        }}
+    ]
+
+    questions = defaultdict(lambda: {"attempts": 0, "correct": 0})
+    nodes: Dict[tuple, Dict[str, Any]] = {}
+    users = defaultdict(lambda: {"quizzes": 0, "percentage_sum": 0, "questions": 0, "correct": 0, "xp": 0})
+
+    results = 0
+    cursor = get_database()['quiz_results'].aggregate(pipeline, batchSize=BACKFILL_BATCH_SIZE)
+    async for result in cursor:
+        results += 1
+        day = day_of(result["timestamp"])
+        answers = result.get("answers", [])
+
+        for answer in answers:
+            counters = questions[(result["quiz_id"], answer["questionIndex"], day)]
+            counters["attempts"] += 1
+            counters["correct"] += int(bool(answer.get("isCorrect")))
+
+        # Results arrive in timestamp order, so the last one seen is the day's last
+        node = nodes.setdefault((result["user_id"], result["node_id"], day), {"quizzes": 0, "percentage_sum": 0, "best": 0})
+        node["quizzes"] += 1
+        node["percentage_sum"] += result["percentage"]
+        node["best"] = max(node["best"], result["percentage"])
+        node["last"] = result["percentage"]
+        node["last_at"] = result["timestamp"]
+
+        user = users[(result["user_id"], day)]
+        user["quizzes"] += 1
+        user["percentage_sum"] += result["percentage"]
+        user["questions"] += len(answers)
+        user["correct"] += sum(1 for answer in answers if answer.get("isCorrect"))
+        user["xp"] += result["xp"]
+
+    written = {
+        "results": results,
+        "questions": await _write_rollups(get_question_rollups_collection(), ("quiz_id", "question_index", "day"), questions),
+        "nodes": await _write_rollups(get_node_rollups_collection(), ("user_id", "node_id", "day"), nodes),
+        "users": await _write_rollups(get_user_rollups_collection(), ("user_id", "day"), users)
+    }
+
+    # All-time question totals from the day rollups
+    await get_question_rollups_collection().aggregate([
+        {"$match": {"day": {"$ne": ALL_TIME}}},
+        {"$group": {
+            "_id": {"quiz_id": "$quiz_id", "question_index": "$question_index"},
+            "attempts": {"$sum": "$attempts"},
+            "correct": {"$sum": "$correct"}
+        }},
+        {"$project": {
+            "_id": 0,
+            "quiz_id": "$_id.quiz_id",
+            "question_index": "$_id.question_index",
+            "day": {"$literal": ALL_TIME},
+            "attempts": 1,
+            "correct": 1
+        }},
+        {"$merge": {
+            "into": "quiz_question_rollups",
+            "on": ["quiz_id", "question_index", "day"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ]).to_list(length=None)
+
+    logger.info(f"Backfilled quiz analytics from {results} results: {written}")
+    return written
+
+
+async def _write_rollups(collection, key_fields: tuple, rollups: Dict[tuple, Dict[str, Any]]) -> int:
+    """Upsert rollup documents by key (replacing their counters) in bulk"""
+    operations = [
+        UpdateOne(dict(zip(key_fields, key)), {"$set": counters}, upsert=True)
+        for key, counters in rollups.items()
+    ]
+    for start in range(0, len(operations), BACKFILL_BATCH_SIZE):
+        await collection.bulk_write(operations[start:start + BACKFILL_BATCH_SIZE], ordered=False)
+    return len(operations)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild quiz analytics rollups from quiz_results")
+    parser.add_argument("--since", type=date.fromisoformat, default=None, help="First day (YYYY-MM-DD), default all")
+    args = parser.parse_args()
+
+    asyncio.run(backfill_quiz_analytics(args.since))
@@ -1,183 +1,9 @@
 # Quiz Content Data
 # Centralized storage for all quiz questions
 # Referenced by NODES via quizId (q1, q2, q3, etc.)
+#
+# Stored in the content store's "quizzes" section (see db/content_store.py)
 
-QUIZ_CONTENT = {
-    "q1": {
-        "questions": [
-            {
-                "q": "What percentage of information do we typically forget within 24 hours?",
-                "options": ["30%", "50%", "70%", "90%"],
-                "correctIndex": 2
-            },
-            {
-                "q": "What is the most effective way to combat the forgetting curve?",
-                "options": ["Cramming", "Spaced repetition", "Highlighting", "Passive re-reading"],
-                "correctIndex": 1
-            }
-        ]
-    },
-    "q2": {
-        "questions": [
-            {
-                "q": "What is active recall?",
-                "options": [
-                    "Re-reading your notes carefully",
-                    "Highlighting important information",
-                    "Testing yourself without looking at notes",
-                    "Listening to lectures repeatedly"
-                ],
-                "correctIndex": 2
-            },
-            {
-                "q": "Why is active recall more effective than passive review?",
-                "options": [
-                    "It takes less time",
-                    "It strengthens neural pathways through retrieval",
-                    "It is easier to do",
-                    "It requires no effort"
-                ],
-                "correctIndex": 1
-            }
-        ]
-    },
-    "q3": {
-        "questions": [
-            {
-                "q": "What is the spacing effect?",
-                "options": [
-                    "Studying in a quiet space",
-                    "Learning is more effective when spaced over time",
-                    "Taking breaks during study sessions",
-                    "Organizing notes with proper spacing"
-                ],
-                "correctIndex": 1
-            },
-            {
-                "q": "Which study pattern demonstrates the spacing effect?",
-                "options": [
-                    "Reviewing 1 hour per day for 5 days",
-                    "Reviewing 5 hours in one day",
-                    "Reviewing only before exams",
-                    "Never reviewing material"
-                ],
-                "correctIndex": 0
-            }
-        ]
-    },
-    "q4": {
-        "questions": [
-            {
-                "q": "What is the typical capacity of working memory?",
-                "options": ["3-5 items", "7±2 items", "15-20 items", "Unlimited"],
-                "correctIndex": 1
-            },
-            {
-                "q": "What happens when working memory is overloaded?",
-                "options": [
-                    "Learning becomes more effective",
-                    "Information is lost or not processed",
-                    "Long-term memory improves",
-                    "Attention span increases"
-                ],
-                "correctIndex": 1
-            }
-        ]
-    },
-    "q5": {
-        "questions": [
-            {
-                "q": "What is interleaved practice?",
-                "options": [
-                    "Practicing one skill repeatedly until mastered",
-                    "Mixing different topics or skills in a single study session",
-                    "Taking breaks between study sessions",
-                    "Reviewing material in the same order every time"
-                ],
-                "correctIndex": 1
-            },
-            {
-                "q": "How does interleaved practice differ from blocked practice?",
-                "options": [
-                    "Blocked practice is always more effective",
-                    "Interleaved practice mixes topics, blocked practice focuses on one",
-                    "They are the same thing",
-                    "Blocked practice requires more effort"
-                ],
-                "correctIndex": 1
-            }
-        ]
-    },
-    "q6": {
-        "questions": [
-            {
-                "q": "What is metacognition?",
-                "options": [
-                    "Memory of facts and figures",
-                    "Thinking about one's own thinking",
-                    "The ability to focus attention",
-                    "Speed of information processing"
-                ],
-                "correctIndex": 1
-            },
-            {
-                "q": "Why is metacognition important for learning?",
-                "options": [
-                    "It increases reading speed",
-                    "It helps monitor understanding and adjust strategies",
-                    "It makes studying feel easier",
-                    "It eliminates the need for practice"
-                ],
-                "correctIndex": 1
-            }
-        ]
-    },
-    "q7": {
-        "questions": [
-            {
-                "q": "What is retrieval practice?",
-                "options": [
-                    "Re-reading material multiple times",
-                    "Actively recalling information from memory",
-                    "Highlighting important text",
-                    "Listening to lectures repeatedly"
-                ],
-                "correctIndex": 1
-            },
-            {
-                "q": "What is the testing effect?",
-                "options": [
-                    "Tests cause anxiety that improves focus",
-                    "Taking tests improves long-term retention more than studying",
-                    "More tests lead to lower grades",
-                    "Testing is only useful for assessment, not learning"
-                ],
-                "correctIndex": 1
-            }
-        ]
-    },
-    "q8": {
-        "questions": [
-            {
-                "q": "What is chunking in cognitive psychology?",
-                "options": [
-                    "Breaking study time into small sessions",
-                    "Grouping individual pieces of information into larger units",
-                    "Memorizing information word-for-word",
-                    "Taking breaks during study sessions"
-                ],
-                "correctIndex": 1
-            },
-            {
-                "q": "How does chunking help working memory?",
-                "options": [
-                    "It increases working memory capacity",
-                    "It reduces the number of items to remember",
-                    "It makes studying more enjoyable",
-                    "It eliminates the need for practice"
-                ],
-                "correctIndex": 1
-            }
-        ]
-    }
-}
+from db.content_store import content_store
+
+QUIZ_CONTENT = content_store.mapping("quizzes")
@@ -0,0 +1,278 @@
+"""
+Recall Session Queries
+MongoDB access for the recall_sessions collection
+
+due_date is stored as a BSON datetime (UTC). Pending sessions are
+covered by the partial (user_id, due_date, id) index, which serves both
+per-user due queries and the cross-user "due now" scan.
+
+Usage:
+    python -m db.recall_sessions                   # migrate + today's queues
+    python -m db.recall_sessions --day 2025-01-31  # queues for a given day
+"""
+
+import uuid
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from db.connection import get_database
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Fields returned by due-session queries and stored in daily queues
+DUE_SESSION_PROJECTION = {"_id": 0, "id": 1, "user_id": 1, "node_id": 1, "concept_text": 1, "due_date": 1}
+
+
+def get_recall_sessions_collection():
+    """Get the recall_sessions collection"""
+    return get_database()['recall_sessions']
+
+
+def get_recall_queues_collection():
+    """Get the recall_queues collection (materialized daily queues)"""
+    return get_database()['recall_queues']
+
+
+def end_of_day(day: date) -> datetime:
+    """First instant (UTC) after the given day"""
+    return datetime.combine(day + timedelta(days=1), time.min)
+
+
+async def find_pending_due_dates(user_id: str) -> Dict[str, datetime]:
+    """
+    Get the earliest pending due date per node for a user
+
+    Served by the partial pending index; sorting by due_date means the
+    first session seen for a node is its earliest one.
+
+    Returns:
+        Due date by node ID
+    """
+    cursor = get_recall_sessions_collection().find(
+        {"user_id": user_id, "status": "pending"},
+        {"_id": 0, "node_id": 1, "due_date": 1}
+    ).sort("due_date", 1)
+
+    due_dates = {}
+    async for session in cursor:
+        due_dates.setdefault(session["node_id"], session["due_date"])
+    return due_dates
+
+
+async def find_due_sessions(
+    before: datetime,
+    limit: int = 100,
+    after: Optional[Tuple[str, datetime, str]] = None,
+    user_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Get pending sessions due before a time, ordered by (user_id, due_date, id)
+
+    Pages through the partial pending index with keyset ranges, so each
+    page costs the same however many users have sessions due.
+
+    Args:
+        before: Only sessions due before this time (UTC)
+        after: (user_id, due_date, id) of the last session already returned
+        user_id: Restrict to one user
+    """
+    query: Dict[str, Any] = {"status": "pending", "due_date": {"$lt": before}}
+    if user_id:
+        query["user_id"] = user_id
+
+    if after is not None:
+        last_user, last_due, last_id = after
+        query["$or"] = [
+            {"user_id": {"$gt": last_user}},
+            {"user_id": last_user, "due_date": {"$gt": last_due}},
+            {"user_id": last_user, "due_date": last_due, "id": {"$gt": last_id}},
+        ]
+
+    cursor = get_recall_sessions_collection().find(query, DUE_SESSION_PROJECTION).sort(
+        [("user_id", 1), ("due_date", 1), ("id", 1)]
+    ).limit(limit)
+    return await cursor.to_list(length=limit)
+
+
+# ============================================
+# Completion (atomic, idempotent)
+# ============================================
+
+def completion_update(completed_at: datetime, **fields) -> Dict[str, Any]:
+    return {
+        "$set": {"status": "completed", "last_attempt": completed_at.isoformat(), **fields},
+        "$inc": {"attempts": 1}
+    }
+
+
+async def find_sessions_for_completion(session_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Get sessions by id with their node's scheduler state, in one round trip
+
+    Each session carries node_schedule (None for a node never reviewed),
+    so completions plan follow-ups without a separate node read. Sessions
+    come back in any status, in the order of session_ids.
+    """
+    pipeline = [
+        {"$match": {"id": {"$in": session_ids}}},
+        {"$lookup": {"from": "knowledge_nodes", "localField": "node_id", "foreignField": "id", "as": "_nodes"}},
+        {"$addFields": {"node_schedule": {"$arrayElemAt": ["$_nodes.schedule", 0]}}},
+        {"$project": {"_id": 0, "_nodes": 0}}
+    ]
+    sessions = await get_recall_sessions_collection().aggregate(pipeline).to_list(length=len(session_ids))
+    order = {session_id: i for i, session_id in enumerate(session_ids)}
+    return sorted(sessions, key=lambda session: order[session["id"]])
+
+
+def next_session_id(session_id: str) -> str:
+    """Deterministic id of the session scheduled after session_id (retries reuse it)"""
+    return f"recall_{uuid.uuid5(uuid.NAMESPACE_OID, session_id).hex[:12]}"
+
+
+async def complete_and_schedule(next_sessions: Dict[str, Dict[str, Any]], completed_at: datetime) -> List[str]:
+    """
+    Claim pending sessions and write their follow-ups in one ordered bulk write
+
+    Per session the follow-up is upserted first ($setOnInsert on its
+    deterministic id), then the session is claimed with a status guard.
+    Ordered execution stops at the first error, so a session is never
+    completed without its follow-up; a retry of a failed write finds the
+    session still pending and the follow-up already stored.
+
+    Args:
+        next_sessions: Follow-up session by pending session id
+
+    Returns:
+        Ids of the sessions this call completed (the others were completed
+        concurrently)
+    """
+    if not next_sessions:
+        return []
+    completion_id = uuid.uuid4().hex
+    operations = []
+    for session_id, next_session in next_sessions.items():
+        operations.append(UpdateOne({"id": next_session["id"]}, {"$setOnInsert": next_session}, upsert=True))
+        operations.append(UpdateOne(
+            {"id": session_id, "status": "pending"},
+            completion_update(completed_at, completion_id=completion_id)
+        ))
+
+    collection = get_recall_sessions_collection()
+    claimed = 0
+    while operations:
+        try:
+            result = await collection.bulk_write(operations, ordered=True)
+            claimed += result.modified_count
+            break
+        except BulkWriteError as e:
+            # A concurrent completion inserted the same follow-up first:
+            # it is stored, so carry on after it
+            error = e.details["writeErrors"][0]
+            if error["code"] != 11000:
+                raise
+            claimed += e.details["nModified"]
+            operations = operations[error["index"] + 1:]
+
+    # Follow-up upserts never modify, so every modification is a claim
+    if claimed == len(next_sessions):
+        return list(next_sessions)
+    cursor = collection.find({"completion_id": completion_id}, {"_id": 0, "id": 1})
+    return [session["id"] async for session in cursor]
+
+
+# ============================================
+# Daily Queues (batch job)
+# ============================================
+
+async def materialize_daily_queues(day: Optional[date] = None) -> int:
+    """
+    Build every user's recall queue for a day in one aggregation pass
+
+    Scans pending sessions due by the end of the day (partial index order),
+    groups them per user and $merges one document per (user_id, day) into
+    recall_queues, replacing any earlier run for the same day. Queues of
+    that day not written by this run (users with nothing due any more)
+    are deleted afterwards.
+
+    Returns:
+        Number of user queues written
+    """
+    day = day or datetime.utcnow().date()
+    day_key = day.isoformat()
+    run_id = uuid.uuid4().hex
+
+    pipeline = [
+        {"$match": {"status": "pending", "due_date": {"$lt": end_of_day(day)}}},
+        {"$sort": {"user_id": 1, "due_date": 1, "id": 1}},
+        {"$group": {
+            "_id": "$user_id",
+            "sessions": {"$push": {
+                "id": "$id", "node_id": "$node_id", "concept_text": "$concept_text", "due_date": "$due_date"
+            }},
+            "count": {"$sum": 1}
+        }},
+        {"$project": {
+            "_id": 0,
+            "user_id": "$_id",
+            "day": {"$literal": day_key},
+            "sessions": 1,
+            "count": 1,
+            "run_id": {"$literal": run_id},
+            "generated_at": "$$NOW"
+        }},
+        {"$merge": {
+            "into": "recall_queues",
+            "on": ["user_id", "day"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ]
+
+    # The per-user $push can exceed the 100 MB stage limit on large days
+    await get_recall_sessions_collection().aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+    stale = await get_recall_queues_collection().delete_many({"day": day_key, "run_id": {"$ne": run_id}})
+    if stale.deleted_count:
+        logger.info(f"Removed {stale.deleted_count} recall queues with nothing due for {day_key}")
+    written = await get_recall_queues_collection().count_documents({"day": day_key})
+    logger.info(f"Materialized {written} recall queues for {day_key}")
+    return written
+
+
+async def find_daily_queue(user_id: str, day: date) -> Optional[Dict[str, Any]]:
+    """Get a user's materialized queue for a day (unique (user_id, day) index)"""
+    return await get_recall_queues_collection().find_one(
+        {"user_id": user_id, "day": day.isoformat()}, {"_id": 0}
+    )
+
+
+async def migrate_due_dates() -> int:
+    """
+    Convert legacy ISO string due dates to BSON datetimes
+
+    Returns:
+        Number of sessions converted
+    """
+    result = await get_recall_sessions_collection().update_many(
+        {"due_date": {"$type": "string"}},
+        [{"$set": {"due_date": {"$toDate": "$due_date"}}}]
+    )
+    if result.modified_count:
+        logger.info(f"Converted {result.modified_count} recall session due dates to datetimes")
+    return result.modified_count
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Materialize daily recall queues")
+    parser.add_argument("--day", type=date.fromisoformat, default=None, help="Day (YYYY-MM-DD), default today (UTC)")
+    args = parser.parse_args()
+
+    async def main() -> int:
+        await migrate_due_dates()
+        return await materialize_daily_queues(args.day)
+
+    asyncio.run(main())
@@ -1,86 +1,9 @@
 # Summary Content Data
 # Centralized storage for all topic summaries
 # Referenced by NODES via summaryId (s1, s2, s3, etc.)
+#
+# Stored in the content store's "summaries" section (see db/content_store.py)
 
-SUMMARY_CONTENT = {
-    "s1": {
-        "content": "The forgetting curve, discovered by Hermann Ebbinghaus in 1885, shows how memory retention declines exponentially over time without reinforcement. Within 24 hours, we forget approximately 70% of new information unless we actively review it.\n\nThe key to combating the forgetting curve is spaced repetition — reviewing material at increasing intervals (1 day, 3 days, 7 days, 14 days). Each review strengthens the memory trace, making it more resistant to decay.\n\nActive recall, where you actively retrieve information from memory rather than passively re-reading, is the most effective review method. This effortful retrieval process strengthens neural pathways and creates more durable memories.",
-        "keyTakeaways": [
-            "Review just before forgetting to maximize retention efficiency",
-            "Spacing intervals should expand: 1d → 3d → 7d → 14d → 1m",
-            "Active recall strengthens memory better than passive re-reading",
-            "Each successful recall makes the next forgetting curve flatter"
-        ],
-        "keywords": ["Forgetting Curve", "Spaced Repetition", "Active Recall", "Memory Consolidation"]
-    },
-    "s2": {
-        "content": "Active recall is a learning technique that involves actively retrieving information from memory rather than passively reviewing notes. This method has been proven to be one of the most effective study strategies.\n\nWhen you practice active recall, you're forcing your brain to reconstruct the information, which strengthens neural pathways. This is much more effective than simply re-reading or highlighting text.\n\nResearch shows that testing yourself regularly leads to better long-term retention than spending the same amount of time reviewing material.",
-        "keyTakeaways": [
-            "Actively retrieve information rather than passively reviewing",
-            "Testing effect: Taking practice tests improves long-term memory",
-            "Combines well with spaced repetition for maximum effect",
-            "Initial difficulty during retrieval leads to stronger memories"
-        ],
-        "keywords": ["Active Recall", "Testing Effect", "Retrieval Practice", "Learning Strategies"]
-    },
-    "s3": {
-        "content": "The spacing effect demonstrates that learning is more effective when study sessions are spaced out over time rather than massed together in a single session. This phenomenon has been consistently demonstrated across various types of learning.\n\nWhen you space out your learning, you give your brain time to consolidate the information. Each time you return to the material, you're strengthening the neural connections associated with that knowledge.\n\nOptimal spacing intervals typically follow an expanding pattern: review after 1 day, then 3 days, then 7 days, then 14 days, and so on.",
-        "keyTakeaways": [
-            "Distributed practice beats massed practice (cramming)",
-            "Optimal intervals expand over time as memory strengthens",
-            "Spacing creates opportunities for memory consolidation",
-            "Works across all types of learning and skill acquisition"
-        ],
-        "keywords": ["Spacing Effect", "Distributed Practice", "Memory Consolidation", "Study Schedule"]
-    },
-    "s4": {
-        "content": "Working memory is a cognitive system responsible for temporarily holding and manipulating information needed for complex tasks. Research suggests working memory has a limited capacity of about 7±2 items (Miller's Law).\n\nWorking memory is crucial for learning, reasoning, and comprehension. When overloaded, it becomes a bottleneck that impairs learning and performance.\n\nStrategies to optimize working memory include chunking information, reducing cognitive load, and using external aids like notes or diagrams.",
-        "keyTakeaways": [
-            "Limited capacity of approximately 7±2 items",
-            "Essential for complex cognitive tasks",
-            "Can be overloaded, reducing learning effectiveness",
-            "Chunking and external aids help manage load"
-        ],
-        "keywords": ["Working Memory", "Miller's Law", "Cognitive Load", "Chunking"]
-    },
-    "s5": {
-        "content": "Interleaved practice involves mixing different topics or types of problems during a study session, rather than focusing on one topic at a time (blocked practice).\n\nWhile blocked practice may feel easier and produce faster initial gains, interleaved practice leads to better long-term retention and transfer of knowledge. The difficulty of switching between topics forces deeper processing.\n\nInterleaved practice is particularly effective for subjects that require discrimination between different concepts or problem types.",
-        "keyTakeaways": [
-            "Mix different topics rather than blocking by topic",
-            "Feels harder but produces better long-term learning",
-            "Improves ability to discriminate between concepts",
-            "Particularly effective for math and science problems"
-        ],
-        "keywords": ["Interleaved Practice", "Blocked Practice", "Discrimination", "Transfer"]
-    },
-    "s6": {
-        "content": "Metacognition refers to awareness and understanding of one's own thought processes. It involves monitoring what you know, recognizing when you don't understand something, and adjusting learning strategies accordingly.\n\nEffective learners use metacognitive strategies to assess their understanding, identify gaps in knowledge, and select appropriate study methods. This self-regulation is a key predictor of academic success.\n\nCommon metacognitive strategies include self-testing, reflection on learning, and conscious evaluation of comprehension during study.",
-        "keyTakeaways": [
-            "Awareness of your own thinking and learning processes",
-            "Essential for self-regulated learning",
-            "Includes planning, monitoring, and evaluating learning",
-            "Strong predictor of academic achievement"
-        ],
-        "keywords": ["Metacognition", "Self-Regulation", "Learning Strategies", "Self-Assessment"]
-    },
-    "s7": {
-        "content": "Retrieval practice involves actively recalling information from memory rather than passively reviewing it. This practice strengthens memory and is one of the most powerful learning strategies.\n\nThe testing effect demonstrates that the act of retrieving information strengthens the memory trace more than additional study. Even unsuccessful retrieval attempts can enhance subsequent learning.\n\nEffective retrieval practice includes flashcards, practice tests, free recall, and self-quizzing without looking at notes.",
-        "keyTakeaways": [
-            "Active recall is more effective than passive review",
-            "Testing effect: retrieval strengthens memory",
-            "Even failed retrieval attempts benefit learning",
-            "Should be frequent and low-stakes"
-        ],
-        "keywords": ["Retrieval Practice", "Testing Effect", "Active Recall", "Self-Quizzing"]
-    },
-    "s8": {
-        "content": "Chunking is a memory strategy that involves grouping individual pieces of information into larger, meaningful units. This technique effectively expands working memory capacity by reducing the number of items to remember.\n\nFor example, the sequence '2-0-2-4-1-2-2-5' is easier to remember as '2024-12-25' (a date). Expert knowledge is often characterized by sophisticated chunking of domain information.\n\nChunking is most effective when the grouped information is meaningful and follows familiar patterns or schemas.",
-        "keyTakeaways": [
-            "Groups individual items into meaningful larger units",
-            "Expands effective working memory capacity",
-            "More effective with meaningful patterns",
-            "Underlies expert performance in many domains"
-        ],
-        "keywords": ["Chunking", "Working Memory", "Information Processing", "Pattern Recognition"]
-    }
-}
+from db.content_store import content_store
+
+SUMMARY_CONTENT = content_store.mapping("summaries")
@@ -0,0 +1,117 @@
+"""
+User Session Queries
+MongoDB access for the user_sessions collection
+
+expires_at is a BSON datetime covered by a TTL index, so MongoDB's TTL
+monitor deletes expired sessions in the background (within about a
+minute of expiry); readers still reject sessions past expires_at.
+session_token is unique, and each user keeps at most
+MAX_SESSIONS_PER_USER sessions (oldest are removed on login). Both
+Emergent session tokens and Google JWTs are only accepted while their
+session row exists, so the cap and logout apply to both.
+"""
+
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from db.connection import get_database
+from utils import auth_cache
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MAX_SESSIONS_PER_USER = int(os.environ.get('MAX_SESSIONS_PER_USER', 5))
+
+SESSION_PROJECTION = {"_id": 0, "user_id": 1, "expires_at": 1}
+
+
+def get_user_sessions_collection():
+    """Get the user_sessions collection"""
+    return get_database()['user_sessions']
+
+
+async def find_session(session_token: str) -> Optional[Dict[str, Any]]:
+    """Get a session by token (unique session_token index)"""
+    return await get_user_sessions_collection().find_one({"session_token": session_token}, SESSION_PROJECTION)
+
+
+async def create_session(user_id: str, session_token: str, expires_at: datetime) -> List[str]:
+    """
+    Store a session and trim the user's oldest sessions over the cap
+
+    Upserts on the unique token, so a retried login does not fail or
+    duplicate the session.
+
+    Returns:
+        Tokens of the sessions removed by the cap
+    """
+    now = datetime.now(timezone.utc)
+    await get_user_sessions_collection().update_one(
+        {"session_token": session_token},
+        {
+            "$set": {"user_id": user_id, "expires_at": expires_at},
+            "$setOnInsert": {"created_at": now}
+        },
+        upsert=True
+    )
+    return await trim_sessions(user_id)
+
+
+async def trim_sessions(user_id: str, keep: int = MAX_SESSIONS_PER_USER) -> List[str]:
+    """Delete a user's sessions beyond the newest `keep` (user_created_at index)"""
+    collection = get_user_sessions_collection()
+    cursor = collection.find(
+        {"user_id": user_id}, {"_id": 1, "session_token": 1}
+    ).sort([("created_at", -1), ("_id", -1)]).skip(keep)
+    excess = await cursor.to_list(length=None)
+    if not excess:
+        return []
+
+    await collection.delete_many({"_id": {"$in": [session["_id"] for session in excess]}})
+    tokens = [session["session_token"] for session in excess]
+    for token in tokens:
+        auth_cache.invalidate_token(token)
+    logger.info(f"Removed {len(tokens)} sessions over the cap for user {user_id}")
+    return tokens
+
+
+async def delete_session(session_token: str):
+    """Delete a session (logout)"""
+    auth_cache.invalidate_token(session_token)
+    await get_user_sessions_collection().delete_one({"session_token": session_token})
+
+
+async def migrate_sessions() -> int:
+    """
+    Prepare stored sessions for the TTL and unique token indexes
+
+    - Converts ISO string expires_at/created_at to BSON datetimes (a TTL
+      index ignores strings, so those sessions would never expire)
+    - Removes duplicate tokens, keeping the newest session
+
+    Run before ensure_indexes() so the unique index can be built.
+
+    Returns:
+        Number of sessions changed or removed
+    """
+    collection = get_user_sessions_collection()
+    converted = 0
+    for field in ("expires_at", "created_at"):
+        result = await collection.update_many(
+            {field: {"$type": "string"}},
+            [{"$set": {field: {"$toDate": f"${field}"}}}]
+        )
+        converted += result.modified_count
+
+    duplicates = await collection.aggregate([
+        {"$sort": {"created_at": -1}},
+        {"$group": {"_id": "$session_token", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ]).to_list(length=None)
+    stale_ids = [session_id for group in duplicates for session_id in group["ids"][1:]]
+    if stale_ids:
+        await collection.delete_many({"_id": {"$in": stale_ids}})
+
+    if converted or stale_ids:
+        logger.info(f"Migrated sessions: {converted} dates converted, {len(stale_ids)} duplicates removed")
+    return converted + len(stale_ids)
@@ -0,0 +1,295 @@
+"""
+User Stats Queries
+Materialized per-user statistics (user_stats collection)
+
+One document per user holds the counters /api/stats needs, so the
+endpoint is a single point read on the unique user_id index:
+
+    {
+        "user_id": "...",
+        "nodes": {"count", "score_sum", "strong", "fading", "connections"},
+        "quizzes": {"count", "percentage_sum"},
+        "recall": {"completed", "pending_by_day": {"YYYY-MM-DD": n}},
+        "activity_days": ["YYYY-MM-DD", ...],   (newest first)
+        "version",                               (bumped by every update)
+        "computed_at", "updated_at"
+    }
+
+The document is built by one aggregation ($unionWith + $facet over
+knowledge_nodes, recall_sessions and quiz_results) and then kept current
+with $inc updates on quiz submit, node score changes, recall
+completion and import. Updates
+skip users without a document; their first read recomputes it.
+
+A recompute only replaces the document if its version is unchanged since
+the recompute started, so an increment landing in between is never
+overwritten (the recompute retries instead).
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from db.connection import get_database
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Days of activity kept for streaks (one string per active day)
+MAX_ACTIVITY_DAYS = 366
+
+# Recomputes retried when increments keep landing during the aggregation
+RECOMPUTE_ATTEMPTS = 3
+
+
+def get_user_stats_collection():
+    """Get the user_stats collection"""
+    return get_database()['user_stats']
+
+
+def day_of(timestamp: Union[str, datetime, None]) -> Optional[str]:
+    """UTC day (YYYY-MM-DD) of an ISO timestamp or (naive UTC) datetime"""
+    if isinstance(timestamp, datetime):
+        return timestamp.date().isoformat()
+    return timestamp[:10] if timestamp else None
+
+
+def today() -> str:
+    return datetime.utcnow().date().isoformat()
+
+
+def build_stats_pipeline(user_id: str) -> List[Dict[str, Any]]:
+    """
+    Aggregation computing all of a user's stats in one round trip
+
+    Runs on knowledge_nodes; recall_sessions and quiz_results are pulled
+    in with $unionWith (each matched on its user_id index) and tagged
+    with _source, then $facet splits the counts per source.
+    """
+    return [
+        {"$match": {"user_id": user_id}},
+        {"$project": {
+            "_id": 0,
+            "_source": {"$literal": "node"},
+            "score": {"$ifNull": ["$score", 0]},
+            "connection_count": {"$size": {"$ifNull": ["$connections", []]}}
+        }},
+        {"$unionWith": {"coll": "recall_sessions", "pipeline": [
+            {"$match": {"user_id": user_id}},
+            {"$project": {
+                "_id": 0,
+                "_source": {"$literal": "recall"},
+                "status": 1,
+                # BSON date (or legacy ISO string) -> "YYYY-MM-DD"
+                "due_day": {"$substrCP": [{"$toString": "$due_date"}, 0, 10]},
+                "activity_day": {"$substrCP": [{"$ifNull": ["$last_attempt", ""]}, 0, 10]}
+            }}
+        ]}},
+        {"$unionWith": {"coll": "quiz_results", "pipeline": [
+            {"$match": {"user_id": user_id}},
+            {"$project": {
+                "_id": 0,
+                "_source": {"$literal": "quiz"},
+                "percentage": 1,
+                "activity_day": {"$substrCP": ["$timestamp", 0, 10]}
+            }}
+        ]}},
+        {"$facet": {
+            "nodes": [
+                {"$match": {"_source": "node"}},
+                {"$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "score_sum": {"$sum": "$score"},
+                    "strong": {"$sum": {"$cond": [{"$gte": ["$score", 80]}, 1, 0]}},
+                    "fading": {"$sum": {"$cond": [{"$lt": ["$score", 60]}, 1, 0]}},
+                    "connections": {"$sum": "$connection_count"}
+                }}
+            ],
+            "quizzes": [
+                {"$match": {"_source": "quiz"}},
+                {"$group": {"_id": None, "count": {"$sum": 1}, "percentage_sum": {"$sum": "$percentage"}}}
+            ],
+            "recall_completed": [
+                {"$match": {"_source": "recall", "status": "completed"}},
+                {"$count": "count"}
+            ],
+            "recall_pending": [
+                {"$match": {"_source": "recall", "status": "pending"}},
+                {"$group": {"_id": "$due_day", "count": {"$sum": 1}}}
+            ],
+            "activity_days": [
+                {"$match": {"_source": {"$in": ["quiz", "recall"]}, "activity_day": {"$nin": ["", None]}}},
+                {"$group": {"_id": "$activity_day"}},
+                {"$sort": {"_id": -1}},
+                {"$limit": MAX_ACTIVITY_DAYS}
+            ]
+        }}
+    ]
+
+
+async def compute_user_stats(user_id: str) -> Dict[str, Any]:
+    """
+    Recompute a user's stats from source collections and store them
+
+    The stored document is replaced only if no increment was applied
+    since its version was read (version-guarded replace_one); otherwise
+    the recompute runs again, and after RECOMPUTE_ATTEMPTS the document
+    kept current by the increments is returned unchanged.
+    """
+    collection = get_user_stats_collection()
+    for _ in range(RECOMPUTE_ATTEMPTS):
+        current = await collection.find_one({"user_id": user_id}, {"_id": 0, "version": 1})
+        stats = await _aggregate_user_stats(user_id)
+
+        if current is None:
+            try:
+                await collection.insert_one({**stats, "version": 0})
+            except DuplicateKeyError:
+                continue  # A concurrent recompute stored it first
+            logger.info(f"Computed stats for user {user_id}")
+            return {**stats, "version": 0}
+
+        version = current.get("version")
+        guard = {"version": version} if version is not None else {"version": {"$exists": False}}
+        stats["version"] = (version or 0) + 1
+        result = await collection.replace_one({"user_id": user_id, **guard}, stats)
+        if result.matched_count:
+            logger.info(f"Computed stats for user {user_id}")
+            return stats
+
+    logger.warning(f"Stats for user {user_id} kept changing during recompute; keeping incremental counters")
+    return await find_user_stats(user_id)
+
+
+async def _aggregate_user_stats(user_id: str) -> Dict[str, Any]:
+    """Stats document of a user, built by build_stats_pipeline (not stored)"""
+    results = await get_database()['knowledge_nodes'].aggregate(build_stats_pipeline(user_id)).to_list(length=1)
+    facets = results[0] if results else {}
+
+    def first(name: str) -> Dict[str, Any]:
+        rows = facets.get(name) or [{}]
+        rows[0].pop("_id", None)
+        return rows[0]
+
+    nodes = first("nodes")
+    quizzes = first("quizzes")
+    now = datetime.utcnow().isoformat()
+
+    stats = {
+        "user_id": user_id,
+        "nodes": {
+            "count": nodes.get("count", 0),
+            "score_sum": nodes.get("score_sum", 0),
+            "strong": nodes.get("strong", 0),
+            "fading": nodes.get("fading", 0),
+            "connections": nodes.get("connections", 0)
+        },
+        "quizzes": {
+            "count": quizzes.get("count", 0),
+            "percentage_sum": quizzes.get("percentage_sum", 0)
+        },
+        "recall": {
+            "completed": first("recall_completed").get("count", 0),
+            "pending_by_day": {row["_id"]: row["count"] for row in facets.get("recall_pending", []) if row["_id"]}
+        },
+        "activity_days": [row["_id"] for row in facets.get("activity_days", [])],
+        "computed_at": now,
+        "updated_at": now
+    }
+    return stats
+
+
+async def find_user_stats(user_id: str) -> Optional[Dict[str, Any]]:
+    """Get a user's materialized stats (point read on the user_id index)"""
+    return await get_user_stats_collection().find_one({"user_id": user_id}, {"_id": 0})
+
+
+async def get_or_compute_user_stats(user_id: str) -> Dict[str, Any]:
+    """Get a user's stats, computing them on first use"""
+    return await find_user_stats(user_id) or await compute_user_stats(user_id)
+
+
+# ============================================
+# Incremental Updates
+# ============================================
+
+async def _apply(user_id: str, inc: Dict[str, int], activity_day: Optional[str] = None):
+    """
+    Apply counter changes to an existing stats document (never creates one)
+
+    A new activity day is pushed in the same ordered bulk write, only when
+    missing, keeping the newest MAX_ACTIVITY_DAYS ($each + $sort + $slice).
+    """
+    update: Dict[str, Any] = {
+        "$set": {"updated_at": datetime.utcnow().isoformat()},
+        "$inc": {**inc, "version": 1}
+    }
+    operations = [UpdateOne({"user_id": user_id}, update)]
+    if activity_day:
+        operations.append(UpdateOne(
+            {"user_id": user_id, "activity_days": {"$ne": activity_day}},
+            {"$push": {"activity_days": {"$each": [activity_day], "$sort": -1, "$slice": MAX_ACTIVITY_DAYS}}}
+        ))
+
+    try:
+        await get_user_stats_collection().bulk_write(operations)
+    except Exception as e:
+        # Stats are derived data; the next recompute repairs them
+        logger.error(f"Error updating stats for user {user_id}: {e}")
+
+
+async def record_quiz_result(user_id: str, percentage: int, timestamp: str):
+    """Count a submitted quiz result"""
+    await _apply(
+        user_id,
+        {"quizzes.count": 1, "quizzes.percentage_sum": percentage},
+        activity_day=day_of(timestamp)
+    )
+
+
+async def record_recall_completions(
+    user_id: str,
+    due_dates: List[datetime],
+    next_due_dates: List[datetime],
+    completed_at: str
+):
+    """Move recall sessions from pending to completed and count their follow-ups"""
+    inc: Dict[str, int] = {"recall.completed": len(due_dates)}
+    for due_date in due_dates:
+        key = f"recall.pending_by_day.{day_of(due_date)}"
+        inc[key] = inc.get(key, 0) - 1
+    for next_due_date in next_due_dates:
+        key = f"recall.pending_by_day.{day_of(next_due_date)}"
+        inc[key] = inc.get(key, 0) + 1
+    await _apply(user_id, inc, activity_day=day_of(completed_at))
+
+
+async def record_score_changes(user_id: str, changes: List[Tuple[int, int]]):
+    """Move node counters for (old score, new score) changes"""
+    inc = {"nodes.score_sum": 0, "nodes.strong": 0, "nodes.fading": 0}
+    for old, new in changes:
+        inc["nodes.score_sum"] += new - old
+        inc["nodes.strong"] += int(new >= 80) - int(old >= 80)
+        inc["nodes.fading"] += int(new < 60) - int(old < 60)
+    await _apply(user_id, {key: value for key, value in inc.items() if value})
+
+
+async def record_node_import(
+    user_id: str,
+    score: int,
+    connection_count: int,
+    due_date: Optional[datetime] = None
+):
+    """Count an imported node, its new links and its first recall session"""
+    inc = {
+        "nodes.count": 1,
+        "nodes.score_sum": score,
+        "nodes.strong": int(score >= 80),
+        "nodes.fading": int(score < 60),
+        # Each link adds a connection to both of its nodes
+        "nodes.connections": 2 * connection_count
+    }
+    if due_date:
+        inc[f"recall.pending_by_day.{day_of(due_date)}"] = 1
+    await _apply(user_id, inc)
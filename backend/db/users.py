@@ -0,0 +1,61 @@
+"""
+User Queries
+MongoDB access for the users collection
+
+Login is a single find_one_and_update upsert on the unique email index:
+it creates the user on first login and stamps later logins in one round
+trip, and concurrent first logins for the same email cannot create two
+users.
+"""
+
+from typing import Any, Dict, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from db.connection import get_database
+from utils import auth_cache
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def get_users_collection():
+    """Get the users collection"""
+    return get_database()['users']
+
+
+async def upsert_login_user(email: str, on_insert: Dict[str, Any], on_login: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Create or update the user logging in with `email`
+
+    Args:
+        email: Login email (unique)
+        on_insert: Fields written only when the user is created (including "_id")
+        on_login: Fields written on every login (last_login, a BSON
+            datetime); must be non-empty and not overlap on_insert
+
+    Returns:
+        The user document after the update, or None when on_insert's _id
+        already belongs to a user with another email
+    """
+    collection = get_users_collection()
+    update = {"$set": on_login, "$setOnInsert": on_insert}
+    try:
+        user = await collection.find_one_and_update(
+            {"email": email}, update, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # A concurrent first login inserted the user between our match and
+        # insert - or the _id is taken by another email (no match below)
+        user = await collection.find_one_and_update(
+            {"email": email}, {"$set": on_login}, return_document=ReturnDocument.AFTER
+        )
+        if user is None:
+            logger.warning(f"User id {on_insert.get('_id')} already belongs to another email than {email}")
+            return None
+
+    if user["_id"] == on_insert.get("_id"):
+        logger.info(f"Created new user: {email}")
+    # The cached document is now stale (last_login, profile fields)
+    auth_cache.invalidate_user(user["_id"])
+    auth_cache.remember_user_id(email, user["_id"])
+    return user
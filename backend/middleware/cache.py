@@ -1,16 +1,28 @@
 """
 Simple in-memory caching middleware
 Caches GET requests for specified duration
+
+Responses are cached as the rendered body bytes (plus media type), so
+hits are served without re-parsing or re-serializing JSON. Each entry
+also keeps the gzip/brotli variants of its body, compressed the first
+time a client asks for them and served as-is afterwards (the outer
+CompressionMiddleware leaves already-encoded responses alone). The
+endpoint's own headers (e.g. Cache-Control) are stored with the entry
+and replayed on hits; Set-Cookie is never cached.
 """
 
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from datetime import datetime, timedelta
-import json
+from utils.cache import response_cache
+from utils.compression import MIN_SIZE, choose_encoding, compress, is_compressible
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Headers recomputed per response (or never replayed) instead of stored
+SKIPPED_HEADERS = ("content-length", "content-type", "content-encoding", "set-cookie")
+
 
 class CacheMiddleware(BaseHTTPMiddleware):
     """
@@ -20,7 +32,8 @@ class CacheMiddleware(BaseHTTPMiddleware):
     
     def __init__(self, app):
         super().__init__(app)
-        self.cache = {}
+        # Shared store so invalidate_user_cache can drop a user's responses
+        self.cache = response_cache
         
         # Cache TTL (time-to-live) by route pattern
         self.cache_ttl = {
@@ -56,6 +69,32 @@ class CacheMiddleware(BaseHTTPMiddleware):
                 return ttl
         return 60  # Default 1 minute
     
+    def build_response(self, request: Request, entry: dict, status: str, cookies: list = None):
+        """Response for a cache entry in the client's preferred encoding"""
+        from fastapi.responses import Response
+        
+        body = entry["identity"]
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+        compressible = len(body) >= MIN_SIZE and is_compressible(entry["media_type"])
+        
+        content_encoding = None
+        if compressible and encoding:
+            # Compressed once per entry and encoding
+            if encoding not in entry:
+                entry[encoding] = compress(body, encoding)
+            body = entry[encoding]
+            content_encoding = encoding
+        
+        response = Response(content=body, media_type=entry["media_type"])
+        for name, value in entry["headers"] + (cookies or []):
+            response.headers.append(name, value)
+        response.headers["X-Cache"] = status
+        if compressible:
+            response.headers.add_vary_header("Accept-Encoding")
+        if content_encoding:
+            response.headers["Content-Encoding"] = content_encoding
+        return response
+    
     async def dispatch(self, request: Request, call_next):
         # Check if should cache
         if not self.should_cache(request):
@@ -65,17 +104,14 @@ class CacheMiddleware(BaseHTTPMiddleware):
         
         # Check cache
         if cache_key in self.cache:
-            cached_data, expiry_time = self.cache[cache_key]
+            entry, expiry_time = self.cache[cache_key]
             
             # Check if still valid
             if datetime.now() < expiry_time:
                 logger.info(f"Cache HIT: {request.url.path}")
                 
-                # Return cached response
-                from fastapi.responses import JSONResponse
-                response = JSONResponse(content=cached_data)
-                response.headers["X-Cache"] = "HIT"
-                return response
+                # Return cached bytes (or a cached compressed variant) as-is
+                return self.build_response(request, entry, "HIT")
             else:
                 # Expired, remove from cache
                 del self.cache[cache_key]
@@ -92,24 +128,24 @@ class CacheMiddleware(BaseHTTPMiddleware):
             async for chunk in response.body_iterator:
                 body += chunk
             
-            # Parse and store in cache
-            try:
-                cached_data = json.loads(body.decode())
-                ttl = self.get_ttl(request)
-                expiry_time = datetime.now() + timedelta(seconds=ttl)
-                self.cache[cache_key] = (cached_data, expiry_time)
-                logger.info(f"Cache STORED: {request.url.path} (TTL: {ttl}s)")
-            except Exception as e:
-                logger.error(f"Failed to cache response: {e}")
+            # Store the rendered bytes
+            ttl = self.get_ttl(request)
+            expiry_time = datetime.now() + timedelta(seconds=ttl)
+            entry = {
+                "identity": body,
+                "media_type": response.media_type or response.headers.get("content-type"),
+                # The endpoint's own headers, replayed on every hit
+                "headers": [
+                    (name, value) for name, value in response.headers.items()
+                    if name not in SKIPPED_HEADERS
+                ]
+            }
+            self.cache[cache_key] = (entry, expiry_time)
+            logger.info(f"Cache STORED: {request.url.path} (TTL: {ttl}s)")
             
-            # Recreate response
-            from fastapi.responses import Response
-            response = Response(
-                content=body,
-                status_code=response.status_code,
-                headers=dict(response.headers),
-                media_type=response.media_type
-            )
+            # Cookies go to this client only
+            cookies = [(name, value) for name, value in response.headers.items() if name == "set-cookie"]
+            return self.build_response(request, entry, "MISS", cookies)
         
         response.headers["X-Cache"] = "MISS"
         return response
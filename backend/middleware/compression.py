@@ -0,0 +1,121 @@
+"""
+Response Compression Middleware
+gzip/brotli negotiation with a minimum size threshold
+
+Pure ASGI (not BaseHTTPMiddleware) so streamed responses are compressed
+chunk by chunk instead of being buffered. Skipped when:
+- the client accepts neither br nor gzip
+- the response already has a Content-Encoding (CacheMiddleware serves
+  precompressed cached variants)
+- the content type is not compressible
+- a single-chunk body is smaller than COMPRESSION_MIN_SIZE
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.compression import MIN_SIZE, StreamCompressor, choose_encoding, compress, is_compressible
+
+
+class CompressionMiddleware:
+    """Compress responses for clients that accept br or gzip"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    """
+    Wraps send() for one response
+
+    Body chunks are held until COMPRESSION_MIN_SIZE bytes (or the end of
+    the body) have arrived - responses relayed by BaseHTTPMiddleware
+    arrive in chunks even when small - then the response is sent as-is,
+    compressed whole, or compressed as a stream.
+    """
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.buffer = []
+        self.buffered = 0
+        self.compressor = None
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            headers = Headers(raw=self.start_message["headers"])
+            if "content-encoding" in headers or not is_compressible(headers.get("content-type")):
+                await self._flush_start()
+                await self._send(message)
+                return
+
+            self.buffer.append(body)
+            self.buffered += len(body)
+            if more_body and self.buffered < self.minimum_size:
+                return
+            await self._start(b"".join(self.buffer), more_body)
+            self.buffer = []
+            return
+
+        if self.compressor is None:
+            await self._send(message)
+            return
+
+        body = self.compressor.compress(body)
+        if not more_body:
+            body += self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    async def _flush_start(self):
+        start_message, self.start_message = self.start_message, None
+        await self._send(start_message)
+
+    async def _start(self, body: bytes, more_body: bool):
+        headers = MutableHeaders(raw=self.start_message["headers"])
+
+        if not more_body and len(body) < self.minimum_size:
+            await self._flush_start()
+            await self._send({"type": "http.response.body", "body": body, "more_body": False})
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+        if not more_body:
+            body = compress(body, self.encoding)
+            headers["Content-Length"] = str(len(body))
+            await self._flush_start()
+            await self._send({"type": "http.response.body", "body": body, "more_body": False})
+            return
+
+        # Streamed: length unknown until the end
+        del headers["Content-Length"]
+        self.compressor = StreamCompressor(self.encoding)
+        await self._flush_start()
+        await self._send({"type": "http.response.body", "body": self.compressor.compress(body), "more_body": True})
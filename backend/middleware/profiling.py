@@ -0,0 +1,74 @@
+"""
+Request Profiling Middleware
+Opt-in cProfile capture for individual requests
+
+Triggers:
+- Admin request with "X-Profile: 1" header or "?profile=1" query flag
+- Random sampling of configured paths (PROFILING_SAMPLE_RATE)
+
+cProfile hooks the event-loop thread, not the request: any other
+coroutine that runs while the profiled request awaits I/O (concurrent
+requests, background flushes) is recorded in the same profile. Profile
+on a quiet worker, or read the stats for the request's own call tree
+only; cumulative totals include unrelated work.
+"""
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+import random
+import time
+from utils.profiler import get_profiling_config, is_admin_token, start_profile, stop_profile
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """Profile flagged or sampled requests and store flamegraph-ready stats"""
+
+    def should_profile(self, request: Request) -> bool:
+        """Check if this request should be profiled"""
+        config = get_profiling_config()
+
+        # Explicit flag (admin only)
+        flagged = (
+            request.headers.get("X-Profile") == "1"
+            or request.query_params.get("profile") == "1"
+        )
+        if flagged:
+            if is_admin_token(request.headers.get("X-Admin-Token")):
+                return True
+            logger.warning(f"Ignoring profile flag without admin token: {request.url.path}")
+            return False
+
+        # Sampling (configured by operator)
+        if config["sample_rate"] > 0:
+            for route in config["paths"]:
+                if request.url.path.startswith(route):
+                    return random.random() < config["sample_rate"]
+
+        return False
+
+    async def dispatch(self, request: Request, call_next):
+        if not self.should_profile(request):
+            return await call_next(request)
+
+        profiler = start_profile()
+        if profiler is None:
+            return await call_next(request)
+
+        start_time = time.time()
+        profile_path = None
+        try:
+            response = await call_next(request)
+        finally:
+            duration = (time.time() - start_time) * 1000  # Convert to ms
+            # A failure to store the profile must not replace the endpoint's own exception
+            try:
+                profile_path = stop_profile(profiler, request.method, request.url.path, duration)
+            except Exception as e:
+                logger.error(f"Failed to store profile for {request.url.path}: {e}")
+
+        if profile_path is not None:
+            response.headers["X-Profile-Id"] = profile_path.name
+        return response
@@ -0,0 +1,13 @@
+"""
+Node Models
+Data models for node detail requests
+"""
+
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class NodeDetailsRequest(BaseModel):
+    """Request model for fetching many node details at once"""
+    ids: List[str] = Field(..., min_length=1, max_length=50)
+    user_id: str = "demo_user"
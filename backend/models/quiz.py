@@ -17,6 +17,7 @@ class QuizAnswer(BaseModel):
 
 class QuizResultSubmit(BaseModel):
     """Request model for submitting quiz results"""
+    userId: str = "demo_user"
     nodeId: str
     quizId: str
     answers: List[QuizAnswer]
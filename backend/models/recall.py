@@ -0,0 +1,18 @@
+"""
+Recall Models
+Data models for recall session completion
+"""
+
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class RecallResult(BaseModel):
+    """Outcome of one recall session"""
+    session_id: str
+    success: bool
+
+
+class RecallBatchComplete(BaseModel):
+    """Request model for completing a whole review session at once"""
+    results: List[RecallResult] = Field(..., min_length=1, max_length=100)
@@ -12,6 +12,7 @@ from utils.cache import (
     medium_cache,
     long_cache
 )
+from utils.auth_cache import get_auth_cache_stats
 
 router = APIRouter(prefix="/cache", tags=["Cache Admin"])
 
@@ -20,9 +21,9 @@ router = APIRouter(prefix="/cache", tags=["Cache Admin"])
 async def cache_statistics():
     """
     Get cache performance statistics
-    Returns: Hit rate, cache sizes, and request counts
+    Returns: Hit rate, cache sizes, request counts and auth context cache sizes
     """
-    return get_cache_stats()
+    return {**get_cache_stats(), "auth_cache": get_auth_cache_stats()}
 
 
 @router.post("/clear")
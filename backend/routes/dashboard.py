@@ -27,7 +27,7 @@ logger = get_logger(__name__)
 @router.get("/library")
 async def get_library_items():
     """Get all documents (user's uploaded study materials)"""
-    return {"items": DOCUMENTS}
+    return {"items": list(DOCUMENTS)}
 
 
 # ========================================
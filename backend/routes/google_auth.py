@@ -2,9 +2,14 @@ from fastapi import APIRouter, HTTPException, Response, Request
 from google.oauth2 import id_token
 from google.auth.transport import requests
 import os
+import time
+import uuid
 import jwt
 from datetime import datetime, timezone, timedelta
 from typing import Optional
+from auth import login_user
+from db.user_sessions import find_session
+from utils import auth_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -84,49 +89,24 @@ async def google_auth_callback(request: Request, response: Response):
         if not google_id or not email:
             raise HTTPException(status_code=400, detail="Missing required user information")
         
-        # Check if user exists in database
-        existing_user = await db.users.find_one({"email": email})
-        
-        if existing_user:
-            user_id = existing_user["_id"]
-            # Update last login
-            await db.users.update_one(
-                {"_id": user_id},
-                {"$set": {"last_login": datetime.now(timezone.utc).isoformat()}}
-            )
-            logger.info(f"User logged in: {email}")
-        else:
-            # Create new user
-            import uuid
-            user_id = str(uuid.uuid4())
-            
-            now = datetime.now(timezone.utc).isoformat()
-            user_doc = {
-                "_id": user_id,
+        # Upsert the user and store the session (capped per user, expired by the TTL index)
+        jwt_config = get_jwt_config()
+        now = datetime.now(timezone.utc)
+        user, jwt_token = await login_user(
+            email,
+            on_insert={
+                "_id": str(uuid.uuid4()),
                 "google_id": google_id,
-                "email": email,
                 "name": name,
                 "picture": picture,
-                "created_at": now,
-                "last_login": now
-            }
-            
-            await db.users.insert_one(user_doc)
-            logger.info(f"New user created: {email}")
-        
-        # Create JWT token
-        jwt_token = create_jwt_token(user_id, email)
-        jwt_config = get_jwt_config()
-        
-        # Store session in database for tracking (optional but useful)
-        now = datetime.now(timezone.utc)
-        session_doc = {
-            "user_id": user_id,
-            "session_token": jwt_token,
-            "expires_at": (now + timedelta(days=jwt_config["expiration_days"])).isoformat(),
-            "created_at": now.isoformat()
-        }
-        await db.user_sessions.insert_one(session_doc)
+                "created_at": now
+            },
+            on_login={"last_login": now},
+            token_for=lambda user_id: create_jwt_token(user_id, email),
+            expires_at=now + timedelta(days=jwt_config["expiration_days"])
+        )
+        user_id = user["_id"]
+        logger.info(f"User logged in: {email}")
         
         # Set httpOnly cookie with JWT token
         response.set_cookie(
@@ -160,7 +140,12 @@ async def google_auth_callback(request: Request, response: Response):
 
 @router.get("/verify")
 async def verify_token(request: Request):
-    """Verify JWT token and return user info"""
+    """
+    Verify JWT token and return user info
+    
+    The token must also have a live session: logged-out tokens and
+    sessions removed by the per-user cap are rejected before "exp".
+    """
     # Try to get token from cookie
     token = request.cookies.get("session_token")
     
@@ -173,13 +158,18 @@ async def verify_token(request: Request):
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    # Verify token
-    payload = verify_jwt_token(token)
+    # Verify token (claims cached by token hash until "exp")
+    payload = auth_cache.get_claims(token, verify_jwt_token)
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
-    # Get user from database
-    user_doc = await db.users.find_one({"_id": payload["user_id"]})
+    # Require the session row (cached by token hash, briefly)
+    session = await auth_cache.get_session(token, lambda: find_session(token))
+    if not session or session["expires_at"] < time.time() or session["user_id"] != payload["user_id"]:
+        raise HTTPException(status_code=401, detail="Session expired or logged out")
+    
+    # Get user (cached for a short TTL)
+    user_doc = await auth_cache.get_user(payload["user_id"], lambda: db.users.find_one({"_id": payload["user_id"]}))
     if not user_doc:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -0,0 +1,119 @@
+"""
+Graph Routes
+Neighborhood queries and incremental knowledge graph loading
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from datetime import datetime
+from typing import Optional
+from db.knowledge_nodes import find_changed_nodes
+from services.graph_service import build_edges
+from services.graph_store import graph_store
+from utils.pagination import encode_cursor, decode_cursor
+import logging
+
+router = APIRouter(prefix="/graph")
+logger = logging.getLogger(__name__)
+
+
+@router.get("/neighborhood")
+async def get_neighborhood(
+    node_id: str = Query(..., description="Node to expand from"),
+    hops: int = Query(1, ge=0, le=4, description="Maximum distance from the node"),
+    max_nodes: int = Query(50, ge=1, le=500, description="Maximum nodes to return (node included)"),
+    user_id: str = Query("demo_user", description="User ID for MCP nodes")
+):
+    """
+    SUBGRAPH API - Get the k-hop neighborhood of a node with its edges
+    Used by: Knowledge Graph focus mode (explore one topic at a time)
+    
+    Expanded over the user's in-memory graph (static demo + MCP nodes,
+    see services/graph_store.py). Nearest nodes are kept first when
+    max_nodes cuts the neighborhood (truncated = true).
+    
+    Cached: 1 minute (short_cache)
+    """
+    from utils.cache import short_cache, generate_cache_key, cache_stats
+    
+    cache_key = generate_cache_key(
+        "get_neighborhood", node_id=node_id, hops=hops, max_nodes=max_nodes, user_id=user_id
+    )
+    cache_stats['total_requests'] += 1
+    
+    if cache_key in short_cache:
+        cache_stats['hits'] += 1
+        return short_cache[cache_key]
+    
+    cache_stats['misses'] += 1
+    
+    graph = await graph_store.get(user_id)
+    if node_id not in graph.index:
+        raise HTTPException(status_code=404, detail="Node not found")
+    
+    positions, depths, truncated = graph.k_hop(node_id, hops, max_nodes)
+    nodes = [
+        {**graph.node_view(position), "depth": depth}
+        for position, depth in zip(positions.tolist(), depths.tolist())
+    ]
+    
+    result = {
+        "root": node_id,
+        "hops": hops,
+        "nodes": nodes,
+        "edges": graph.subgraph_edges(positions),
+        "truncated": truncated
+    }
+    
+    short_cache[cache_key] = result
+    
+    return result
+
+
+@router.get("/delta")
+async def get_graph_delta(
+    user_id: str = Query("demo_user", description="User ID"),
+    since: Optional[str] = Query(None, description="ISO timestamp from a previous response's next_since"),
+    limit: int = Query(500, ge=1, le=1000, description="Maximum number of changed nodes to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous response with has_more")
+):
+    """
+    DELTA API - Get nodes and edges changed since the client's last fetch
+    Used by: Knowledge Graph to refresh without reloading every node
+    
+    Flow:
+    1. Initial load via /api/nodes (keep its "server_time")
+    2. Poll /api/graph/delta?since=<next_since> and merge returned nodes/edges
+    3. While has_more is true, call again immediately with next_cursor
+       (an (updated_at, id) cursor, so nodes sharing one updated_at are
+       never skipped); once it is false, poll again with next_since
+    
+    Static demo nodes never change, so only MCP nodes appear in deltas.
+    Not cached: responses depend on the exact timestamp.
+    """
+    after_id = None
+    if cursor:
+        since, after_id = decode_cursor(cursor, (str, str))
+    elif since is None:
+        raise HTTPException(status_code=400, detail="since or cursor is required")
+    
+    server_time = datetime.utcnow().isoformat()
+    
+    nodes = await find_changed_nodes(user_id, since, limit + 1, after_id)
+    has_more = len(nodes) > limit
+    nodes = nodes[:limit]
+    next_since = server_time
+    next_cursor = None
+    
+    if has_more:
+        next_since = nodes[-1]["updated_at"]
+        next_cursor = encode_cursor([nodes[-1]["updated_at"], nodes[-1]["id"]])
+    
+    return {
+        "nodes": nodes,
+        "edges": build_edges(nodes),
+        "since": since,
+        "next_since": next_since,
+        "next_cursor": next_cursor,
+        "server_time": server_time,
+        "has_more": has_more
+    }
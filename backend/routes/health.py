@@ -7,7 +7,8 @@ from fastapi import APIRouter
 from typing import List
 from datetime import datetime
 from models.health import StatusCheck, StatusCheckCreate
-from db.connection import db
+from db.connection import get_database
+from db.monitoring import get_db_metrics
 
 router = APIRouter()
 
@@ -22,11 +23,20 @@ async def root():
     }
 
 
+@router.get("/health/db")
+async def database_metrics():
+    """
+    Get MongoDB connection-pool and command metrics
+    Returns: Pool saturation, checkout wait time and per-command latency
+    """
+    return get_db_metrics()
+
+
 @router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
     """Get all status checks"""
     try:
-        status_checks = await db.status_checks.find().to_list(length=100)
+        status_checks = await get_database().status_checks.find().to_list(length=100)
         for check in status_checks:
             if isinstance(check['timestamp'], str):
                 check['timestamp'] = datetime.fromisoformat(check['timestamp'].replace('Z', '+00:00'))
@@ -41,5 +51,5 @@ async def create_status_check(status: StatusCheckCreate):
     status_obj = StatusCheck(client_name=status.client_name)
     doc = status_obj.model_dump()
     doc['timestamp'] = doc['timestamp'].isoformat()
-    _ = await db.status_checks.insert_one(doc)
+    _ = await get_database().status_checks.insert_one(doc)
     return status_obj
@@ -1,24 +1,106 @@
 """
 Insights Routes
-Endpoints for knowledge clusters and personalized recommendations
+Endpoints for knowledge clusters, personalized recommendations and quiz analytics
 """
 
-from fastapi import APIRouter
-from db.dashboard_data import NODES
+from fastapi import APIRouter, Query
+from db.quiz_analytics import find_question_stats, find_mastery_curve, find_user_activity
+from db.recall_sessions import find_pending_due_dates
+from services.graph_store import graph_store
 from services.insights_service import get_knowledge_clusters, get_recommendations
 
 router = APIRouter()
 
 
 @router.get("/clusters")
-async def get_knowledge_clusters_endpoint():
-    """Get knowledge clusters (related topics grouped together)"""
-    clusters = get_knowledge_clusters(NODES)
+async def get_knowledge_clusters_endpoint(
+    user_id: str = Query("demo_user", description="User ID for MCP nodes")
+):
+    """
+    Get knowledge clusters (related topics grouped together)
+    Communities of the user's graph (static demo + MCP nodes)
+    """
+    graph = await graph_store.get(user_id)
+    clusters = get_knowledge_clusters(graph)
     return {"clusters": clusters}
 
 
 @router.get("/recommendations")
-async def get_recommendations_endpoint():
-    """Get personalized recommendations"""
-    recommendations = get_recommendations(NODES)
-    return {"recommendations": recommendations}
+async def get_recommendations_endpoint(
+    user_id: str = Query("demo_user", description="User ID for MCP nodes and recall sessions"),
+    offset: int = Query(0, ge=0, description="Recommendations to skip"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum recommendations to return")
+):
+    """
+    Get personalized recommendations (paginated)
+    
+    Ranked over the user's graph (static demo + MCP nodes) and pending
+    recall sessions. Pages are cached per graph version; recall
+    completions and quiz updates drop them via invalidate_user_cache.
+    
+    Cached: 1 minute (short_cache)
+    """
+    from utils.cache import short_cache, generate_cache_key, cache_stats
+    
+    graph = await graph_store.get(user_id)
+    cache_key = generate_cache_key(
+        "get_recommendations", user_id=user_id, version=graph.version_key, offset=offset, limit=limit
+    )
+    cache_stats['total_requests'] += 1
+    
+    if cache_key in short_cache:
+        cache_stats['hits'] += 1
+        return short_cache[cache_key]
+    
+    cache_stats['misses'] += 1
+    
+    due_dates = await find_pending_due_dates(user_id)
+    recommendations, total = get_recommendations(graph, due_dates, offset, limit)
+    
+    result = {
+        "recommendations": recommendations,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "has_more": offset + len(recommendations) < total
+    }
+    
+    short_cache[cache_key] = result
+    
+    return result
+
+
+@router.get("/quiz-analytics/questions")
+async def get_question_analytics(
+    quiz_id: str = Query(..., description="Quiz ID")
+):
+    """
+    Get per-question correctness rates of a quiz (all users, all time)
+    Read from the quiz_question_rollups totals (one document per question)
+    """
+    return {"quiz_id": quiz_id, "questions": await find_question_stats(quiz_id)}
+
+
+@router.get("/quiz-analytics/mastery")
+async def get_mastery_curve(
+    node_id: str = Query(..., description="Node ID"),
+    user_id: str = Query("demo_user", description="User ID"),
+    days: int = Query(30, ge=1, le=365, description="Days of history")
+):
+    """
+    Get a user's mastery curve for a node (daily average, best and last score)
+    Read from quiz_node_rollups (one document per active day)
+    """
+    return {"node_id": node_id, "days": days, "curve": await find_mastery_curve(user_id, node_id, days)}
+
+
+@router.get("/quiz-analytics/activity")
+async def get_quiz_activity(
+    user_id: str = Query("demo_user", description="User ID"),
+    days: int = Query(30, ge=1, le=365, description="Days of history")
+):
+    """
+    Get a user's daily quiz time series (quizzes, average, correct rate, XP)
+    Read from quiz_user_rollups (one document per active day)
+    """
+    return {"user_id": user_id, "days": days, "series": await find_user_activity(user_id, days)}
@@ -8,6 +8,7 @@ from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
+from utils.responses import FastJSONResponse
 
 logger = logging.getLogger(__name__)
 
@@ -224,11 +225,11 @@ async def get_mcp_concepts(user_id: str, limit: int = 50):
     
     concepts = await get_user_mcp_concepts(user_id, limit)
     
-    return {
+    return FastJSONResponse({
         "user_id": user_id,
         "concepts": concepts,
         "total": len(concepts)
-    }
+    })
 
 
 @router.get("/quizzes")
@@ -242,11 +243,11 @@ async def get_mcp_quizzes(user_id: str):
     
     quizzes = await get_user_mcp_quizzes(user_id)
     
-    return {
+    return FastJSONResponse({
         "user_id": user_id,
         "quizzes": quizzes,
         "total": len(quizzes)
-    }
+    })
 
 
 # ============================================
@@ -6,25 +6,52 @@ Updated: Now includes MCP-imported nodes from MongoDB
 
 from fastapi import APIRouter, HTTPException, Query
 import urllib.parse
-from datetime import datetime, timedelta
-from db.dashboard_data import NODES
+import asyncio
+import heapq
+from itertools import islice
+from datetime import datetime
+from typing import Optional
+from db.content_store import content_store
+from db.dashboard_data import NODES, NODES_BY_ID, NODES_BY_TITLE
 from db.quiz_data import QUIZ_CONTENT
 from db.summary_data import SUMMARY_CONTENT
-from db.connection import get_database
+from db.knowledge_nodes import (
+    GRAPH_VIEW_PROJECTION,
+    DETAIL_VIEW_PROJECTION,
+    aggregate_prioritized_nodes,
+    count_user_nodes,
+    find_node_details,
+    node_sort_key,
+    to_graph_view
+)
+from models.node import NodeDetailsRequest
 from validation.validators import NodeValidator
 from utils.cache import cached, medium_cache, long_cache
+from utils.pagination import encode_cursor, decode_cursor
+from utils.responses import FastJSONResponse
 
 router = APIRouter()
 
-# Get MongoDB connection
-db = get_database()
+# Static nodes pre-sorted by (priority, score, id), once per content version
+_sorted_nodes = {}
+
+
+def sorted_static_nodes(view: str):
+    """Static nodes in listing order (graph or full view)"""
+    version = content_store.current_version()
+    if _sorted_nodes.get("version") != version:
+        full = sorted(NODES, key=node_sort_key)
+        _sorted_nodes.update(version=version, full=full, graph=[to_graph_view(node) for node in full])
+    return _sorted_nodes["graph" if view == "graph" else "full"]
 
 
 @router.get("/nodes")
 async def get_nodes(
     time_window: int = Query(21, description="Filter nodes by days (21=3 weeks, 35=5 weeks, 49=7 weeks, 0=all time)"),
-    limit: int = Query(100, description="Maximum number of nodes to return"),
-    user_id: str = Query("demo_user", description="User ID to fetch nodes for")
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of nodes to return"),
+    user_id: str = Query("demo_user", description="User ID to fetch nodes for"),
+    view: str = Query("full", description="Node shape: graph (id, title, state, score, connections, created_at) or full"),
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous page")
 ):
     """
     LIGHTWEIGHT API - Get nodes for graph display with time-based filtering
@@ -37,109 +64,80 @@ async def get_nodes(
     - time_window: Number of days to look back (21, 35, 49, or 0 for all)
     - limit: Max nodes to return (default 100)
     - user_id: User to fetch MCP nodes for
+    - view: "graph" returns only the fields the graph renders
+    - cursor: Continue after the last node of a previous page
     
-    Sorting Priority:
+    Sorting Priority (then score, then id):
     1. Fading topics (retention < 60%) - Highest priority
     2. Medium topics (retention 60-80%) - Medium priority
     3. Strong topics (retention > 80%) - Lower priority
     
+    Pagination: keyset over (priority, score, id). Pass next_cursor back
+    while has_more is true. server_time seeds /api/graph/delta refreshes.
+    
     Cached: 5 minutes (medium_cache)
     """
     # Manual cache implementation for FastAPI compatibility
     from utils.cache import medium_cache, generate_cache_key, cache_stats
     
-    cache_key = generate_cache_key("get_nodes", time_window=time_window, limit=limit, user_id=user_id)
+    cache_key = generate_cache_key(
+        "get_nodes", time_window=time_window, limit=limit, user_id=user_id, view=view, cursor=cursor
+    )
     cache_stats['total_requests'] += 1
     
     if cache_key in medium_cache:
         cache_stats['hits'] += 1
-        return medium_cache[cache_key]
+        return FastJSONResponse(medium_cache[cache_key])
     
     cache_stats['misses'] += 1
     
-    # Start with mock nodes
-    all_nodes = list(NODES)
+    after = tuple(decode_cursor(cursor, (int, (int, float), str))) if cursor else None
+    server_time = datetime.utcnow().isoformat()
     
-    # Fetch MCP nodes from MongoDB
+    # MCP nodes: time window, priority sort, cursor and limit run in MongoDB
+    # (one extra node tells whether another page exists)
+    projection = GRAPH_VIEW_PROJECTION if view == "graph" else DETAIL_VIEW_PROJECTION
+    mcp_nodes = []
+    mcp_total = 0
     try:
-        mcp_nodes_cursor = db.knowledge_nodes.find({"user_id": user_id})
-        mcp_nodes = await mcp_nodes_cursor.to_list(length=200)
-        
-        # Convert MCP nodes to match frontend format
-        for mcp_node in mcp_nodes:
-            mcp_node.pop('_id', None)  # Remove MongoDB _id
-            mcp_node.pop('user_id', None)  # Remove user_id (not needed in frontend)
-            
-            # Calculate state from score if not set
-            if mcp_node.get('state') == 'new' or not mcp_node.get('state'):
-                score = mcp_node.get('score', 0)
-                if score < 60:
-                    mcp_node['state'] = 'fading'
-                elif score < 80:
-                    mcp_node['state'] = 'medium'
-                else:
-                    mcp_node['state'] = 'high'
-            
-            # Ensure lastReview field
-            if not mcp_node.get('lastReview'):
-                mcp_node['lastReview'] = 'Never'
-            
-            # Add MCP badge flag for frontend
-            mcp_node['isMCP'] = True
-            mcp_node['mcpPlatform'] = mcp_node.get('source_platform', 'mcp')
-            
-        all_nodes.extend(mcp_nodes)
-        
+        mcp_nodes, mcp_total = await asyncio.gather(
+            aggregate_prioritized_nodes(user_id, time_window, limit + 1, projection, after),
+            count_user_nodes(user_id)
+        )
     except Exception as e:
         import logging
         logging.error(f"Error fetching MCP nodes: {str(e)}")
         # Continue with just mock nodes if MongoDB fails
     
-    # Apply time window filter if not "all time"
-    filtered_nodes = all_nodes
-    if time_window > 0:
-        cutoff_date = datetime.now() - timedelta(days=time_window)
-        # For mock data, include all; for MCP nodes, filter by created_at
-        filtered_nodes = []
-        for node in all_nodes:
-            if node.get('isMCP'):
-                try:
-                    created_at = datetime.fromisoformat(node.get('created_at', ''))
-                    if created_at > cutoff_date:
-                        filtered_nodes.append(node)
-                except:
-                    filtered_nodes.append(node)  # Include if date parsing fails
-            else:
-                filtered_nodes.append(node)  # Include all mock nodes
-    
-    # Sort by priority: fading > medium > strong
-    def get_priority(node):
-        score = node.get('score', 100)
-        if score < 60:
-            return 0  # Highest priority (fading)
-        elif score < 80:
-            return 1  # Medium priority
-        else:
-            return 2  # Lowest priority (strong)
-    
-    sorted_nodes = sorted(filtered_nodes, key=get_priority)
+    # Merge with pre-sorted mock nodes (no created_at, so always in the window)
+    mock_nodes = sorted_static_nodes(view)
+    if after is not None:
+        mock_nodes = [node for node in mock_nodes if node_sort_key(node) > after]
+    merged_nodes = heapq.merge(mock_nodes, mcp_nodes, key=node_sort_key)
     
     # Apply limit
-    limited_nodes = sorted_nodes[:limit]
+    page = list(islice(merged_nodes, limit + 1))
+    has_more = len(page) > limit
+    limited_nodes = page[:limit]
+    next_cursor = encode_cursor(list(node_sort_key(limited_nodes[-1]))) if has_more else None
     
     result = {
         "nodes": limited_nodes,
-        "total": len(all_nodes),
+        "total": len(NODES) + mcp_total,
         "showing": len(limited_nodes),
         "mcp_nodes": len([n for n in limited_nodes if n.get('isMCP')]),
         "mock_nodes": len([n for n in limited_nodes if not n.get('isMCP')]),
-        "time_window_days": time_window
+        "time_window_days": time_window,
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+        "server_time": server_time
     }
     
     # Store in cache
     medium_cache[cache_key] = result
     
-    return result
+    # Already JSON-ready: skip jsonable_encoder on the largest listing
+    return FastJSONResponse(result)
 
 
 @router.get("/node/{title}")
@@ -154,7 +152,8 @@ async def get_node_detail(
     
     **Updated:** Now handles both mock nodes + MCP nodes from MongoDB
     
-    LAZY LOADING: Quiz and summary content loaded on-demand from separate files or MongoDB
+    LAZY LOADING: Quiz and summary content loaded on-demand from separate files,
+    or joined to MCP nodes in the same MongoDB aggregation
     Cached: 5 minutes (medium_cache)
     """
     # Manual cache implementation
@@ -174,75 +173,105 @@ async def get_node_detail(
     # Validate title
     NodeValidator.validate_title(decoded_title)
     
-    # Try to find in mock nodes first
-    node = next((n for n in NODES if n["title"] == decoded_title), None)
-    is_mcp_node = False
+    # Mock nodes first (title index), then the user's MCP nodes
+    result = await fetch_node_detail(user_id, NODES_BY_TITLE.get(decoded_title), titles=[decoded_title])
     
-    # If not found in mock nodes, try MongoDB
-    if not node:
-        try:
-            node = await db.knowledge_nodes.find_one({
-                "title": decoded_title,
-                "user_id": user_id
-            })
-            if node:
-                node.pop('_id', None)
-                node.pop('user_id', None)
-                is_mcp_node = True
-                node['isMCP'] = True
-                node['mcpPlatform'] = node.get('source_platform', 'mcp')
-        except Exception as e:
-            import logging
-            logging.error(f"Error fetching MCP node: {str(e)}")
+    # Store in cache
+    medium_cache[cache_key] = result
     
-    if not node:
-        raise HTTPException(status_code=404, detail="Node not found")
+    return result
+
+
+@router.get("/node/by-id/{node_id}")
+async def get_node_detail_by_id(
+    node_id: str,
+    user_id: str = Query("demo_user", description="User ID for MCP nodes")
+):
+    """
+    DETAIL API (by id) - Same payload as GET /node/{title}
+    Used by: Modal, graph and recall links (ids are unique; titles
+    can repeat across users and run up to 200 characters)
+    
+    Static nodes resolve through the in-memory id index, MCP nodes
+    through the unique knowledge_nodes id index.
+    Cached: 5 minutes (medium_cache)
+    """
+    from utils.cache import medium_cache, generate_cache_key, cache_stats
+    
+    cache_key = generate_cache_key("get_node_detail_by_id", node_id=node_id, user_id=user_id)
+    cache_stats['total_requests'] += 1
+    
+    if cache_key in medium_cache:
+        cache_stats['hits'] += 1
+        return medium_cache[cache_key]
+    
+    cache_stats['misses'] += 1
+    
+    result = await fetch_node_detail(user_id, NODES_BY_ID.get(node_id), ids=[node_id])
+    
+    medium_cache[cache_key] = result
+    
+    return result
+
+
+@router.post("/nodes/details")
+async def get_node_details_batch(request: NodeDetailsRequest):
+    """
+    BATCH DETAIL API - Detail payloads for many nodes by id
+    Used by: Modal prefetch of a node's neighbors
+    
+    Mock nodes come from static content; all MCP nodes are fetched with
+    their quizzes and summaries in one aggregation.
+    
+    Returns:
+    - details: node id -> same payload as GET /node/{title}
+    - not_found: requested ids with no node
+    """
+    ids = list(dict.fromkeys(request.ids))
+    details = {node_id: static_node_detail(NODES_BY_ID[node_id]) for node_id in ids if node_id in NODES_BY_ID}
     
-    # LAZY LOAD: Get quiz and summary
-    if is_mcp_node:
-        # For MCP nodes, get quiz from MCP collections
-        quiz_id = node.get("quizId")
-        questions = []
-        summary = None
-        
-        if quiz_id:
-            try:
-                from db.mcp_data import mcp_quizzes_collection
-                quiz_doc = await mcp_quizzes_collection.find_one({"quiz_id": quiz_id})
-                if quiz_doc:
-                    questions = quiz_doc.get("questions", [])
-            except Exception as e:
-                import logging
-                logging.error(f"Error fetching MCP quiz: {str(e)}")
-        
-        # For MCP nodes, get summary from concept
+    mcp_ids = [node_id for node_id in ids if node_id not in details]
+    if mcp_ids:
         try:
-            from db.mcp_data import mcp_concepts_collection
-            concept = await mcp_concepts_collection.find_one({"node_id": node.get("id")})
-            if concept:
-                summary = {
-                    "content": concept.get("summary", ""),
-                    "keyTakeaways": [node.get("title", "")],
-                    "keywords": []
-                }
+            for node in await find_node_details(request.user_id, ids=mcp_ids):
+                details[node["id"]] = mcp_node_detail(node)
         except Exception as e:
             import logging
-            logging.error(f"Error fetching MCP summary: {str(e)}")
-    else:
-        # For mock nodes, use existing logic
-        quiz_id = node.get("quizId")
-        quiz_data = QUIZ_CONTENT.get(quiz_id) if quiz_id else None
-        questions = quiz_data.get("questions", []) if quiz_data else []
-        
-        summary_id = node.get("summaryId")
-        summary = SUMMARY_CONTENT.get(summary_id) if summary_id else None
-    
-    # Build comprehensive response
-    result = {
+            logging.error(f"Error fetching MCP node details: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error fetching node details")
+    
+    return {
+        "details": details,
+        "not_found": [node_id for node_id in ids if node_id not in details]
+    }
+
+
+async def fetch_node_detail(user_id, static_node, titles=None, ids=None):
+    """
+    Detail of a mock node if given, else of the user's MCP node matching
+    titles/ids (quiz and summary joined in one aggregation); 404 if neither
+    """
+    if static_node:
+        return static_node_detail(static_node)
+    
+    details = []
+    try:
+        details = await find_node_details(user_id, titles=titles, ids=ids)
+    except Exception as e:
+        import logging
+        logging.error(f"Error fetching MCP node: {str(e)}")
+    if not details:
+        raise HTTPException(status_code=404, detail="Node not found")
+    return mcp_node_detail(details[0])
+
+
+def build_node_detail(node, questions, summary):
+    """Modal payload for a node with its (lazy loaded) quiz and summary"""
+    return {
         "node": node,
         "summary": summary,
         "quiz": {
-            "title": decoded_title,
+            "title": node["title"],
             "questions": questions
         } if questions else None,
         "performance": {
@@ -252,8 +281,26 @@ async def get_node_detail(
             "lastReview": node.get("lastReview", "Never")
         }
     }
+
+
+def static_node_detail(node):
+    """Detail of a mock node (static quiz and summary content, keyed by id)"""
+    quiz_id = node.get("quizId")
+    quiz_data = QUIZ_CONTENT.get(quiz_id) if quiz_id else None
+    questions = quiz_data.get("questions", []) if quiz_data else []
     
-    # Store in cache
-    medium_cache[cache_key] = result
-    
-    return result
+    summary_id = node.get("summaryId")
+    summary = SUMMARY_CONTENT.get(summary_id) if summary_id else None
+    return build_node_detail(node, questions, summary)
+
+
+def mcp_node_detail(node):
+    """Detail of an MCP node returned by find_node_details()"""
+    questions = node.pop("questions", [])
+    concept_summary = node.pop("summary", None)
+    summary = {
+        "content": concept_summary or "",
+        "keyTakeaways": [node.get("title", "")],
+        "keywords": []
+    } if concept_summary is not None else None
+    return build_node_detail(node, questions, summary)
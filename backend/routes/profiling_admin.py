@@ -0,0 +1,34 @@
+"""
+Profiling Administration Routes
+Endpoints for listing and downloading stored request profiles
+(admin token required, see utils/admin.py)
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from utils.admin import require_admin
+from utils.profiler import list_profiles, get_profile_path
+
+router = APIRouter(prefix="/profiling", tags=["Profiling Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles")
+async def get_profiles():
+    """
+    List stored request profiles
+    Returns: File name, size and creation time (newest first)
+    """
+    profiles = list_profiles()
+    return {"profiles": profiles, "total": len(profiles)}
+
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str):
+    """
+    Download a stored profile (pstats format)
+    Open with speedscope, flameprof or snakeviz to get a flamegraph
+    """
+    path = get_profile_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
@@ -4,10 +4,12 @@ Endpoints for quiz submission and results tracking
 """
 
 from fastapi import APIRouter
+import asyncio
 from datetime import datetime, timezone
 import uuid
-from db.dashboard_data import NODES
-from db.connection import db
+from db.connection import get_database
+from db.user_stats import record_quiz_result
+from services.quiz_write_buffer import quiz_write_buffer
 from validation.validators import QuizValidator
 from models.quiz import QuizAnswer, QuizResultSubmit, QuizResultResponse
 from utils.logger import get_logger
@@ -25,7 +27,8 @@ async def submit_quiz_result(quiz_result: QuizResultSubmit):
     - Validates quiz submission
     - Stores quiz result in database
     - Calculates XP gain
-    - Updates node score
+    - Queues the node update (score, quizzesTaken, lastReview, state)
+      and the analytics rollups on the write-behind buffer
     - Returns success response
     """
     # Validate quiz submission
@@ -49,6 +52,7 @@ async def submit_quiz_result(quiz_result: QuizResultSubmit):
     # Prepare data for storage
     result_doc = {
         "id": str(uuid.uuid4()),
+        "user_id": quiz_result.userId,
         "nodeId": quiz_result.nodeId,
         "quizId": quiz_result.quizId,
         "score": quiz_result.score,
@@ -56,23 +60,27 @@ async def submit_quiz_result(quiz_result: QuizResultSubmit):
         "totalQuestions": quiz_result.totalQuestions,
         "answers": [answer.model_dump() for answer in quiz_result.answers],
         "xpGained": xp_gain,
-        "timestamp": datetime.now(timezone.utc).isoformat()
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "applied": False,
+        "analytics_applied": False,
+        **quiz_write_buffer.claim_fields()
     }
     
     # Store in database (mock storage)
     try:
-        await db.quiz_results.insert_one(result_doc)
+        await asyncio.gather(
+            get_database().quiz_results.insert_one(result_doc),
+            record_quiz_result(quiz_result.userId, quiz_result.percentage, result_doc["timestamp"])
+        )
+        
+        # Node update and analytics are written behind (batched with other submits)
+        quiz_write_buffer.add(result_doc)
     except Exception as e:
         logger.error(f"Error storing quiz result: {e}")
     
-    # Find the node and update its score (in real app, this would update NODES in DB)
-    node = next((n for n in NODES if n["id"] == quiz_result.nodeId), None)
+    # The node's score becomes the latest quiz percentage
     updated_score = quiz_result.percentage
-    
-    if node:
-        # In a real implementation, update the node score in database
-        updated_score = node.get("score", 0)
-        logger.info(f"Quiz submitted for node {quiz_result.nodeId}: {quiz_result.percentage}%")
+    logger.info(f"Quiz submitted for node {quiz_result.nodeId}: {quiz_result.percentage}%")
     
     # Generate motivational message
     if quiz_result.percentage == 100:
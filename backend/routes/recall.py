@@ -3,26 +3,41 @@ Recall Tasks Routes
 Endpoints for spaced repetition recall tasks and sessions
 """
 
-from fastapi import APIRouter, Query, HTTPException
-from typing import Optional
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, Query, HTTPException
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime
+from collections import defaultdict
+import asyncio
+import time
 from db.dashboard_data import NODES
-from services.recall_service import get_recall_tasks
-from db.connection import get_database
+from db.knowledge_nodes import SCHEDULE_PROJECTION, find_all_user_nodes, find_node_schedules, update_node_schedules
+from models.recall import RecallBatchComplete
+from services import scheduler
+from services.recall_service import build_schedule_table, get_recall_tasks
+from db.recall_sessions import (
+    get_recall_sessions_collection, find_due_sessions, find_daily_queue,
+    find_sessions_for_completion, next_session_id, complete_and_schedule
+)
+from db.user_stats import record_recall_completions
+from utils.cache import invalidate_user_cache
+from utils.pagination import encode_cursor, decode_cursor
+from utils.admin import has_admin_token
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Get MongoDB connection
-db = get_database()
-recall_sessions_collection = db['recall_sessions']
-
 
 @router.get("/recall-tasks")
-async def get_recall_tasks_endpoint():
-    """Get prioritized recall tasks for spaced repetition"""
-    tasks = get_recall_tasks(NODES)
+async def get_recall_tasks_endpoint(
+    user_id: str = Query("demo_user", description="User ID for MCP nodes")
+):
+    """
+    Get prioritized recall tasks for spaced repetition
+    Nodes (static demo + MCP) due today per the scheduler, most forgotten first
+    """
+    user_nodes = await find_all_user_nodes(user_id, SCHEDULE_PROJECTION)
+    tasks = get_recall_tasks(build_schedule_table(NODES, user_nodes))
     return {"tasks": tasks}
 
 
@@ -38,7 +53,9 @@ async def get_recall_sessions(
     Returns:
     - List of recall sessions sorted by due_date
     - Sessions can be pending, completed, or skipped
+    - Each session's current "retrievability" from the scheduler
     """
+    recall_sessions_collection = get_recall_sessions_collection()
     try:
         # Build query
         query = {"user_id": user_id}
@@ -53,6 +70,16 @@ async def get_recall_sessions(
         for session in sessions:
             session.pop('_id', None)
         
+        # Current retrievability of each session's node (one batch)
+        if sessions:
+            schedules = await find_node_schedules(list({s["node_id"] for s in sessions}))
+            table = build_schedule_table([], [schedules[s["node_id"]] for s in sessions if s["node_id"] in schedules])
+            recall, _ = scheduler.forecast(table["stability"], table["last_review"], time.time())
+            recall_by_node = dict(zip(table["ids"], recall.tolist()))
+            for session in sessions:
+                if session["node_id"] in recall_by_node:
+                    session["retrievability"] = round(recall_by_node[session["node_id"]], 3)
+        
         # Get completed count
         completed_count = await recall_sessions_collection.count_documents({
             "user_id": user_id,
@@ -71,6 +98,163 @@ async def get_recall_sessions(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/recall-sessions/due")
+async def get_due_sessions(
+    is_admin: bool = Depends(has_admin_token),
+    before: Optional[datetime] = Query(None, description="Sessions due before this time (UTC), default now"),
+    user_id: Optional[str] = Query(None, description="Restrict to one user"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum sessions to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """
+    DUE-NOW API - Pending sessions due before a time, across all users
+    Used by: notification and daily digest workers (admin token required)
+    
+    Ordered by (user_id, due_date, id) and paged with keyset cursors over
+    the partial pending index (no collection scan).
+    """
+    if not user_id and not is_admin:
+        raise HTTPException(status_code=403, detail="Admin token required")
+    
+    before = before or datetime.utcnow()
+    after = None
+    if cursor:
+        last_user, last_due, last_id = decode_cursor(cursor, (str, str, str))
+        try:
+            after = (last_user, datetime.fromisoformat(last_due), last_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    sessions = await find_due_sessions(before, limit + 1, after, user_id)
+    has_more = len(sessions) > limit
+    sessions = sessions[:limit]
+    
+    next_cursor = None
+    if has_more:
+        last = sessions[-1]
+        next_cursor = encode_cursor([last["user_id"], last["due_date"].isoformat(), last["id"]])
+    
+    return {
+        "sessions": sessions,
+        "before": before,
+        "next_cursor": next_cursor,
+        "has_more": has_more
+    }
+
+
+@router.get("/recall-queue")
+async def get_recall_queue(
+    user_id: str = Query(..., description="User ID"),
+    day: Optional[date] = Query(None, description="Day (YYYY-MM-DD, UTC), default today")
+):
+    """
+    Get a user's materialized recall queue for a day
+    Built by the daily batch job (python -m db.recall_sessions)
+    """
+    day = day or datetime.utcnow().date()
+    queue = await find_daily_queue(user_id, day)
+    if not queue:
+        raise HTTPException(status_code=404, detail="No recall queue for this day")
+    return queue
+
+
+def plan_next_sessions(
+    sessions: List[Dict[str, Any]],
+    successes: Dict[str, bool],
+    completed_at: datetime
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Review each session's node and build its follow-up session (no I/O)
+    
+    Sessions carry their node's schedule (find_sessions_for_completion).
+    Next session ids derive from the completed session id, so every
+    attempt at completing a session plans the same follow-up.
+    
+    Returns:
+        (new schedule per node id, next session by session id)
+    """
+    # Sessions of the same node apply in order (later reviews see earlier ones)
+    schedules = {}
+    next_sessions = {}
+    for session in sessions:
+        node_id = session["node_id"]
+        current = schedules.get(node_id) or session.get("node_schedule")
+        schedule = scheduler.review(current, scheduler.grade_from_success(successes[session["id"]]), completed_at)
+        schedules[node_id] = schedule
+        
+        next_sessions[session["id"]] = {
+            "id": next_session_id(session["id"]),
+            "user_id": session["user_id"],
+            "node_id": node_id,
+            "concept_text": session["concept_text"],
+            "type": session["type"],
+            "status": "pending",
+            "due_date": datetime.fromisoformat(schedule["due_date"]),
+            "interval_days": schedule["interval_days"],
+            "attempts": 0,
+            "last_attempt": None,
+            "created_at": completed_at.isoformat()
+        }
+    
+    return schedules, next_sessions
+
+
+async def complete_sessions(
+    successes: Dict[str, bool],
+    completed_at: datetime
+) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """
+    Complete recall sessions and schedule their follow-ups
+    
+    Three round trips whatever the batch size: one read of the sessions
+    with their node schedules, one ordered bulk write that upserts each
+    follow-up and then claims its session (complete_and_schedule), and
+    the node schedule and stats updates for the claimed sessions, run
+    concurrently. The status guard means node schedules and stats are
+    updated once however often a completion is submitted.
+    
+    Returns:
+        (claimed sessions, next session by claimed session id, status of
+        each skipped session that exists)
+    """
+    sessions = await find_sessions_for_completion(list(successes))
+    pending = [session for session in sessions if session["status"] == "pending"]
+    schedules, next_sessions = plan_next_sessions(pending, successes, completed_at)
+    
+    claimed_ids = set(await complete_and_schedule(next_sessions, completed_at))
+    claimed = [session for session in pending if session["id"] in claimed_ids]
+    if len(claimed) != len(pending):
+        # Lost a race for some sessions: only the claimed ones update node schedules
+        schedules, next_sessions = plan_next_sessions(claimed, successes, completed_at)
+    next_by_id = {session["id"]: next_sessions[session["id"]] for session in claimed}
+    
+    if claimed:
+        # One stats update per user
+        by_user = defaultdict(lambda: ([], []))
+        for session in claimed:
+            due_dates, next_due_dates = by_user[session["user_id"]]
+            due_dates.append(session["due_date"])
+            next_due_dates.append(next_by_id[session["id"]]["due_date"])
+        await asyncio.gather(
+            update_node_schedules(schedules),
+            *(
+                record_recall_completions(user_id, due_dates, next_due_dates, completed_at.isoformat())
+                for user_id, (due_dates, next_due_dates) in by_user.items()
+            )
+        )
+        
+        # Review priorities changed (cached recommendations, node listings)
+        for user_id in by_user:
+            invalidate_user_cache(user_id)
+    
+    # Sessions pending when read but claimed by a concurrent request are completed now
+    statuses = {
+        session["id"]: "completed" if session["status"] == "pending" else session["status"]
+        for session in sessions if session["id"] not in claimed_ids
+    }
+    return claimed, next_by_id, statuses
+
+
 @router.post("/recall-sessions/{session_id}/complete")
 async def complete_recall_session(
     session_id: str,
@@ -78,54 +262,34 @@ async def complete_recall_session(
 ):
     """
     Mark a recall session as completed and schedule next one
+    
+    Idempotent: the follow-up (deterministic id) and the status-guarded
+    claim go in one ordered bulk write, so double submits complete the
+    session once and it is never completed without its follow-up.
     """
     try:
-        # Get the session
-        session = await recall_sessions_collection.find_one({"id": session_id})
-        
-        if not session:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        # Update session
-        update_data = {
-            "status": "completed",
-            "last_attempt": datetime.utcnow().isoformat(),
-            "attempts": session.get("attempts", 0) + 1
-        }
+        completed_at = datetime.utcnow()
+        # Also updates the node's memory state; failed recalls come back
+        # sooner instead of dropping out
+        claimed, next_by_id, statuses = await complete_sessions({session_id: success}, completed_at)
         
-        await recall_sessions_collection.update_one(
-            {"id": session_id},
-            {"$set": update_data}
-        )
-        
-        # If successful, schedule next recall session
-        if success:
-            next_interval = session.get("next_interval_days", 7)
-            next_due_date = datetime.utcnow() + timedelta(days=next_interval)
-            
-            # Create next session
-            next_session = {
-                "id": f"recall_{session['node_id']}_{int(datetime.utcnow().timestamp())}",
-                "user_id": session["user_id"],
-                "node_id": session["node_id"],
-                "concept_text": session["concept_text"],
-                "type": session["type"],
-                "status": "pending",
-                "due_date": next_due_date.isoformat(),
-                "interval_days": next_interval,
-                "next_interval_days": next_interval * 2,  # Double the interval
-                "attempts": 0,
-                "last_attempt": None,
-                "created_at": datetime.utcnow().isoformat()
+        if not claimed:
+            if session_id not in statuses:
+                raise HTTPException(status_code=404, detail="Session not found")
+            return {
+                "success": True,
+                "message": f"Recall session already {statuses[session_id]}",
+                "next_session_scheduled": False
             }
-            
-            await recall_sessions_collection.insert_one(next_session)
-            logger.info(f"Scheduled next recall for {next_due_date.date()}")
+        
+        next_session = next_by_id[session_id]
+        logger.info(f"Scheduled next recall for {next_session['due_date'].date()}")
         
         return {
             "success": True,
             "message": "Recall session completed",
-            "next_session_scheduled": success
+            "next_session_scheduled": True,
+            "next_due_date": next_session["due_date"]
         }
         
     except HTTPException:
@@ -133,3 +297,43 @@ async def complete_recall_session(
     except Exception as e:
         logger.error(f"Error completing recall session: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/recall-sessions/complete-batch")
+async def complete_recall_sessions_batch(batch: RecallBatchComplete):
+    """
+    Complete a whole review session (up to 100 recalls) in one request
+    
+    Same guarantees as the single endpoint: each session is completed
+    at most once, however often the batch is retried.
+    
+    Returns:
+    - completed: session_id, next_session_id and next_due_date per completed session
+    - already_completed / not_found: session ids that were skipped
+    """
+    try:
+        completed_at = datetime.utcnow()
+        successes = {result.session_id: result.success for result in batch.results}
+        
+        claimed, next_by_id, statuses = await complete_sessions(successes, completed_at)
+        skipped = [session_id for session_id in successes if session_id not in next_by_id]
+        
+        logger.info(f"Completed {len(claimed)}/{len(successes)} recall sessions in batch")
+        
+        return {
+            "success": True,
+            "completed": [
+                {
+                    "session_id": session["id"],
+                    "next_session_id": next_by_id[session["id"]]["id"],
+                    "next_due_date": next_by_id[session["id"]]["due_date"]
+                }
+                for session in claimed
+            ],
+            "already_completed": [session_id for session_id in skipped if session_id in statuses],
+            "not_found": [session_id for session_id in skipped if session_id not in statuses]
+        }
+        
+    except Exception as e:
+        logger.error(f"Error completing recall sessions: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -3,36 +3,25 @@ Statistics Routes
 Endpoints for dashboard and user statistics
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from db.dashboard_data import NODES
+from db.user_stats import get_or_compute_user_stats, today
 from services.stats_service import get_stats
-from utils.cache import cached, medium_cache
 
 router = APIRouter()
 
 
 @router.get("/stats")
-async def get_all_stats():
+async def get_all_stats(
+    user_id: str = Query("demo_user", description="User ID for MCP nodes, quizzes and recall sessions")
+):
     """
     Get all statistics
     Returns: Dashboard stats, insights stats, and knowledge graph stats
-    Cached: 5 minutes (medium_cache)
-    """
-    # Manual cache implementation
-    from utils.cache import medium_cache, generate_cache_key, cache_stats
-    
-    cache_key = generate_cache_key("get_all_stats")
-    cache_stats['total_requests'] += 1
-    
-    if cache_key in medium_cache:
-        cache_stats['hits'] += 1
-        return medium_cache[cache_key]
-    
-    cache_stats['misses'] += 1
     
-    stats = get_stats(NODES)
-    
-    # Store in cache
-    medium_cache[cache_key] = stats
-    
-    return stats
+    Reads the user's materialized stats document (one indexed point read,
+    see db/user_stats.py), computed on first use and kept current by
+    quiz submit, recall completion and import.
+    """
+    user_stats = await get_or_compute_user_stats(user_id)
+    return get_stats(NODES, user_stats, today())
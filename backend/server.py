@@ -1,41 +1,77 @@
 from fastapi import FastAPI, APIRouter
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 import os
 from pathlib import Path
+
+# Load environment once, before any module reads configuration
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
 from auth import auth_router, set_database
 from routes import google_auth
 
 # Import modular routes
-from routes import health, nodes, dashboard, stats, recall, insights, quiz, cache_admin, mcp
+from routes import health, nodes, graph, dashboard, stats, recall, insights, quiz, cache_admin, profiling_admin, mcp
 
 # Import middleware
 from middleware.logging import RequestLoggingMiddleware
 from middleware.rate_limit import RateLimitMiddleware
 from middleware.cache import CacheMiddleware
+from middleware.compression import CompressionMiddleware
+from middleware.profiling import ProfilingMiddleware
+
+# Import centralized database connection (client is created in lifespan)
+from db.connection import get_database, close_client
+from db.indexes import ensure_indexes, verify_query_plans
+from db.recall_sessions import migrate_due_dates
+from db.user_sessions import migrate_sessions
+from services.llm_client import close_llm_client
+from services.quiz_write_buffer import quiz_write_buffer
 
-# Import centralized database connection
-from db.connection import db, client
+from utils.responses import FastJSONResponse
 
 # Import and setup centralized logging
 from utils.logger import setup_logging, get_logger
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
-
 # Setup logging (must be done before any logger usage)
 setup_logging()
 logger = get_logger(__name__)
 
-# Set database for auth modules
-set_database(db)
-google_auth.set_database(db)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the database client on startup and release clients on shutdown"""
+    db = get_database()
+    
+    # Set database for auth modules
+    set_database(db)
+    google_auth.set_database(db)
+    
+    # Session dates/duplicates must be fixed before the TTL and unique indexes build
+    await migrate_sessions()
+    await ensure_indexes(db, replace=os.environ.get('REPLACE_CONFLICTING_INDEXES', 'false').lower() == 'true')
+    await migrate_due_dates()
+    if os.environ.get('VERIFY_QUERY_PLANS', 'false').lower() == 'true':
+        await verify_query_plans(db)
+    await quiz_write_buffer.start()
+    
+    yield
+    
+    # Flush buffered quiz updates while the database client is still open
+    await quiz_write_buffer.stop()
+    close_client()
+    await close_llm_client()
+
 
 # Create the main app without a prefix
 app = FastAPI(
     title="Knowledge Retention API",
     description="API for knowledge retention and learning platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Create a router with the /api prefix
@@ -44,12 +80,14 @@ api_router = APIRouter(prefix="/api")
 # Include modular routes
 api_router.include_router(health.router, tags=["Health"])
 api_router.include_router(nodes.router, tags=["Nodes"])
+api_router.include_router(graph.router, tags=["Graph"])
 api_router.include_router(dashboard.router, tags=["Dashboard"])
 api_router.include_router(stats.router, tags=["Statistics"])
 api_router.include_router(recall.router, tags=["Recall Tasks"])
 api_router.include_router(insights.router, tags=["Insights"])
 api_router.include_router(quiz.router, tags=["Quiz"])
 api_router.include_router(cache_admin.router, tags=["Cache Admin"])
+api_router.include_router(profiling_admin.router, tags=["Profiling Admin"])
 api_router.include_router(mcp.router, tags=["MCP"])
 
 # Include auth routers
@@ -69,12 +107,10 @@ app.add_middleware(
 )
 
 # Add custom middleware
-app.add_middleware(CacheMiddleware)           # Cache responses
+app.add_middleware(ProfilingMiddleware)       # Opt-in profiling (cache misses only)
+app.add_middleware(CacheMiddleware)           # Cache responses (and their compressed variants)
+app.add_middleware(CompressionMiddleware)     # gzip/brotli for uncached responses
 app.add_middleware(RateLimitMiddleware)       # Rate limiting
 app.add_middleware(RequestLoggingMiddleware)  # Request logging
 
 # Logging already configured via setup_logging() above
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""
+Graph Service
+Business logic for knowledge graph edges and incremental loading
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+def build_edges(nodes: Iterable[Dict[str, Any]], node_ids: Optional[Set[str]] = None) -> List[Dict[str, str]]:
+    """
+    Build undirected edges from node connection lists
+
+    Args:
+        nodes: Nodes with "id" and "connections"
+        node_ids: If given, only keep edges whose both ends are in this set
+
+    Returns:
+        Edges as {"source", "target"}, each pair listed once
+    """
+    seen = set()
+    edges = []
+
+    for node in nodes:
+        for connected_id in node.get("connections") or []:
+            if node_ids is not None and connected_id not in node_ids:
+                continue
+
+            pair = (node["id"], connected_id) if node["id"] < connected_id else (connected_id, node["id"])
+            if pair not in seen:
+                seen.add(pair)
+                edges.append({"source": pair[0], "target": pair[1]})
+
+    return edges
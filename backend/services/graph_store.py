@@ -0,0 +1,404 @@
+"""
+Graph Store
+Compact in-memory knowledge graphs, one per user, with LRU eviction
+
+Each UserGraph keeps:
+- Node ids interned to ints (index position)
+- Scores as int16, states as uint8 codes, created_at as float64 epochs
+- Connections in CSR form (indptr/indices int32 arrays)
+
+Graphs load lazily from MongoDB (static demo nodes + the user's MCP
+nodes), take incremental updates on writes and are reloaded after
+max_age_seconds so other workers' writes show up.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from db.dashboard_data import NODES
+from db.knowledge_nodes import find_all_user_nodes, state_from_score
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STATES = ["fading", "medium", "high"]
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+
+
+def parse_epoch(value: Union[str, datetime, None]) -> float:
+    """Epoch seconds of an ISO timestamp or datetime, naive = UTC (NaN when missing/invalid)"""
+    try:
+        moment = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return np.nan
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class UserGraph:
+    """Compact graph of one user's nodes (array attributes + CSR adjacency)"""
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.version = 0  # Any change (scores, nodes, edges)
+        self.structure_version = 0  # Node/edge additions only
+        self.loaded_at = time.monotonic()
+
+        # Node attributes (position = interned id)
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.titles: List[str] = []
+        self.last_reviews: List[str] = []
+        self.platforms: List[Optional[str]] = []
+        self.scores = np.zeros(0, dtype=np.int16)
+        self.states = np.zeros(0, dtype=np.uint8)
+        self.created_at = np.zeros(0, dtype=np.float64)
+        self.is_mcp = np.zeros(0, dtype=bool)
+
+        # CSR adjacency (symmetric); new edges wait in _pending until compacted
+        self.indptr = np.zeros(1, dtype=np.int32)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self._pending: List[Tuple[int, int]] = []
+
+        # Community labels cached for structure_version
+        self._labels: Optional[np.ndarray] = None
+        self._labels_version = -1
+
+    @classmethod
+    def from_nodes(cls, user_id: str, nodes: Iterable[Dict[str, Any]]) -> "UserGraph":
+        """Build a graph from node dicts (id, title, score, state, connections, ...)"""
+        nodes = list(nodes)
+        graph = cls(user_id)
+        graph._append_nodes(nodes)
+
+        for node in nodes:
+            source = graph.index[node["id"]]
+            for connected_id in node.get("connections") or []:
+                target = graph.index.get(connected_id)
+                if target is not None and target != source:
+                    graph._pending.append((source, target))
+        graph._compact()
+        return graph
+
+    # ----------------------------------------
+    # Incremental updates
+    # ----------------------------------------
+
+    def add_node(self, node: Dict[str, Any]):
+        """Add (or replace attributes of) a node"""
+        if node["id"] in self.index:
+            self.update_score(node["id"], node.get("score", 0), node.get("state"))
+            return
+        self._append_nodes([node])
+        self.version += 1
+        self.structure_version += 1
+
+    def add_edges(self, node_id: str, connected_ids: Iterable[str]):
+        """Add undirected edges from node_id to each connected id"""
+        source = self.index.get(node_id)
+        if source is None:
+            return
+        for connected_id in connected_ids:
+            target = self.index.get(connected_id)
+            if target is not None and target != source:
+                self._pending.append((source, target))
+        self.version += 1
+        self.structure_version += 1
+
+    def update_score(self, node_id: str, score: int, state: Optional[str] = None):
+        """Update a node's score (and state, derived from score if not given)"""
+        position = self.index.get(node_id)
+        if position is None:
+            return
+        self.scores[position] = score
+        self.states[position] = STATE_CODES.get(state, STATE_CODES[state_from_score(score)])
+        self.version += 1
+
+    def _append_nodes(self, nodes: List[Dict[str, Any]]):
+        start = len(self.ids)
+        for offset, node in enumerate(nodes):
+            self.index[node["id"]] = start + offset
+            self.ids.append(node["id"])
+            self.titles.append(node.get("title", ""))
+            self.last_reviews.append(node.get("lastReview") or "Never")
+            self.platforms.append(node.get("source_platform"))
+
+        scores = [node.get("score", 0) for node in nodes]
+        states = [STATE_CODES.get(node.get("state"), STATE_CODES[state_from_score(score)])
+                  for node, score in zip(nodes, scores)]
+        self.scores = np.concatenate([self.scores, np.asarray(scores, dtype=np.int16)])
+        self.states = np.concatenate([self.states, np.asarray(states, dtype=np.uint8)])
+        self.created_at = np.concatenate([
+            self.created_at, np.asarray([parse_epoch(node.get("created_at")) for node in nodes], dtype=np.float64)
+        ])
+        self.is_mcp = np.concatenate([
+            self.is_mcp, np.asarray([node.get("isMCP", False) for node in nodes], dtype=bool)
+        ])
+
+    def _compact(self):
+        """Merge pending edges into the CSR arrays (symmetric, deduplicated)"""
+        size = len(self.ids)
+        rows = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int64), np.diff(self.indptr))
+        cols = self.indices.astype(np.int64)
+
+        if self._pending:
+            pending = np.asarray(self._pending, dtype=np.int64)
+            rows = np.concatenate([rows, pending[:, 0], pending[:, 1]])
+            cols = np.concatenate([cols, pending[:, 1], pending[:, 0]])
+            self._pending = []
+
+        # Deduplicate (row, col) pairs; unique() also sorts by row then col
+        keys = np.unique(rows * size + cols) if len(rows) else np.zeros(0, dtype=np.int64)
+        rows, cols = keys // max(size, 1), keys % max(size, 1)
+
+        self.indptr = np.zeros(size + 1, dtype=np.int32)
+        np.cumsum(np.bincount(rows, minlength=size), out=self.indptr[1:])
+        self.indices = cols.astype(np.int32)
+
+    # ----------------------------------------
+    # Traversals and aggregates (vectorized)
+    # ----------------------------------------
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    @property
+    def version_key(self) -> str:
+        """Cache key part that changes on every update or reload"""
+        return f"{self.loaded_at}:{self.version}"
+
+    def adjacency(self) -> Tuple[np.ndarray, np.ndarray]:
+        """CSR arrays (indptr, indices), compacting pending edges first"""
+        if self._pending or len(self.indptr) != self.size + 1:
+            self._compact()
+        return self.indptr, self.indices
+
+    def degrees(self) -> np.ndarray:
+        """Number of connections per node"""
+        indptr, _ = self.adjacency()
+        return np.diff(indptr)
+
+    def neighbors_of(self, positions: np.ndarray) -> np.ndarray:
+        """All neighbor positions of a set of nodes (with repeats)"""
+        indptr, indices = self.adjacency()
+        starts = indptr[positions]
+        lengths = indptr[positions + 1] - starts
+        if lengths.sum() == 0:
+            return np.zeros(0, dtype=np.int32)
+        # Offset of each neighbor slot: its node's start + position within the slice
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return indices[offsets]
+
+    def k_hop(self, node_id: str, hops: int, max_nodes: int) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """
+        Level-synchronous BFS from a node, bounded by hops and max_nodes
+
+        Returns:
+            (positions, depths, truncated); nearest nodes first
+        """
+        root = self.index[node_id]
+        visited = np.zeros(self.size, dtype=bool)
+        visited[root] = True
+
+        positions = [np.asarray([root], dtype=np.int32)]
+        depths = [np.zeros(1, dtype=np.int32)]
+        count, truncated = 1, False
+        frontier = positions[0]
+
+        for depth in range(1, hops + 1):
+            if len(frontier) == 0:
+                break
+            candidates = np.unique(self.neighbors_of(frontier))
+            frontier = candidates[~visited[candidates]]
+            if count + len(frontier) > max_nodes:
+                frontier = frontier[:max_nodes - count]
+                truncated = True
+            visited[frontier] = True
+            positions.append(frontier.astype(np.int32))
+            depths.append(np.full(len(frontier), depth, dtype=np.int32))
+            count += len(frontier)
+
+        return np.concatenate(positions), np.concatenate(depths), truncated
+
+    def subgraph_edges(self, positions: np.ndarray) -> List[Dict[str, str]]:
+        """Undirected edges between the given nodes, each listed once"""
+        indptr, indices = self.adjacency()
+        member = np.zeros(self.size, dtype=bool)
+        member[positions] = True
+
+        rows = np.repeat(np.arange(self.size, dtype=np.int32), np.diff(indptr))
+        keep = member[rows] & member[indices] & (rows < indices)
+        return [
+            {"source": self.ids[source], "target": self.ids[target]}
+            for source, target in zip(rows[keep].tolist(), indices[keep].tolist())
+        ]
+
+    def communities(self) -> np.ndarray:
+        """
+        Community label per node from modularity local moving on connections
+
+        Cached per structure_version. After additions the previous labels
+        seed the run (new nodes start in their own community), so it
+        usually settles in one or two passes.
+        """
+        if self._labels is not None and self._labels_version == self.structure_version:
+            return self._labels
+
+        labels = np.arange(self.size, dtype=np.int64)
+        if self._labels is not None:
+            labels[:len(self._labels)] = self._labels
+
+        indptr, indices = self.adjacency()
+        self._labels = modularity_communities(indptr, indices, labels)
+        self._labels_version = self.structure_version
+        return self._labels
+
+    def state_counts(self) -> Dict[str, int]:
+        """Number of nodes per state"""
+        counts = np.bincount(self.states, minlength=len(STATES))
+        return {state: int(counts[code]) for code, state in enumerate(STATES)}
+
+    def mean_score(self) -> float:
+        return float(self.scores.mean()) if self.size else 0.0
+
+    def node_view(self, position: int) -> Dict[str, Any]:
+        """Graph view dict of one node (same shape as /api/nodes?view=graph)"""
+        indptr, indices = self.adjacency()
+        node = {
+            "id": self.ids[position],
+            "title": self.titles[position],
+            "state": STATES[self.states[position]],
+            "score": int(self.scores[position]),
+            "connections": [self.ids[i] for i in indices[indptr[position]:indptr[position + 1]].tolist()],
+            "lastReview": self.last_reviews[position],
+        }
+        if self.is_mcp[position]:
+            node["isMCP"] = True
+            node["mcpPlatform"] = self.platforms[position] or "mcp"
+            if not np.isnan(self.created_at[position]):
+                created_at = datetime.fromtimestamp(self.created_at[position], timezone.utc)
+                node["created_at"] = created_at.replace(tzinfo=None).isoformat()
+        return node
+
+
+def modularity_communities(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    labels: np.ndarray,
+    max_passes: int = 10
+) -> np.ndarray:
+    """
+    Modularity local moving (first phase of Louvain) over a CSR graph
+
+    Each pass visits every node and moves it to the neighboring community
+    with the largest modularity gain; stops when a pass moves nothing.
+    """
+    degrees = np.diff(indptr).astype(np.float64)
+    total_degree = degrees.sum()
+    if total_degree == 0:
+        return labels
+
+    labels = labels.copy()
+    totals = np.bincount(labels, weights=degrees, minlength=len(labels))
+
+    for _ in range(max_passes):
+        moved = 0
+        for node in np.flatnonzero(degrees).tolist():
+            degree, current = degrees[node], labels[node]
+            totals[current] -= degree
+
+            # Links from this node into each neighboring community
+            candidates, links = np.unique(labels[indices[indptr[node]:indptr[node + 1]]], return_counts=True)
+            gains = links - totals[candidates] * degree / total_degree
+            stay_gain = links[candidates == current].sum() - totals[current] * degree / total_degree
+
+            best = int(np.argmax(gains))
+            target = candidates[best] if gains[best] > stay_gain else current
+            totals[target] += degree
+            if target != current:
+                labels[node] = target
+                moved += 1
+
+        if not moved:
+            break
+
+    return labels
+
+
+class GraphStore:
+    """Per-user UserGraph cache with lazy loading and LRU eviction"""
+
+    def __init__(self, max_users: int = 256, max_age_seconds: int = 300):
+        self.max_users = max_users
+        self.max_age_seconds = max_age_seconds
+        self._graphs: "OrderedDict[str, UserGraph]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def get(self, user_id: str) -> UserGraph:
+        """Get a user's graph, loading it from MongoDB on miss or expiry"""
+        graph = self._fresh(user_id)
+        if graph is not None:
+            return graph
+
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            # Another request may have loaded it while we waited
+            graph = self._fresh(user_id)
+            if graph is None:
+                graph = await self._load(user_id)
+                self._graphs[user_id] = graph
+                self._graphs.move_to_end(user_id)
+                self._evict()
+        return graph
+
+    def peek(self, user_id: str) -> Optional[UserGraph]:
+        """Get a user's graph only if it is already loaded (for incremental writes)"""
+        return self._graphs.get(user_id)
+
+    def invalidate(self, user_id: str):
+        """Drop a user's graph so the next get() reloads it"""
+        self._graphs.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._graphs),
+            "max_users": self.max_users,
+            "nodes": sum(graph.size for graph in self._graphs.values())
+        }
+
+    def _fresh(self, user_id: str) -> Optional[UserGraph]:
+        graph = self._graphs.get(user_id)
+        if graph is None:
+            return None
+        if time.monotonic() - graph.loaded_at > self.max_age_seconds:
+            self._graphs.pop(user_id, None)
+            return None
+        self._graphs.move_to_end(user_id)
+        return graph
+
+    def _evict(self):
+        while len(self._graphs) > self.max_users:
+            user_id, _ = self._graphs.popitem(last=False)
+            self._locks.pop(user_id, None)
+            logger.info(f"Evicted graph for user: {user_id}")
+
+    async def _load(self, user_id: str) -> UserGraph:
+        start_time = time.time()
+        mcp_nodes = await find_all_user_nodes(user_id)
+        graph = UserGraph.from_nodes(user_id, list(NODES) + mcp_nodes)
+        logger.info(
+            f"Loaded graph for user {user_id}: {graph.size} nodes "
+            f"in {(time.time() - start_time) * 1000:.2f}ms"
+        )
+        return graph
+
+
+# Shared store (one per worker process)
+graph_store = GraphStore()
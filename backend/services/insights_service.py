@@ -3,92 +3,188 @@ Insights Service
 Business logic for knowledge clusters and personalized recommendations
 """
 
+import time
+
+import numpy as np
+
+from services.graph_store import STATE_CODES, parse_epoch
+
+# Review ranking weights (sum to 1)
+RECOMMENDATION_WEIGHTS = {"due": 0.4, "fading": 0.3, "centrality": 0.2, "recency": 0.1}
+MAX_OVERDUE_DAYS = 14
+RECENCY_HALF_LIFE_DAYS = 7
+
+
+def get_knowledge_clusters(graph, min_size=2):
+    """
+    Group a user's nodes into clusters (communities of connected topics)
+
+    Communities come from graph.communities() (cached per graph
+    structure version); strength is the average score per community,
+    aggregated with bincount over the whole graph at once.
+
+    Args:
+        graph: UserGraph from services.graph_store
+        min_size: Smallest community reported as a cluster
+    """
+    if graph.size == 0:
+        return []
+
+    labels = graph.communities()
+    sizes = np.bincount(labels, minlength=graph.size)
+    score_sums = np.bincount(labels, weights=graph.scores, minlength=graph.size)
+    degrees = graph.degrees()
+
+    # Hub (most connected node, then highest score) names each cluster
+    order = np.lexsort((-graph.scores, -degrees, labels))
+    first = np.concatenate([[True], labels[order][1:] != labels[order][:-1]])
+    hubs = dict(zip(labels[order][first].tolist(), order[first].tolist()))
 
-def get_knowledge_clusters(nodes):
-    """Generate knowledge clusters by analyzing node connections"""
     clusters = []
-    
-    # Memory Retention cluster (high retention nodes)
-    memory_nodes = [n for n in nodes if n["id"] in ["t1", "t2", "t5"]]
-    if memory_nodes:
-        avg_score = sum(n["score"] for n in memory_nodes) // len(memory_nodes)
+    for label in np.flatnonzero(sizes >= min_size).tolist():
+        members = np.flatnonzero(labels == label).tolist()
+        hub = hubs[label]
         clusters.append({
-            "id": "cluster1",
-            "name": "Memory Retention",
-            "topics": [n["title"] for n in memory_nodes],
-            "strength": avg_score,
-            "lastReview": min(n["lastReview"] for n in memory_nodes)
+            "id": f"cluster_{graph.ids[hub]}",
+            "name": graph.titles[hub],
+            "topics": [graph.titles[i] for i in members],
+            "nodeIds": [graph.ids[i] for i in members],
+            "strength": int(score_sums[label] // sizes[label]),
+            "lastReview": min(graph.last_reviews[i] for i in members)
         })
-    
-    # Study Techniques cluster
-    study_nodes = [n for n in nodes if n["id"] in ["t2", "t3", "t5"]]
-    if study_nodes:
-        avg_score = sum(n["score"] for n in study_nodes) // len(study_nodes)
-        clusters.append({
-            "id": "cluster2",
-            "name": "Study Techniques",
-            "topics": [n["title"] for n in study_nodes],
-            "strength": avg_score,
-            "lastReview": min(n["lastReview"] for n in study_nodes)
-        })
-    
-    # Cognitive Science cluster
-    cognitive_nodes = [n for n in nodes if n["id"] in ["t4", "t6", "t7"]]
-    if cognitive_nodes:
-        avg_score = sum(n["score"] for n in cognitive_nodes) // len(cognitive_nodes)
-        clusters.append({
-            "id": "cluster3",
-            "name": "Cognitive Science",
-            "topics": [n["title"] for n in cognitive_nodes],
-            "strength": avg_score,
-            "lastReview": min(n["lastReview"] for n in cognitive_nodes)
-        })
-    
+
+    # Largest clusters first
+    clusters.sort(key=lambda c: (-len(c["topics"]), c["id"]))
     return clusters
 
 
-def get_recommendations(nodes):
-    """Generate personalized recommendations based on node states"""
+def rank_review_candidates(graph, due_dates, now=None):
+    """
+    Score every node for review, all nodes at once
+
+    priority = weighted sum of
+    - due-ness: days a pending recall session is overdue (capped at 14)
+    - fading: how far the score is below 100
+    - centrality: degree relative to the best connected node
+    - recency: recently imported nodes decay from 1 with a 7 day half-life
+
+    Args:
+        graph: UserGraph from services.graph_store
+        due_dates: Earliest pending due date by node ID
+        now: Epoch seconds (defaults to current time)
+
+    Returns:
+        (positions of review candidates, their priorities)
+    """
+    now = now or time.time()
+
+    due = np.full(graph.size, np.nan)
+    for node_id, due_date in due_dates.items():
+        position = graph.index.get(node_id)
+        if position is not None:
+            due[position] = parse_epoch(due_date)
+
+    overdue_days = (now - due) / 86400
+    is_due = overdue_days >= 0  # NaN (no pending session) compares False
+    dueness = np.where(is_due, np.minimum(overdue_days, MAX_OVERDUE_DAYS) / MAX_OVERDUE_DAYS, 0.0)
+    fading = np.clip(100 - graph.scores.astype(np.float64), 0, 100) / 100
+
+    degrees = graph.degrees()
+    centrality = degrees / max(int(degrees.max(initial=0)), 1)
+
+    age_days = (now - graph.created_at) / 86400
+    recency = np.nan_to_num(0.5 ** (np.maximum(age_days, 0) / RECENCY_HALF_LIFE_DAYS), nan=0.0)
+
+    priority = (
+        RECOMMENDATION_WEIGHTS["due"] * dueness
+        + RECOMMENDATION_WEIGHTS["fading"] * fading
+        + RECOMMENDATION_WEIGHTS["centrality"] * centrality
+        + RECOMMENDATION_WEIGHTS["recency"] * recency
+    )
+
+    candidates = np.flatnonzero((graph.states == STATE_CODES["fading"]) | is_due)
+    return candidates, priority[candidates]
+
+
+def top_k(priorities, k):
+    """Indices of the k highest priorities, highest first (argpartition, no full sort)"""
+    k = min(k, len(priorities))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-priorities, k - 1)[:k]
+    return top[np.argsort(-priorities[top], kind="stable")]
+
+
+def get_recommendations(graph, due_dates, offset=0, limit=10):
+    """
+    Generate personalized recommendations, one page at a time
+
+    Order: review recommendations by priority (see rank_review_candidates),
+    then one practice quiz for the strongest topic, then one connection
+    between the two best connected topics.
+
+    Args:
+        graph: UserGraph from services.graph_store
+        due_dates: Earliest pending due date by node ID
+        offset: Recommendations to skip
+        limit: Page size
+
+    Returns:
+        (recommendations page, total number of recommendations)
+    """
+    candidates, priorities = rank_review_candidates(graph, due_dates)
+    fading = graph.states == STATE_CODES["fading"]
+
     recommendations = []
-    
-    # Find fading nodes (need review)
-    fading_nodes = [n for n in nodes if n["state"] == "fading"]
-    for node in fading_nodes:
+    for index in top_k(priorities, offset + limit)[offset:].tolist():
+        position = int(candidates[index])
+        node_id, title = graph.ids[position], graph.titles[position]
         recommendations.append({
-            "id": f"rec_review_{node['id']}",
+            "id": f"rec_review_{node_id}",
             "type": "review",
-            "title": f"Review: {node['title']}",
-            "description": "This topic is fading. Review now to strengthen retention.",
-            "priority": "high",
+            "title": f"Review: {title}",
+            "description": (
+                "This topic is fading. Review now to strengthen retention." if fading[position]
+                else "A recall session for this topic is due. Review now to stay on schedule."
+            ),
+            "priority": "high" if fading[position] else "medium",
             "action": "Review Now",
-            "nodeId": node["id"]
+            "nodeId": node_id
         })
-    
-    # Find strong nodes (practice to maintain)
-    strong_nodes = [n for n in nodes if n["state"] == "high" and n["score"] > 85]
-    if strong_nodes:
-        node = strong_nodes[0]  # Pick the strongest
-        recommendations.append({
-            "id": f"rec_practice_{node['id']}",
+
+    extras = []
+
+    # Strongest topic (practice to maintain)
+    strong = (graph.states == STATE_CODES["high"]) & (graph.scores > 85)
+    if strong.any():
+        position = int(np.argmax(np.where(strong, graph.scores, -1)))
+        node_id, title = graph.ids[position], graph.titles[position]
+        extras.append({
+            "id": f"rec_practice_{node_id}",
             "type": "practice",
-            "title": f"Practice: {node['title']} Quiz",
-            "description": f"Your {node['title']} knowledge is strong. Test yourself to maintain it.",
+            "title": f"Practice: {title} Quiz",
+            "description": f"Your {title} knowledge is strong. Test yourself to maintain it.",
             "priority": "low",
             "action": "Take Quiz",
-            "nodeId": node["id"]
+            "nodeId": node_id
         })
-    
-    # Find connection opportunities (nodes with many connections)
-    connected_nodes = sorted(nodes, key=lambda n: len(n["connections"]), reverse=True)
-    if len(connected_nodes) >= 2:
-        n1, n2 = connected_nodes[0], connected_nodes[1]
-        recommendations.append({
+
+    # Connection opportunity (two best connected topics)
+    if graph.size >= 2:
+        first, second = top_k(graph.degrees(), 2).tolist()
+        extras.append({
             "id": "rec_connection_1",
             "type": "connection",
-            "title": f"Connect: {n1['title']} ↔ {n2['title']}",
+            "title": f"Connect: {graph.titles[first]} ↔ {graph.titles[second]}",
             "description": "These concepts complement each other. Review together for deeper understanding.",
             "priority": "medium",
             "action": "Explore Connection"
         })
-    
-    return recommendations
+
+    # Extras follow the review recommendations
+    extras_start = max(offset - len(candidates), 0)
+    remaining = limit - len(recommendations)
+    if remaining > 0:
+        recommendations += extras[extras_start:extras_start + remaining]
+
+    return recommendations, len(candidates) + len(extras)
@@ -7,6 +7,9 @@ import logging
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import uuid
+import numpy as np
+from services.graph_store import graph_store
+from db.user_stats import record_node_import
 
 logger = logging.getLogger(__name__)
 
@@ -93,6 +96,11 @@ class KnowledgeIntegrationService:
             result = await self.nodes_collection.insert_one(node)
             node['_id'] = str(result.inserted_id)
             
+            # Keep the user's in-memory graph current (if loaded)
+            graph = graph_store.peek(user_id)
+            if graph is not None:
+                graph.add_node({**node, "isMCP": True})
+            
             logger.info(f"Created node: {node_id} for user {user_id}")
             
             return node
@@ -123,11 +131,14 @@ class KnowledgeIntegrationService:
         try:
             logger.info(f"Finding connections for node: {node_id}")
             
-            # Get user's existing nodes
-            existing_nodes = await self.nodes_collection.find({
-                "user_id": user_id,
-                "id": {"$ne": node_id}  # Exclude the new node itself
-            }).to_list(length=100)
+            # Get user's existing MCP nodes from the in-memory graph
+            # (all of them, not just the first 100 in MongoDB)
+            graph = await graph_store.get(user_id)
+            existing_nodes = [
+                {"id": graph.ids[position], "title": graph.titles[position]}
+                for position in np.flatnonzero(graph.is_mcp).tolist()
+                if graph.ids[position] != node_id  # Exclude the new node itself
+            ]
             
             if not existing_nodes:
                 logger.info("No existing nodes to connect to")
@@ -163,18 +174,20 @@ class KnowledgeIntegrationService:
                     break
             
             # Update the new node with connections
+            # (updated_at drives incremental graph loading)
             if connections:
+                updated_at = datetime.utcnow().isoformat()
                 await self.nodes_collection.update_one(
                     {"id": node_id},
-                    {"$set": {"connections": connections}}
+                    {"$set": {"connections": connections, "updated_at": updated_at}}
                 )
                 
                 # Also add bidirectional connections (update existing nodes)
-                for connected_id in connections:
-                    await self.nodes_collection.update_one(
-                        {"id": connected_id},
-                        {"$addToSet": {"connections": node_id}}
-                    )
+                await self.nodes_collection.update_many(
+                    {"id": {"$in": connections}},
+                    {"$addToSet": {"connections": node_id}, "$set": {"updated_at": updated_at}}
+                )
+                graph.add_edges(node_id, connections)
             
             logger.info(f"Linked node {node_id} to {len(connections)} existing nodes")
             
@@ -193,11 +206,8 @@ class KnowledgeIntegrationService:
         """
         Schedule a spaced repetition recall session for a new concept
         
-        Uses initial spaced repetition schedule:
-        - First review: 1 day
-        - Second review: 3 days
-        - Third review: 7 days
-        - Etc.
+        First review is due after 1 day; each completion then schedules
+        the next one from the node's stability (services/scheduler.py).
         
         Args:
             user_id: User ID
@@ -221,9 +231,8 @@ class KnowledgeIntegrationService:
                 "concept_text": concept_text[:100],
                 "type": "quiz",
                 "status": "pending",
-                "due_date": first_review_date.isoformat(),
-                "interval_days": 1,  # Current interval
-                "next_interval_days": 3,  # Next interval if successful
+                "due_date": first_review_date,  # BSON datetime (UTC)
+                "interval_days": 1,  # Later intervals come from services/scheduler.py
                 "attempts": 0,
                 "last_attempt": None,
                 "created_at": datetime.utcnow().isoformat()
@@ -296,6 +305,14 @@ class KnowledgeIntegrationService:
                 concept_text=concept_text
             )
             
+            # Keep the user's materialized stats current
+            await record_node_import(
+                user_id=user_id,
+                score=node['score'],
+                connection_count=len(connections),
+                due_date=recall_session['due_date']
+            )
+            
             logger.info(f"✅ Complete integration: node={node['id']}, connections={len(connections)}, recall={recall_session['id']}")
             
             return {
@@ -0,0 +1,42 @@
+"""
+LLM Client
+Shared OpenAI client, created on first use
+
+The OpenAI SDK is only imported when the first LLM call needs it, so
+importing routes or workers that never call the LLM stays cheap.
+"""
+
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+
+def get_llm_client():
+    """
+    Get the shared AsyncOpenAI client (created on first call)
+
+    Raises:
+        ValueError: If OPENAI_API_KEY is not set
+    """
+    global _client
+    if _client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            logger.error("OPENAI_API_KEY not found in environment variables")
+            raise ValueError("OPENAI_API_KEY must be set in .env file")
+
+        from openai import AsyncOpenAI
+        _client = AsyncOpenAI(api_key=api_key)
+        logger.info("OpenAI client initialized")
+    return _client
+
+
+async def close_llm_client():
+    """Close the shared client if it was created"""
+    global _client
+    if _client is not None:
+        await _client.close()
+    _client = None
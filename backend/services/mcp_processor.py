@@ -6,14 +6,9 @@ Using OpenAI SDK (industry standard, vendor-independent)
 
 import logging
 import json
-import os
 from typing import List, Dict, Any
 from datetime import datetime
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from services.llm_client import get_llm_client
 
 logger = logging.getLogger(__name__)
 
@@ -24,13 +19,8 @@ class MCPProcessor:
     def __init__(self):
         self.llm_model = "gpt-4o"  # Using GPT-4o (or user can change to gpt-5 when available)
         
-        # Initialize OpenAI client with API key from environment
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            logger.error("OPENAI_API_KEY not found in environment variables")
-            raise ValueError("OPENAI_API_KEY must be set in .env file")
-        
-        self.client = AsyncOpenAI(api_key=api_key)
+        # Shared OpenAI client (API key from environment)
+        self.client = get_llm_client()
         logger.info(f"MCPProcessor initialized with model: {self.llm_model}")
         
     async def process_conversation(self, user_id: str, conversation: Any) -> Dict[str, Any]:
@@ -0,0 +1,318 @@
+"""
+Quiz Write Buffer
+Write-behind buffer applying quiz results to knowledge nodes
+
+Submitting a quiz stores its result in quiz_results (the durable log,
+marked applied: false) and queues the node update here. Updates to the
+same node coalesce (latest score, summed quizzesTaken), and a background
+task flushes them every QUIZ_FLUSH_INTERVAL_SECONDS - or sooner once
+QUIZ_FLUSH_MAX_PENDING nodes are waiting - as one bulk write.
+
+Durability is at-least-once:
+- Each stored result is claimed by the worker that buffers it
+  (applying_by, claimed_at); the worker renews the claims of results it
+  still holds on every sweep
+- A failed flush puts its updates back in the buffer for the next one
+- After the node write the flushed results are added to the quiz
+  analytics rollups; results are marked applied and analytics_applied,
+  and released, only once both succeed. When the analytics write fails
+  they are marked applied only (their claim kept), and the analytics
+  alone are retried on the next sweep (a failed mark is retried too)
+- Every RECOVERY_INTERVAL_SECONDS, results whose claim is older than
+  CLAIM_TIMEOUT_SECONDS (their worker stopped or crashed) are claimed
+  one by one with find_one_and_update and replayed - the node update
+  and analytics, or the analytics alone for results already applied -
+  so each is replayed by a single worker
+
+After each flush the affected users' graphs, stats and caches are
+brought up to date.
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from db.connection import get_database
+from db.knowledge_nodes import apply_quiz_updates
+from db.quiz_analytics import record_quiz_analytics
+from db.user_stats import record_score_changes
+from services.graph_store import graph_store
+from utils.cache import invalidate_user_cache
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FLUSH_INTERVAL_SECONDS = float(os.environ.get('QUIZ_FLUSH_INTERVAL_SECONDS', 2))
+FLUSH_MAX_PENDING = int(os.environ.get('QUIZ_FLUSH_MAX_PENDING', 500))
+
+RECOVERY_INTERVAL_SECONDS = float(os.environ.get('QUIZ_RECOVERY_INTERVAL_SECONDS', 30))
+# Claims not renewed for this long belong to a stopped worker (must exceed the interval)
+CLAIM_TIMEOUT_SECONDS = float(os.environ.get('QUIZ_CLAIM_TIMEOUT_SECONDS', 120))
+
+# Fields a replay needs from a stored result (node update and analytics)
+RESULT_PROJECTION = {
+    "_id": 0, "id": 1, "user_id": 1, "nodeId": 1, "quizId": 1, "percentage": 1, "applied": 1,
+    "xpGained": 1, "timestamp": 1, "answers.questionIndex": 1, "answers.isCorrect": 1
+}
+
+
+def get_quiz_results_collection():
+    """Get the quiz_results collection"""
+    return get_database()['quiz_results']
+
+
+class QuizWriteBuffer:
+    """Coalesces quiz node updates and flushes them in bulk"""
+
+    def __init__(self, interval: float = FLUSH_INTERVAL_SECONDS, max_pending: int = FLUSH_MAX_PENDING):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # node_id -> {user_id, score, quizzes, last_review, result_ids}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # Buffered results, added to the analytics rollups once applied
+        self._results: List[Dict[str, Any]] = []
+        # Applied results whose analytics write failed (retried on each sweep)
+        self._analytics: List[Dict[str, Any]] = []
+        # Marks that failed: (result ids, analytics written), retried on each sweep
+        self._unmarked: List[Tuple[List[str], bool]] = []
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._recovery_task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.failures = 0
+        self.recovered = 0
+
+    def claim_fields(self) -> Dict[str, str]:
+        """Claim of this worker, stored with each result it buffers"""
+        return {"applying_by": self.worker_id, "claimed_at": datetime.now(timezone.utc).isoformat()}
+
+    def add(self, result: Dict[str, Any]):
+        """Queue one stored quiz result (node update and analytics)"""
+        self._merge(result["nodeId"], {
+            "user_id": result.get("user_id", "demo_user"),
+            "score": result["percentage"],
+            "quizzes": 1,
+            "last_review": result["timestamp"],
+            "result_ids": [result["id"]]
+        })
+        self._results.append(result)
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    def _merge(self, node_id: str, update: Dict[str, Any]):
+        current = self._pending.get(node_id)
+        if current is None:
+            self._pending[node_id] = update
+            return
+        # Latest review wins; counts and result ids accumulate
+        newest = update if update["last_review"] >= current["last_review"] else current
+        self._pending[node_id] = {
+            "user_id": newest["user_id"],
+            "score": newest["score"],
+            "quizzes": current["quizzes"] + update["quizzes"],
+            "last_review": newest["last_review"],
+            "result_ids": current["result_ids"] + update["result_ids"]
+        }
+
+    async def flush(self) -> int:
+        """
+        Write all pending updates
+
+        Returns:
+            Number of nodes written
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            results, self._results = self._results, []
+
+            try:
+                previous = await apply_quiz_updates(batch)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Quiz write-behind flush failed, retrying {len(batch)} nodes: {e}")
+                for node_id, update in batch.items():
+                    self._merge(node_id, update)
+                self._results = results + self._results
+                return 0
+
+            self.flushes += 1
+            await self._record_analytics(results)
+            await self._after_flush(batch, previous)
+            return len(previous)
+
+    async def _after_flush(self, batch: Dict[str, Dict[str, Any]], previous: Dict[str, int]):
+        """Bring the written users' graphs, stats and caches up to date"""
+        changes = defaultdict(list)
+        for node_id, update in batch.items():
+            if node_id not in previous:
+                continue  # Static demo node (not stored)
+            user_id = update["user_id"]
+            changes[user_id].append((previous[node_id], update["score"]))
+            graph = graph_store.peek(user_id)
+            if graph is not None:
+                graph.update_score(node_id, update["score"])
+
+        await asyncio.gather(*(
+            record_score_changes(user_id, score_changes) for user_id, score_changes in changes.items()
+        ))
+        for user_id in {update["user_id"] for update in batch.values()}:
+            invalidate_user_cache(user_id)
+
+    async def _record_analytics(self, results: List[Dict[str, Any]]):
+        """Add applied results to the analytics rollups, then mark them done"""
+        result_ids = [result["id"] for result in results]
+        try:
+            await record_quiz_analytics(results)
+        except Exception as e:
+            # Nodes are written: mark them applied so a replay skips the node update
+            logger.error(f"Error updating quiz analytics for {len(results)} results, retrying on the next sweep: {e}")
+            self._analytics.extend(results)
+            await self._mark_applied(result_ids, analytics=False)
+            return
+        await self._mark_applied(result_ids, analytics=True)
+
+    async def _mark_applied(self, result_ids: List[str], analytics: bool):
+        """Mark results applied; once their analytics are written too, release the claim"""
+        update: Dict[str, Any] = {"$set": {"applied": True}}
+        if analytics:
+            update["$set"]["analytics_applied"] = True
+            update["$unset"] = {"applying_by": "", "claimed_at": ""}
+        try:
+            await get_quiz_results_collection().update_many({"id": {"$in": result_ids}}, update)
+        except Exception as e:
+            # Nodes are written; keep the claim and retry the mark on the next sweep
+            logger.error(f"Error marking {len(result_ids)} quiz results applied: {e}")
+            self._unmarked.append((result_ids, analytics))
+
+    async def renew_claims(self):
+        """Keep the claims of results this worker still holds from going stale"""
+        unmarked, self._unmarked = self._unmarked, []
+        for result_ids, analytics in unmarked:
+            await self._mark_applied(result_ids, analytics)
+
+        held = [result_id for update in self._pending.values() for result_id in update["result_ids"]]
+        held += [result_id for result_ids, _ in self._unmarked for result_id in result_ids]
+        held += [result["id"] for result in self._analytics]
+        if held:
+            await get_quiz_results_collection().update_many(
+                {"id": {"$in": held}, "applying_by": self.worker_id},
+                {"$set": {"claimed_at": datetime.now(timezone.utc).isoformat()}}
+            )
+
+    async def recover(self, limit: Optional[int] = None) -> int:
+        """
+        Claim and queue unapplied results whose worker stopped
+
+        A result qualifies when its claim is older than CLAIM_TIMEOUT_SECONDS
+        (or, for results stored before claims existed, when it is that old).
+        Each is claimed with one find_one_and_update, so concurrent sweeps
+        on other workers never replay the same result. Results already
+        applied to their node only wait for their analytics write.
+
+        Returns:
+            Number of results queued
+        """
+        limit = limit or self.max_pending
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=CLAIM_TIMEOUT_SECONDS)).isoformat()
+        stale = {"$or": [
+            {"applied": False, "claimed_at": {"$lt": cutoff}},
+            {"applied": False, "claimed_at": {"$exists": False}, "timestamp": {"$lt": cutoff}},
+            {"analytics_applied": False, "claimed_at": {"$lt": cutoff}}
+        ]}
+
+        count = 0
+        while count < limit:
+            result = await get_quiz_results_collection().find_one_and_update(
+                stale,
+                {"$set": self.claim_fields()},
+                projection=RESULT_PROJECTION,
+                sort=[("timestamp", 1)],
+                return_document=ReturnDocument.BEFORE
+            )
+            if result is None:
+                break
+            if result.get("applied"):
+                self._analytics.append(result)
+            else:
+                self.add(result)
+            count += 1
+
+        if count:
+            self.recovered += count
+            logger.info(f"Recovered {count} unapplied quiz results")
+        return count
+
+    async def retry_analytics(self):
+        """Write the analytics of applied results whose analytics write failed"""
+        results, self._analytics = self._analytics, []
+        if results:
+            await self._record_analytics(results)
+
+    async def sweep(self):
+        """Renew this worker's claims, replay results of stopped workers, retry analytics"""
+        await self.renew_claims()
+        await self.recover()
+        await self.retry_analytics()
+
+    async def _run_recovery(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Error recovering unapplied quiz results: {e}")
+            await asyncio.sleep(RECOVERY_INTERVAL_SECONDS)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Quiz write-behind error: {e}")
+
+    async def start(self):
+        """Start the periodic flush and recovery sweep (the first sweep runs right away)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        if self._recovery_task is None:
+            self._recovery_task = asyncio.create_task(self._run_recovery())
+
+    async def stop(self):
+        """Stop the periodic tasks and write what is left"""
+        for task in (self._task, self._recovery_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._recovery_task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_nodes": len(self._pending),
+            "pending_results": sum(len(update["result_ids"]) for update in self._pending.values()),
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "pending_analytics": len(self._analytics),
+            "recovered": self.recovered
+        }
+
+
+# Global buffer, started and stopped by the app lifespan
+quiz_write_buffer = QuizWriteBuffer()
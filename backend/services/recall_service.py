@@ -1,39 +1,130 @@
 """
 Recall Service
 Business logic for spaced repetition and recall tasks
+
+Due dates and retrievability come from services/scheduler.py, computed
+for all of a user's nodes in one batch.
 """
 
+import re
+import time
+
+import numpy as np
+
+from services import scheduler
+from services.graph_store import parse_epoch
+
+# Static demo nodes only have a relative "lastReview" ("2 days ago")
+REVIEW_AGE_PATTERN = re.compile(r"(\d+)\s+(day|week|month)s?\s+ago")
+REVIEW_AGE_DAYS = {"day": 1, "week": 7, "month": 30}
+
+# Stability of an MCP node before its first review (first recall after 1 day)
+NEW_NODE_STABILITY = 1.0
+
+
+def parse_review_age(last_review):
+    """Days since a relative review string ("3 weeks ago"); None if never reviewed"""
+    match = REVIEW_AGE_PATTERN.search(last_review or "")
+    if not match:
+        return None
+    return int(match.group(1)) * REVIEW_AGE_DAYS[match.group(2)]
+
+
+def build_schedule_table(static_nodes, user_nodes, now=None):
+    """
+    Collect per-node scheduler state as arrays
+
+    - Static nodes: stability seeded from score and review age
+    - MCP nodes: stored "schedule" document, or a new node's default
+      (reviewed at creation with NEW_NODE_STABILITY)
+
+    Returns:
+        Dict with ids, titles, stability, difficulty, last_review (epoch)
+    """
+    now = now or time.time()
+    ids, titles, stability, difficulty, last_review = [], [], [], [], []
+
+    ages = [parse_review_age(node.get("lastReview")) for node in static_nodes]
+    ages = np.asarray([age if age is not None else 30 for age in ages], dtype=np.float64)
+    seeded = scheduler.seed_from_score([node["score"] for node in static_nodes], ages)
+    for node, age, seeded_stability in zip(static_nodes, ages.tolist(), seeded.tolist()):
+        ids.append(node["id"])
+        titles.append(node["title"])
+        stability.append(seeded_stability)
+        difficulty.append(scheduler.WEIGHTS[4])
+        last_review.append(now - age * 86400)
+
+    for node in user_nodes:
+        schedule = node.get("schedule")
+        ids.append(node["id"])
+        titles.append(node["title"])
+        if schedule:
+            stability.append(schedule["stability"])
+            difficulty.append(schedule["difficulty"])
+            last_review.append(parse_epoch(schedule["last_review"]))
+        else:
+            stability.append(NEW_NODE_STABILITY)
+            difficulty.append(scheduler.WEIGHTS[4])
+            created_at = parse_epoch(node.get("created_at"))
+            last_review.append(now if np.isnan(created_at) else created_at)
+
+    return {
+        "ids": ids,
+        "titles": titles,
+        "stability": np.asarray(stability, dtype=np.float64),
+        "difficulty": np.asarray(difficulty, dtype=np.float64),
+        "last_review": np.asarray(last_review, dtype=np.float64)
+    }
+
+
+def format_due_time(overdue_days):
+    """Human readable due time from days overdue (negative = upcoming)"""
+    if overdue_days < 0:
+        return "Due today"
+    if overdue_days < 1:
+        return f"{max(int(overdue_days * 24), 1)} hours ago"
+    if overdue_days < 7:
+        days = int(overdue_days)
+        return f"Overdue ({days} day{'s' if days > 1 else ''})"
+    weeks = int(overdue_days // 7)
+    return f"Overdue ({weeks} week{'s' if weeks > 1 else ''})"
+
+
+def get_recall_tasks(table, now=None):
+    """
+    Generate recall tasks from nodes due for review today
+
+    Args:
+        table: Output of build_schedule_table()
+
+    Returns:
+        Tasks ordered by retrievability (most forgotten first)
+    """
+    now = now or time.time()
+    recall, due = scheduler.forecast(table["stability"], table["last_review"], now)
+
+    # Due by the end of the day
+    end_of_day = (now // 86400 + 1) * 86400
+    due_positions = np.flatnonzero(due < end_of_day)
+    due_positions = due_positions[np.argsort(recall[due_positions], kind="stable")]
 
-def get_recall_tasks(nodes):
-    """Generate recall tasks from nodes that need review"""
     tasks = []
-    
-    for node in nodes:
-        # Add to recall if fading or low score
-        if node["state"] == "fading" or node["score"] < 60:
-            # Determine priority
-            if node["state"] == "fading" and node["score"] < 50:
-                priority = "critical"
-            elif node["state"] == "fading":
-                priority = "high"
-            else:
-                priority = "medium"
-            
-            # Calculate due time based on lastReview
-            due_time = "Overdue"
-            if "2 weeks" in node["lastReview"]:
-                due_time = "Overdue (2 weeks)"
-            elif "3 weeks" in node["lastReview"]:
-                due_time = "Overdue (3 weeks)"
-            elif "1 week" in node["lastReview"]:
-                due_time = "2 hours ago"
-            
-            tasks.append({
-                "id": f"recall_{node['id']}",
-                "title": node["title"],
-                "dueTime": due_time,
-                "priority": priority,
-                "nodeId": node["id"]
-            })
-    
+    for position in due_positions.tolist():
+        node_recall = float(recall[position])
+        if node_recall < 0.5:
+            priority = "critical"
+        elif node_recall < 0.6:
+            priority = "high"
+        else:
+            priority = "medium"
+
+        tasks.append({
+            "id": f"recall_{table['ids'][position]}",
+            "title": table["titles"][position],
+            "dueTime": format_due_time((now - due[position]) / 86400),
+            "priority": priority,
+            "nodeId": table["ids"][position],
+            "retrievability": round(node_recall, 3)
+        })
+
     return tasks
@@ -0,0 +1,176 @@
+"""
+Scheduler
+FSRS-style spaced repetition with per-node stability and difficulty
+
+Memory model (FSRS-4.5):
+- Retrievability after t days: R = (1 + FACTOR * t / S) ^ DECAY
+  (S = stability in days; R(S) = 0.9)
+- Difficulty D in [1, 10] moves with each grade and reverts to the mean
+- A successful review grows S (more when R was low, less when D is high);
+  a lapse resets S to a fraction of its old value
+
+Grades: 1 = again, 2 = hard, 3 = good, 4 = easy.
+
+Every function works on NumPy arrays as well as scalars, so a user's
+whole node set is recomputed in one batch (see forecast()).
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# FSRS-4.5 default weights
+WEIGHTS = [
+    0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+    0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755
+]
+DECAY = -0.5
+FACTOR = 19 / 81
+
+AGAIN, HARD, GOOD, EASY = 1, 2, 3, 4
+
+# Target recall probability at the due date
+DESIRED_RETENTION = float(os.environ.get('RECALL_DESIRED_RETENTION', 0.9))
+
+MIN_STABILITY = 0.1
+MAX_INTERVAL_DAYS = 365
+
+
+def grade_from_success(success: bool) -> int:
+    """Map a pass/fail recall to a grade"""
+    return GOOD if success else AGAIN
+
+
+def grade_from_percentage(percentage: float) -> int:
+    """Map a quiz percentage to a grade"""
+    if percentage < 60:
+        return AGAIN
+    elif percentage < 80:
+        return HARD
+    elif percentage < 95:
+        return GOOD
+    return EASY
+
+
+# ============================================
+# Batch (vectorized) model
+# ============================================
+
+def retrievability(stability, elapsed_days):
+    """Probability of recall after elapsed_days at the given stability"""
+    stability = np.maximum(stability, MIN_STABILITY)
+    return (1 + FACTOR * np.maximum(elapsed_days, 0) / stability) ** DECAY
+
+
+def next_interval(stability, desired_retention: float = DESIRED_RETENTION):
+    """Days until retrievability drops to desired_retention (1 to MAX_INTERVAL_DAYS)"""
+    interval = stability / FACTOR * (desired_retention ** (1 / DECAY) - 1)
+    return np.clip(interval, 1, MAX_INTERVAL_DAYS)
+
+
+def initial_stability(grade):
+    return np.asarray(WEIGHTS)[np.asarray(grade) - 1]
+
+
+def initial_difficulty(grade):
+    return np.clip(WEIGHTS[4] - (np.asarray(grade) - 3) * WEIGHTS[5], 1, 10)
+
+
+def next_difficulty(difficulty, grade):
+    updated = difficulty - WEIGHTS[6] * (np.asarray(grade) - 3)
+    # Mean reversion towards the initial difficulty of a "good" first review
+    return np.clip(WEIGHTS[7] * WEIGHTS[4] + (1 - WEIGHTS[7]) * updated, 1, 10)
+
+
+def next_stability(stability, difficulty, recall, grade):
+    """Stability after a review graded `grade` when retrievability was `recall`"""
+    grade = np.asarray(grade)
+    stability = np.maximum(stability, MIN_STABILITY)
+
+    hard_penalty = np.where(grade == HARD, WEIGHTS[15], 1.0)
+    easy_bonus = np.where(grade == EASY, WEIGHTS[16], 1.0)
+    success = stability * (
+        1 + np.exp(WEIGHTS[8]) * (11 - difficulty) * stability ** -WEIGHTS[9]
+        * (np.exp((1 - recall) * WEIGHTS[10]) - 1) * hard_penalty * easy_bonus
+    )
+    lapse = (
+        WEIGHTS[11] * difficulty ** -WEIGHTS[12]
+        * ((stability + 1) ** WEIGHTS[13] - 1) * np.exp((1 - recall) * WEIGHTS[14])
+    )
+    return np.where(grade == AGAIN, np.minimum(lapse, stability), success)
+
+
+def review_batch(stability, difficulty, elapsed_days, grade) -> Tuple[np.ndarray, np.ndarray]:
+    """New (stability, difficulty) for a batch of reviews"""
+    recall = retrievability(stability, elapsed_days)
+    return (
+        next_stability(stability, difficulty, recall, grade),
+        next_difficulty(difficulty, grade)
+    )
+
+
+def forecast(stability, last_review, now: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Current retrievability and due time for a batch of nodes
+
+    Args:
+        stability: Stability in days per node
+        last_review: Last review per node (epoch seconds)
+        now: Current time (epoch seconds)
+
+    Returns:
+        (retrievability, due time in epoch seconds)
+    """
+    elapsed_days = (now - last_review) / 86400
+    due = last_review + next_interval(stability) * 86400
+    return retrievability(stability, elapsed_days), due
+
+
+def seed_from_score(score, elapsed_days):
+    """
+    Stability that explains a known retention score after elapsed_days
+
+    For nodes with a score but no review history (static demo nodes):
+    solves R(elapsed) = score / 100 for S.
+    """
+    recall = np.clip(np.asarray(score, dtype=np.float64) / 100, 0.05, 0.99)
+    elapsed_days = np.maximum(elapsed_days, 1)
+    return np.maximum(FACTOR * elapsed_days / (recall ** (1 / DECAY) - 1), MIN_STABILITY)
+
+
+# ============================================
+# Per-node schedule documents
+# ============================================
+
+def review(schedule: Optional[Dict[str, Any]], grade: int, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Apply one review to a node's schedule (None for a node never reviewed)
+
+    Returns:
+        New schedule: stability, difficulty, reps, lapses, last_review,
+        due_date, interval_days
+    """
+    now = now or datetime.utcnow()
+
+    if not schedule or not schedule.get("reps"):
+        stability = float(initial_stability(grade))
+        difficulty = float(initial_difficulty(grade))
+    else:
+        elapsed_days = (now - datetime.fromisoformat(schedule["last_review"])).total_seconds() / 86400
+        new_stability, new_difficulty = review_batch(
+            schedule["stability"], schedule["difficulty"], elapsed_days, grade
+        )
+        stability, difficulty = float(new_stability), float(new_difficulty)
+
+    interval_days = float(next_interval(stability))
+    return {
+        "stability": round(stability, 4),
+        "difficulty": round(difficulty, 4),
+        "reps": (schedule or {}).get("reps", 0) + 1,
+        "lapses": (schedule or {}).get("lapses", 0) + int(grade == AGAIN),
+        "last_review": now.isoformat(),
+        "due_date": (now + timedelta(days=interval_days)).isoformat(),
+        "interval_days": round(interval_days, 2)
+    }
@@ -3,31 +3,59 @@ Statistics Service
 Business logic for calculating user statistics and metrics
 """
 
-from services.recall_service import get_recall_tasks
+from datetime import date, timedelta
+from services.recall_service import build_schedule_table, get_recall_tasks
 
 
-def get_stats(nodes):
-    """Calculate statistics from nodes"""
-    # Calculate items due today (from recall tasks)
-    recall_tasks = get_recall_tasks(nodes)
-    items_due_today = len(recall_tasks)
+def get_streak_days(activity_days, today):
+    """Consecutive active days ending today (or yesterday, if today has no activity yet)"""
+    active = set(activity_days)
+    day = date.fromisoformat(today)
+    if day.isoformat() not in active:
+        day -= timedelta(days=1)
+
+    streak = 0
+    while day.isoformat() in active:
+        streak += 1
+        day -= timedelta(days=1)
+    return streak
+
+
+def get_stats(nodes, user_stats, today):
+    """
+    Calculate statistics from static nodes and a user's materialized stats
+
+    Args:
+        nodes: Static demo nodes
+        user_stats: Document from db.user_stats (MCP nodes, quizzes, recall)
+        today: Current UTC day (YYYY-MM-DD)
+    """
+    user_nodes = user_stats["nodes"]
+    total_nodes = len(nodes) + user_nodes["count"]
+    
+    # Items due today: static recall tasks + pending sessions due by today
+    recall_tasks = get_recall_tasks(build_schedule_table(nodes, []))
+    due_sessions = sum(
+        count for day, count in user_stats["recall"]["pending_by_day"].items() if day <= today
+    )
+    items_due_today = len(recall_tasks) + max(due_sessions, 0)
     
     # Calculate average retention (average score across all nodes)
-    total_score = sum(n["score"] for n in nodes)
-    avg_retention = total_score // len(nodes) if nodes else 0
+    total_score = sum(n["score"] for n in nodes) + user_nodes["score_sum"]
+    avg_retention = total_score // total_nodes if total_nodes else 0
     
-    # Calculate total quizzes taken
-    total_quizzes = sum(n.get("quizzesTaken", 0) for n in nodes)
+    # Total quizzes: static history + submitted quiz results
+    total_quizzes = sum(n.get("quizzesTaken", 0) for n in nodes) + user_stats["quizzes"]["count"]
     
-    # Streak days (hardcoded for now, would be user-specific in real app)
-    streak_days = 7
+    # Streak: consecutive days with a quiz or recall
+    streak_days = get_streak_days(user_stats["activity_days"], today)
     
     # Count nodes by retention state
-    strong_retention = len([n for n in nodes if n["state"] == "high"])
-    needing_review = len([n for n in nodes if n["state"] == "fading"])
+    strong_retention = len([n for n in nodes if n["state"] == "high"]) + user_nodes["strong"]
+    needing_review = len([n for n in nodes if n["state"] == "fading"]) + user_nodes["fading"]
     
     # Count total connections
-    total_connections = sum(len(n["connections"]) for n in nodes)
+    total_connections = sum(len(n["connections"]) for n in nodes) + user_nodes["connections"]
     
     return {
         "dashboard": {
@@ -41,10 +69,10 @@ def get_stats(nodes):
             "strongTopics": strong_retention,
             "needsReview": needing_review,
             "streak": streak_days,
-            "totalNotes": len(nodes)
+            "totalNotes": total_nodes
         },
         "knowledge": {
-            "totalNodes": len(nodes),
+            "totalNodes": total_nodes,
             "totalConnections": total_connections
         }
     }
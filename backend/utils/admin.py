@@ -0,0 +1,40 @@
+"""
+Admin Access
+Shared admin-token check for operator-only endpoints
+
+The token comes from ADMIN_API_TOKEN (separate from PROFILING_ADMIN_TOKEN,
+which only triggers request profiling) and is sent as X-Admin-Token.
+Tokens are compared in constant time; with no token configured, admin
+access is disabled.
+"""
+
+import hmac
+import os
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+
+def get_admin_token() -> Optional[str]:
+    """Configured admin API token (read lazily)"""
+    return os.getenv("ADMIN_API_TOKEN")
+
+
+def tokens_match(token: Optional[str], expected: Optional[str]) -> bool:
+    """Constant-time token compare (False when no token is configured)"""
+    return bool(expected) and hmac.compare_digest((token or "").encode(), expected.encode())
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    return tokens_match(token, get_admin_token())
+
+
+def has_admin_token(request: Request) -> bool:
+    """Dependency: whether the request carries the admin token"""
+    return is_admin_token(request.headers.get("X-Admin-Token"))
+
+
+def require_admin(request: Request):
+    """Dependency: reject requests without the admin token"""
+    if not has_admin_token(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -0,0 +1,181 @@
+"""
+Auth Context Cache
+In-process cache for the per-request authentication lookups
+
+- JWT claims: by token hash, until the token's "exp"
+- Sessions: by token hash, until the session expires (at most
+  AUTH_SESSION_CACHE_SECONDS, default 30, bounding how long a logout on
+  another worker goes unnoticed)
+- User documents: by user id, for AUTH_USER_CACHE_SECONDS
+- User ids: by login email, for AUTH_LOGIN_ID_CACHE_SECONDS (lets login
+  write the session while the user upsert is in flight)
+
+Tokens are only kept as SHA-256 hashes. Concurrent misses for the same
+key share one database lookup (single flight). Logout and session
+deletes call invalidate_token(); user updates call invalidate_user().
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+from cachetools import TLRUCache, TTLCache
+
+SESSION_CACHE_SECONDS = float(os.environ.get('AUTH_SESSION_CACHE_SECONDS', 30))
+USER_CACHE_SECONDS = float(os.environ.get('AUTH_USER_CACHE_SECONDS', 60))
+LOGIN_ID_CACHE_SECONDS = float(os.environ.get('AUTH_LOGIN_ID_CACHE_SECONDS', 86400))
+MAX_ENTRIES = 10000
+
+
+def _expires_at(_key, value, _now) -> float:
+    return value["cache_until"]
+
+
+# Values carry their own expiry (epoch seconds), hence time.time as timer
+claims_cache = TLRUCache(maxsize=MAX_ENTRIES, ttu=_expires_at, timer=time.time)
+session_cache = TLRUCache(maxsize=MAX_ENTRIES, ttu=_expires_at, timer=time.time)
+user_cache = TTLCache(maxsize=MAX_ENTRIES, ttl=USER_CACHE_SECONDS)
+login_id_cache = TTLCache(maxsize=MAX_ENTRIES, ttl=LOGIN_ID_CACHE_SECONDS)
+
+# Lookups in progress: (cache name, key) -> task
+_inflight: Dict[tuple, asyncio.Future] = {}
+
+
+def token_key(token: str) -> str:
+    """Cache key of a token (never store raw tokens)"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def to_epoch(value: Union[datetime, str, None]) -> Optional[float]:
+    """Epoch seconds of a datetime (naive = UTC, as returned by Motor) or ISO string"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+async def _single_flight(name: str, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run load() once for concurrent callers asking for the same key
+
+    load() runs in its own task and every caller (the first included)
+    awaits it through shield(), so a cancelled caller (client disconnect)
+    does not cancel the lookup for the others.
+    """
+    flight_key = (name, key)
+    task = _inflight.get(flight_key)
+    if task is None:
+        task = asyncio.ensure_future(load())
+        _inflight[flight_key] = task
+        task.add_done_callback(lambda done: _finish_flight(flight_key, done))
+    return await asyncio.shield(task)
+
+
+def _finish_flight(flight_key: tuple, task: asyncio.Future):
+    if _inflight.get(flight_key) is task:
+        del _inflight[flight_key]
+    # Mark retrieved so a failure whose callers were all cancelled is not logged
+    if not task.cancelled():
+        task.exception()
+
+
+# ============================================
+# JWT claims
+# ============================================
+
+def get_claims(token: str, verify: Callable[[str], Optional[dict]]) -> Optional[dict]:
+    """Verified claims of a JWT (verify() runs on a miss; failures are not cached)"""
+    key = token_key(token)
+    entry = claims_cache.get(key)
+    if entry is not None:
+        return entry["claims"]
+
+    claims = verify(token)
+    if claims and claims.get("exp"):
+        claims_cache[key] = {"claims": claims, "cache_until": float(claims["exp"])}
+    return claims
+
+
+# ============================================
+# Sessions
+# ============================================
+
+async def get_session(token: str, load: Callable[[], Awaitable[Optional[dict]]]) -> Optional[dict]:
+    """
+    Session of a token as {"user_id", "expires_at" (epoch seconds)}
+
+    load() fetches the user_sessions document on a miss; unknown tokens
+    are not cached.
+    """
+    key = token_key(token)
+    entry = session_cache.get(key)
+    if entry is not None:
+        return entry["session"]
+
+    async def fetch():
+        document = await load()
+        if not document:
+            return None
+        session = {"user_id": document["user_id"], "expires_at": to_epoch(document["expires_at"])}
+        cache_until = min(session["expires_at"], time.time() + SESSION_CACHE_SECONDS)
+        if cache_until > time.time():
+            session_cache[key] = {"session": session, "cache_until": cache_until}
+        return session
+
+    return await _single_flight("session", key, fetch)
+
+
+def invalidate_token(token: str):
+    """Forget a token's session and claims (logout, session delete)"""
+    key = token_key(token)
+    session_cache.pop(key, None)
+    claims_cache.pop(key, None)
+
+
+# ============================================
+# Users
+# ============================================
+
+async def get_user(user_id: str, load: Callable[[], Awaitable[Optional[dict]]]) -> Optional[dict]:
+    """User document by id (load() fetches it on a miss; missing users are not cached)"""
+    document = user_cache.get(user_id)
+    if document is not None:
+        return document
+
+    async def fetch():
+        document = await load()
+        if document:
+            user_cache[user_id] = document
+        return document
+
+    return await _single_flight("user", user_id, fetch)
+
+
+def invalidate_user(user_id: str):
+    """Forget a cached user document (after the user is updated)"""
+    user_cache.pop(user_id, None)
+
+
+def known_user_id(email: str) -> Optional[str]:
+    """User id last seen logging in with this email (a hint: verify it)"""
+    return login_id_cache.get(email)
+
+
+def remember_user_id(email: str, user_id: str):
+    login_id_cache[email] = user_id
+
+
+def get_auth_cache_stats() -> dict:
+    return {
+        "claims": len(claims_cache),
+        "sessions": len(session_cache),
+        "users": len(user_cache),
+        "login_ids": len(login_id_cache),
+        "inflight": len(_inflight)
+    }
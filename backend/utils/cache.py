@@ -8,6 +8,7 @@ import hashlib
 import json
 import logging
 from typing import Any, Callable, Optional
+from urllib.parse import parse_qs
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,14 @@ medium_cache = TTLCache(maxsize=200, ttl=300)
 # Long cache (15 minutes) - for mostly static data
 long_cache = TTLCache(maxsize=100, ttl=900)
 
+# HTTP response cache used by CacheMiddleware
+# Key: "<method>:<path>:<query>", value: (entry, expiry time), where
+# entry = {"identity": body bytes, "media_type": ..., "headers": endpoint headers, "gzip"/"br": compressed body}
+response_cache = {}
+
+# Requests without a user_id parameter serve the default user
+DEFAULT_USER_ID = "demo_user"
+
 # Cache statistics
 cache_stats = {
     'hits': 0,
@@ -58,8 +67,11 @@ def generate_cache_key(prefix: str, *args, **kwargs) -> str:
             key_parts.append(f"{k}:{v}")
     
     # Join and hash for consistent key length
+    # (user-scoped keys keep a readable "<user_id>:" prefix for invalidate_user_cache)
     key_string = "|".join(key_parts)
-    return hashlib.md5(key_string.encode()).hexdigest()
+    key_hash = hashlib.md5(key_string.encode()).hexdigest()
+    user_id = kwargs.get("user_id")
+    return f"{user_id}:{key_hash}" if user_id else key_hash
 
 
 def cached(cache_instance: TTLCache, key_prefix: Optional[str] = None):
@@ -141,6 +153,12 @@ def cached(cache_instance: TTLCache, key_prefix: Optional[str] = None):
     return decorator
 
 
+def response_cache_user(key: str) -> str:
+    """User a CacheMiddleware key belongs to (from its user_id query parameter)"""
+    query = key.split(":", 2)[2] if key.count(":") >= 2 else ""
+    return parse_qs(query).get("user_id", [DEFAULT_USER_ID])[0]
+
+
 def invalidate_cache(cache_instance: TTLCache, pattern: Optional[str] = None):
     """
     Invalidate cache entries
@@ -166,11 +184,16 @@ def invalidate_user_cache(user_id: str):
     Invalidate all cache entries for a specific user
     Useful when user data changes
     """
-    # Clear entries containing user_id
+    # Clear entries generated with user_id=<user_id>
+    prefix = f"{user_id}:"
     for cache in [short_cache, medium_cache, long_cache]:
-        keys_to_delete = [k for k in cache.keys() if user_id in str(k)]
+        keys_to_delete = [k for k in cache.keys() if str(k).startswith(prefix)]
         for key in keys_to_delete:
-            del cache[key]
+            cache.pop(key, None)
+    
+    # Clear cached HTTP responses for the user (CacheMiddleware)
+    for key in [k for k in response_cache if response_cache_user(k) == user_id]:
+        response_cache.pop(key, None)
     
     logger.info(f"Invalidated cache for user: {user_id}")
 
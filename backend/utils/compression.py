@@ -0,0 +1,93 @@
+"""
+Compression
+Content-encoding negotiation and gzip/brotli helpers
+
+Shared by CompressionMiddleware (streams any response) and
+CacheMiddleware (compresses each cached body once per encoding).
+Brotli is used when the brotli package is installed and the client
+accepts it; gzip otherwise.
+"""
+
+import os
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed (headers would eat the gain)
+MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # Fast enough per request; cached variants are compressed once
+
+# Content types worth compressing
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+
+def supported_encodings():
+    """Encodings in server preference order"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the encoding for an Accept-Encoding header (None = identity)
+
+    Encodings with q=0 are refused; among accepted ones the server
+    preference (br, then gzip) wins.
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, *params = [token.strip() for token in part.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name] = quality
+
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a complete body"""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+class StreamCompressor:
+    """Incremental compressor for streamed bodies"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: bytes) -> bytes:
+        """Compress a chunk, flushing so the client can decode it right away"""
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
@@ -0,0 +1,44 @@
+"""
+Pagination Utility
+Opaque cursors for keyset (seek) pagination
+"""
+
+import base64
+import json
+from fastapi import HTTPException
+from typing import Any, List, Sequence, Tuple, Type, Union
+
+# Expected type of each cursor position (a tuple allows several)
+CursorTypes = Sequence[Union[Type, Tuple[Type, ...]]]
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the sort key of the last returned item as an opaque cursor"""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: CursorTypes) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Opaque cursor from a previous response
+        types: Expected type of each sort key value, e.g. (int, (int, float), str)
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or a value has the wrong type
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    for value, expected in zip(values, types):
+        # bool is an int subclass, but never a valid sort key value
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
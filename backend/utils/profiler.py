@@ -0,0 +1,124 @@
+"""
+Request Profiling Utility
+cProfile capture and storage for investigating slow requests
+"""
+
+import cProfile
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.admin import tokens_match
+from utils.logger import LOG_DIR, get_logger
+
+logger = get_logger(__name__)
+
+# Profiles are stored next to the application logs
+PROFILE_DIR = LOG_DIR / "profiles"
+
+# cProfile hooks the whole interpreter thread, so only one request
+# can be profiled at a time per worker process
+_profile_lock = threading.Lock()
+
+
+def get_profiling_config() -> dict:
+    """Get profiling settings from environment (read lazily)"""
+    paths = os.getenv("PROFILING_PATHS", "/api/nodes,/api/mcp/receive-export")
+    return {
+        "admin_token": os.getenv("PROFILING_ADMIN_TOKEN"),
+        "sample_rate": float(os.getenv("PROFILING_SAMPLE_RATE", 0)),
+        "paths": [p.strip() for p in paths.split(",") if p.strip()],
+        "max_files": int(os.getenv("PROFILING_MAX_FILES", 50))
+    }
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Check a token against the configured profiling admin token"""
+    return tokens_match(token, get_profiling_config()["admin_token"])
+
+
+def start_profile() -> Optional[cProfile.Profile]:
+    """
+    Start a profiler if no other request is being profiled
+
+    Returns:
+        Running profiler, or None if profiling is busy
+    """
+    if not _profile_lock.acquire(blocking=False):
+        logger.info("Profiler busy, skipping request profile")
+        return None
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except Exception:
+        _profile_lock.release()
+        raise
+    return profiler
+
+
+def stop_profile(profiler: cProfile.Profile, method: str, path: str, duration_ms: float) -> Path:
+    """
+    Stop a running profiler and store its stats
+
+    The file is a standard pstats dump, which flamegraph tools
+    (speedscope, flameprof, snakeviz) read directly.
+
+    Returns:
+        Path of the stored profile
+    """
+    try:
+        profiler.disable()
+    finally:
+        _profile_lock.release()
+
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-") or "root"
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    profile_path = PROFILE_DIR / f"{timestamp}_{method}_{slug}_{int(duration_ms)}ms.prof"
+    profiler.dump_stats(str(profile_path))
+
+    logger.info(f"Stored request profile: {profile_path.name}")
+    _prune_profiles(get_profiling_config()["max_files"])
+
+    return profile_path
+
+
+def list_profiles() -> List[Dict]:
+    """
+    List stored profiles, newest first
+
+    Returns:
+        List of profile metadata (name, size, created_at)
+    """
+    if not PROFILE_DIR.exists():
+        return []
+
+    profiles = []
+    for path in sorted(PROFILE_DIR.glob("*.prof"), reverse=True):
+        stat = path.stat()
+        profiles.append({
+            "name": path.name,
+            "size_bytes": stat.st_size,
+            "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat()
+        })
+    return profiles
+
+
+def get_profile_path(name: str) -> Optional[Path]:
+    """Resolve a stored profile by file name (rejects path traversal)"""
+    if "/" in name or "\\" in name or not name.endswith(".prof"):
+        return None
+
+    path = PROFILE_DIR / name
+    return path if path.is_file() else None
+
+
+def _prune_profiles(max_files: int):
+    """Delete the oldest profiles beyond max_files"""
+    profiles = sorted(PROFILE_DIR.glob("*.prof"))
+    for path in profiles[:max(len(profiles) - max_files, 0)]:
+        path.unlink(missing_ok=True)
@@ -0,0 +1,50 @@
+"""
+JSON Responses
+Fast JSON serialization for API responses
+
+FastJSONResponse is the app's default response class. It serializes with
+orjson when installed (several times faster than stdlib json on large
+node/concept lists, and it handles datetimes and NumPy values natively)
+and falls back to compact stdlib json otherwise.
+
+FastAPI still runs jsonable_encoder over plain return values; endpoints
+with large payloads return FastJSONResponse directly to skip that pass
+(their payloads are already JSON-ready dicts and lists). Pydantic
+response_model stays on endpoints whose output needs validation.
+"""
+
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Fallback for types the serializer does not know (ObjectId, models, ...)"""
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (or compact stdlib json)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
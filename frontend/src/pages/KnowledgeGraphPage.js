@@ -35,7 +35,8 @@ const KnowledgeGraphPage = () => {
         const data = await graphService.getNodes({
           time_window: timeWindow,
           limit: 100,
-          user_id: 'demo_user'  // Pass user_id to fetch MCP nodes
+          user_id: 'demo_user',  // Pass user_id to fetch MCP nodes
+          view: 'graph'  // Lightweight node shape for rendering
         });
         
         // Add a small delay to ensure smooth transition
@@ -8,6 +8,9 @@ import json
 import sys
 sys.path.insert(0, '/app/backend')
 
+from dotenv import load_dotenv
+load_dotenv('/app/backend/.env')
+
 from services.mcp_processor import MCPProcessor
 from routes.mcp import ChatMessage, ChatConversation
 
@@ -0,0 +1,9 @@
+"""
+Test configuration
+Makes the backend packages (db, services, utils, ...) importable
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
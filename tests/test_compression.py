@@ -0,0 +1,61 @@
+"""
+Tests for utils/compression.py (Accept-Encoding negotiation)
+"""
+
+import gzip
+
+import pytest
+
+from utils import compression
+from utils.compression import StreamCompressor, choose_encoding, compress
+
+
+@pytest.fixture
+def with_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("br;q=0.0, gzip;q=0.5", "gzip"),
+    ("gzip;q=0.1, br;q=1.0", "br"),          # Server preference among accepted ones
+    ("BR;Q=0.5", "br"),
+    ("br; q=0.8", "br"),
+    ("br;level=1;q=0, gzip", "gzip"),        # q after other parameters
+    ("br;q=abc, gzip", "gzip"),              # Malformed q counts as refused
+    ("*", "br"),
+    ("*;q=0", None),
+    ("gzip;q=0, *", "br"),
+    ("br;q=0, *;q=0.5", "gzip"),
+    ("identity", None),
+    ("", None),
+])
+def test_choose_encoding_with_brotli(with_brotli, header, expected):
+    assert choose_encoding(header) == expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "gzip"),
+    ("br", None),
+    ("br, gzip;q=0", None),
+    ("*", "gzip"),
+    ("gzip;q=0.001", "gzip"),
+])
+def test_choose_encoding_without_brotli(without_brotli, header, expected):
+    assert choose_encoding(header) == expected
+
+
+def test_gzip_round_trip():
+    body = b'{"nodes": []}' * 200
+    assert gzip.decompress(compress(body, "gzip")) == body
+
+    compressor = StreamCompressor("gzip")
+    streamed = b"".join(compressor.compress(body[i:i + 500]) for i in range(0, len(body), 500))
+    assert gzip.decompress(streamed + compressor.finish()) == body
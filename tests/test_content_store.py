@@ -0,0 +1,107 @@
+"""
+Tests for db/content_store.py (build -> mmap -> lazy get -> version reload)
+"""
+
+import pytest
+
+from db.content_store import ContentStore, build_store, export_store
+
+CONTENT = {
+    "nodes": [
+        {"id": "t1", "title": "Photosynthesis", "score": 40},
+        {"id": "t2", "title": "Mitosis", "score": 85},
+    ],
+    "quizzes": {"q1": {"questions": [{"question": "Où?", "answer": "Chloroplast"}]}},
+}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "content.store"
+
+
+def test_build_and_read(path):
+    version = build_store(CONTENT, path)
+    store = ContentStore(path)
+
+    assert store.current_version() == version
+    assert store.keys("nodes") == ["t1", "t2"]
+    assert store.get("nodes", "t2") == CONTENT["nodes"][1]
+    assert store.get("quizzes", "q1") == CONTENT["quizzes"]["q1"]
+    assert store.find("nodes", "title", "Mitosis")["id"] == "t2"
+    assert store.get("nodes", "missing", "default") == "default"
+
+
+def test_items_decode_lazily_once(path):
+    build_store(CONTENT, path)
+    store = ContentStore(path)
+    store.current_version()
+
+    assert store._decoded == {}
+    first = store.get("nodes", "t1")
+    assert list(store._decoded) == [("nodes", 0)]
+    assert store.get("nodes", "t1") is first
+
+
+def test_views(path):
+    build_store(CONTENT, path)
+    store = ContentStore(path)
+
+    assert dict(store.mapping("quizzes")) == CONTENT["quizzes"]
+    assert list(store.sequence("nodes")) == CONTENT["nodes"]
+    assert store.sequence("nodes")[1:] == CONTENT["nodes"][1:]
+    assert store.index("nodes", "title")["Photosynthesis"]["id"] == "t1"
+    assert "t3" not in store.mapping("nodes")
+    with pytest.raises(KeyError):
+        store.index("nodes", "title")["Unknown"]
+
+
+def test_export_round_trip(path, tmp_path):
+    version = build_store(CONTENT, path)
+    exported = export_store(ContentStore(path))
+
+    assert exported == CONTENT
+    assert build_store(exported, tmp_path / "copy.store") == version
+
+
+def test_reloads_new_version(path):
+    old_version = build_store(CONTENT, path)
+    store = ContentStore(path, reload_interval=0)
+    assert store.get("nodes", "t1")["score"] == 40
+
+    updated = {**CONTENT, "nodes": [{"id": "t1", "title": "Photosynthesis", "score": 95}]}
+    new_version = build_store(updated, path)
+
+    assert new_version != old_version
+    assert store.get("nodes", "t1")["score"] == 95
+    assert store.current_version() == new_version
+    assert store.keys("nodes") == ["t1"]
+
+
+def test_reload_waits_for_interval(path):
+    build_store(CONTENT, path)
+    store = ContentStore(path, reload_interval=3600)
+    version = store.current_version()
+
+    build_store({**CONTENT, "nodes": []}, path)
+    assert store.current_version() == version
+    assert store.get("nodes", "t2")["title"] == "Mitosis"
+
+
+def test_rewrite_of_same_content_keeps_decoded_items(path):
+    build_store(CONTENT, path)
+    store = ContentStore(path, reload_interval=0)
+    item = store.get("nodes", "t1")
+
+    build_store(CONTENT, path)
+    assert store.get("nodes", "t1") is item
+
+
+@pytest.mark.parametrize("content", [
+    {"nodes": [{"id": "t1", "title": "A"}, {"id": "t1", "title": "B"}]},
+    {"nodes": [{"id": "t1", "title": "A"}, {"id": "t2", "title": "A"}]},
+])
+def test_duplicate_keys_rejected(path, content):
+    with pytest.raises(ValueError):
+        build_store(content, path)
+    assert not path.exists()
@@ -0,0 +1,48 @@
+"""
+Tests for utils/pagination.py (opaque keyset cursors)
+"""
+
+import base64
+
+import pytest
+from fastapi import HTTPException
+
+from utils.pagination import decode_cursor, encode_cursor
+
+NODE_CURSOR_TYPES = (int, (int, float), str)
+
+
+def test_round_trip():
+    values = [0, 42.5, "mcp_0000002a"]
+    assert decode_cursor(encode_cursor(values), NODE_CURSOR_TYPES) == values
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor([1, 2, "a/b+c?"])
+    assert "=" not in cursor
+    assert all(c.isalnum() or c in "-_" for c in cursor)
+
+
+@pytest.mark.parametrize("values", [
+    ["x", None, 1],            # Wrong types in every position
+    [1, 50],                   # Too short
+    [1, 50, "a", "b"],         # Too long
+    [True, 50, "a"],           # bool is not a valid int sort key
+    [1, "50", "a"],            # Numeric position given a string
+    [1, 50, None],             # Missing id
+])
+def test_rejects_wrong_shape_or_types(values):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(encode_cursor(values), NODE_CURSOR_TYPES)
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"not json").decode(),
+    base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+])
+def test_rejects_malformed_cursor(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, NODE_CURSOR_TYPES)
+    assert error.value.status_code == 400
@@ -0,0 +1,113 @@
+"""
+Tests for services/scheduler.py (FSRS-style stability, difficulty and intervals)
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from services import scheduler
+from services.scheduler import AGAIN, EASY, GOOD, HARD
+
+
+def test_retrievability_is_desired_retention_at_stability():
+    # FSRS defines stability as the interval at which R falls to 0.9
+    assert scheduler.retrievability(10.0, 10.0) == pytest.approx(0.9)
+    assert scheduler.retrievability(10.0, 0.0) == pytest.approx(1.0)
+
+
+def test_retrievability_decreases_with_time():
+    recall = scheduler.retrievability(5.0, np.array([0, 1, 5, 30]))
+    assert np.all(np.diff(recall) < 0)
+
+
+def test_next_interval_matches_stability_at_default_retention():
+    assert scheduler.next_interval(20.0, 0.9) == pytest.approx(20.0)
+
+
+def test_next_interval_is_clamped():
+    assert scheduler.next_interval(0.01) == 1
+    assert scheduler.next_interval(1e6) == scheduler.MAX_INTERVAL_DAYS
+
+
+def test_initial_stability_grows_with_grade():
+    stability = scheduler.initial_stability(np.array([AGAIN, HARD, GOOD, EASY]))
+    assert list(stability) == scheduler.WEIGHTS[:4]
+
+
+def test_initial_difficulty_falls_with_grade_within_bounds():
+    difficulty = scheduler.initial_difficulty(np.array([AGAIN, HARD, GOOD, EASY]))
+    assert np.all(np.diff(difficulty) < 0)
+    assert np.all((difficulty >= 1) & (difficulty <= 10))
+
+
+def test_next_difficulty_moves_with_grade_and_stays_bounded():
+    assert scheduler.next_difficulty(5.0, AGAIN) > 5.0
+    assert scheduler.next_difficulty(5.0, EASY) < 5.0
+    assert scheduler.next_difficulty(10.0, AGAIN) <= 10
+    assert scheduler.next_difficulty(1.0, EASY) >= 1
+
+
+def test_next_stability_success_grows_and_lapse_shrinks():
+    stability, difficulty, recall = 10.0, 5.0, 0.85
+    good = scheduler.next_stability(stability, difficulty, recall, GOOD)
+    hard = scheduler.next_stability(stability, difficulty, recall, HARD)
+    easy = scheduler.next_stability(stability, difficulty, recall, EASY)
+    again = scheduler.next_stability(stability, difficulty, recall, AGAIN)
+    assert hard < good < easy
+    assert good > stability
+    assert again <= stability
+
+
+def test_next_stability_grows_more_when_recall_was_low():
+    late = scheduler.next_stability(10.0, 5.0, 0.6, GOOD)
+    early = scheduler.next_stability(10.0, 5.0, 0.95, GOOD)
+    assert late > early
+
+
+def test_batch_matches_scalar():
+    stability = np.array([1.0, 5.0, 20.0])
+    difficulty = np.array([3.0, 5.0, 8.0])
+    elapsed = np.array([1.0, 7.0, 30.0])
+    grades = np.array([GOOD, AGAIN, EASY])
+    batch_stability, batch_difficulty = scheduler.review_batch(stability, difficulty, elapsed, grades)
+    for i in range(3):
+        s, d = scheduler.review_batch(stability[i], difficulty[i], elapsed[i], grades[i])
+        assert batch_stability[i] == pytest.approx(float(s))
+        assert batch_difficulty[i] == pytest.approx(float(d))
+
+
+def test_seed_from_score_reproduces_score():
+    stability = scheduler.seed_from_score(70, 10)
+    assert scheduler.retrievability(stability, 10) == pytest.approx(0.7)
+
+
+def test_review_first_and_repeat():
+    now = datetime(2025, 1, 1)
+    first = scheduler.review(None, GOOD, now)
+    assert first["reps"] == 1 and first["lapses"] == 0
+    assert first["stability"] == pytest.approx(scheduler.WEIGHTS[GOOD - 1], abs=1e-4)
+    assert datetime.fromisoformat(first["due_date"]) == pytest.approx(
+        now + timedelta(days=first["interval_days"]), abs=timedelta(minutes=15)
+    )
+
+    later = now + timedelta(days=first["interval_days"])
+    second = scheduler.review(first, GOOD, later)
+    assert second["reps"] == 2
+    assert second["stability"] > first["stability"]
+    assert second["interval_days"] > first["interval_days"]
+
+    lapse = scheduler.review(second, AGAIN, later + timedelta(days=30))
+    assert lapse["lapses"] == 1
+    assert lapse["stability"] <= second["stability"]
+
+
+@pytest.mark.parametrize("percentage, grade", [(0, AGAIN), (59, AGAIN), (60, HARD), (80, GOOD), (95, EASY), (100, EASY)])
+def test_grade_from_percentage(percentage, grade):
+    assert scheduler.grade_from_percentage(percentage) == grade
+
+
+def test_grade_from_success():
+    assert scheduler.grade_from_success(True) == GOOD
+    assert scheduler.grade_from_success(False) == AGAIN